@@ -3,10 +3,18 @@
 """
 import streamlit as st
 from pathlib import Path
-from config.config import PAGE_TITLE, PAGE_ICON
+from config.config import PAGE_TITLE, PAGE_ICON, CACHE_EXPIRY, BACKGROUND_REFRESH, REFRESH_LEAD_RATIO
 from modules.api_client import weather_api
 from modules.data_processor import weather_processor
-from utils.constants import TAIWAN_CITIES
+from modules.cache_manager import cache_manager
+from modules.change_detector import NOT_MODIFIED
+from modules.async_api_client import fetch_concurrently
+from modules.refresh_scheduler import refresh_scheduler
+from components.air_quality import get_aqi_df, AQI_TTL
+from components.weather_warnings import get_warnings_df, WARNINGS_TTL
+from components.forecast_chart import refresh_all_week_forecasts, WEEK_FORECAST_TTL
+from components.weather_overview import refresh_all_cities_forecast
+from utils.constants import TAIWAN_CITIES, FORECAST_ELEMENTS
 from utils.helpers import get_weather_icon
 
 # 頁面設定
@@ -25,30 +33,55 @@ def load_css():
 
 load_css()
 
+# 背景更新：在各資料集的快取過期前預先取得新資料，使用者只會讀到已載入的快取
+@st.cache_resource
+def start_background_refresh():
+    jobs = {
+        'forecast': (refresh_all_cities_forecast, CACHE_EXPIRY),
+        'week_forecast': (refresh_all_week_forecasts, WEEK_FORECAST_TTL),
+        'aqi': (lambda: get_aqi_df(force_refresh=True), AQI_TTL),
+        'warnings': (lambda: get_warnings_df(force_refresh=True), WARNINGS_TTL),
+    }
+    for name, (func, ttl) in jobs.items():
+        refresh_scheduler.add_job(name, func, interval=ttl * REFRESH_LEAD_RATIO)
+    refresh_scheduler.start()
+    return refresh_scheduler
+
+if BACKGROUND_REFRESH:
+    start_background_refresh()
+
 # Session State 初始化
 if 'selected_city' not in st.session_state:
     st.session_state.selected_city = '臺北市'
 if 'active_view' not in st.session_state:
     st.session_state.active_view = None
 
-# 載入資料
-@st.cache_data(ttl=1800)
+# 載入資料（只透過 cache_manager 快取：外層再加 st.cache_data 會把背景更新前的舊資料保留到整個 TTL）
 def get_weather_data(city):
-    try:
-        forecast_data = weather_api.get_forecast(city)
+    cache_key = f"forecast_{city}"
+    
+    def fetch():
+        # 已有舊資料時使用條件式請求，資料未變更則不重新解析
+        forecast_data = weather_api.get_forecast(
+            city, conditional=cache_manager.has_entry(cache_key), elements=FORECAST_ELEMENTS
+        )
+        if forecast_data is NOT_MODIFIED:
+            return NOT_MODIFIED
         if forecast_data:
             return weather_processor.parse_forecast_data(forecast_data, city)
+        return None
+    
+    try:
+        # 透過共用快取取得，多個程序共用同一個快取檔案時只會由一個程序發出請求
+        return cache_manager.get_or_fetch(cache_key, fetch, ttl=1800)
     except:
         pass
     return None
 
-@st.cache_data(ttl=3600)
 def get_week_data(city):
     try:
-        from components.forecast_chart import get_week_forecast_data, parse_week_forecast
-        api_data = get_week_forecast_data(city)
-        if api_data:
-            return parse_week_forecast(api_data, city)
+        from components.forecast_chart import get_week_forecast_df
+        return get_week_forecast_df(city)
     except:
         pass
     return None
@@ -75,9 +108,15 @@ with col2:
 
 st.markdown('<br>', unsafe_allow_html=True)
 
-# 載入當前縣市資料
-parsed_data = get_weather_data(selected_city)
-week_df = get_week_data(selected_city)
+# 載入當前縣市資料（同時發送所有請求）
+page_data = fetch_concurrently({
+    'forecast': lambda: get_weather_data(selected_city),
+    'week': lambda: get_week_data(selected_city),
+    'aqi': get_aqi_df,
+    'warnings': get_warnings_df,
+})
+parsed_data = page_data['forecast']
+week_df = page_data['week']
 
 if parsed_data:
     today_summary = weather_processor.get_today_summary(parsed_data)
@@ -231,37 +270,34 @@ if parsed_data:
         ''', unsafe_allow_html=True)
         
         try:
-            from components.air_quality import get_aqi_data, process_aqi_data
-            aqi_df = get_aqi_data()
-            if aqi_df:
-                aqi_df = process_aqi_data(aqi_df)
-                if not aqi_df.empty:
-                    city_aqi = aqi_df[aqi_df['縣市'].str.contains(selected_city[:2])]
-                    if not city_aqi.empty:
-                        avg_aqi = int(city_aqi['AQI'].mean())
-                        if avg_aqi <= 50:
-                            level, color, bg = "良好", "#28A745", "#D4EDDA"
-                        elif avg_aqi <= 100:
-                            level, color, bg = "普通", "#FFC107", "#FFF3CD"
-                        else:
-                            level, color, bg = "不良", "#DC3545", "#F8D7DA"
-                        
-                        st.markdown(f'''
-                        <div style="text-align: center;">
-                            <div style="font-size: 3rem; margin: 1rem 0;">🌬️</div>
-                            <div style="font-size: 3.5rem; color: {color}; font-weight: 700; margin: 1rem 0;">
-                                {avg_aqi}
-                            </div>
-                            <div style="background: {bg}; color: {color}; border: 2px solid {color}; border-radius: 24px; padding: 0.5rem 1.5rem; display: inline-block; font-size: 1rem; font-weight: 600; margin: 1rem 0;">
-                                {level}
-                            </div>
-                            <div style="font-size: 0.85rem; color: #7F8C8D; margin-top: 1rem;">
-                                資料來源：環保署
-                            </div>
-                        </div>
-                        ''', unsafe_allow_html=True)
+            aqi_df = page_data['aqi']
+            if aqi_df is not None and not aqi_df.empty:
+                city_aqi = aqi_df[aqi_df['縣市'].str.contains(selected_city[:2])]
+                if not city_aqi.empty:
+                    avg_aqi = int(city_aqi['AQI'].mean())
+                    if avg_aqi <= 50:
+                        level, color, bg = "良好", "#28A745", "#D4EDDA"
+                    elif avg_aqi <= 100:
+                        level, color, bg = "普通", "#FFC107", "#FFF3CD"
                     else:
-                        st.markdown('<div style="text-align: center; color: #7F8C8D; font-size: 0.95rem; padding: 2rem 0;">暫無資料</div>', unsafe_allow_html=True)
+                        level, color, bg = "不良", "#DC3545", "#F8D7DA"
+                    
+                    st.markdown(f'''
+                    <div style="text-align: center;">
+                        <div style="font-size: 3rem; margin: 1rem 0;">🌬️</div>
+                        <div style="font-size: 3.5rem; color: {color}; font-weight: 700; margin: 1rem 0;">
+                            {avg_aqi}
+                        </div>
+                        <div style="background: {bg}; color: {color}; border: 2px solid {color}; border-radius: 24px; padding: 0.5rem 1.5rem; display: inline-block; font-size: 1rem; font-weight: 600; margin: 1rem 0;">
+                            {level}
+                        </div>
+                        <div style="font-size: 0.85rem; color: #7F8C8D; margin-top: 1rem;">
+                            資料來源：環保署
+                        </div>
+                    </div>
+                    ''', unsafe_allow_html=True)
+                else:
+                    st.markdown('<div style="text-align: center; color: #7F8C8D; font-size: 0.95rem; padding: 2rem 0;">暫無資料</div>', unsafe_allow_html=True)
         except:
             st.markdown('<div style="text-align: center; color: #7F8C8D; font-size: 0.95rem; padding: 2rem 0;">載入中...</div>', unsafe_allow_html=True)
         
@@ -278,12 +314,10 @@ if parsed_data:
         ''', unsafe_allow_html=True)
         
         try:
-            from components.weather_warnings import get_warnings_data
-            warnings = get_warnings_data()
-            if warnings and 'records' in warnings:
-                records = warnings['records']
-                if 'record' in records and len(records['record']) > 0:
-                    count = len(records['record'])
+            warnings_df = page_data['warnings']
+            if warnings_df is not None:
+                if not warnings_df.empty:
+                    count = len(warnings_df)
                     st.markdown(f'''
                     <div style="font-size: 2.5rem; color: #FFC107; font-weight: 700; margin: 1rem 0;">
                         {count}
@@ -1,31 +1,106 @@
 """
 空氣品質元件 - 顯示空氣品質監測資料
 """
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import streamlit as st
+import numpy as np
 import pandas as pd
-import requests
-from typing import Dict, List, Any, Optional
-from utils.helpers import get_aqi_info
-from modules.cache_manager import cache_manager
+from typing import Dict, List, Any, Optional, Iterable, Iterator
+from utils.helpers import get_aqi_info, format_data_age, classify_aqi, AQI_LABELS, AQI_COLORS
+from modules.cache_manager import cache_manager, PartialResult
+from modules.change_detector import conditional_get, change_detector, NOT_MODIFIED
+from modules.http_client import http_session
+from modules.api_schemas import AQIResponse
+from utils.json_codec import json_codec
+from utils.rate_limiter import api_rate_limiter
+from config.config import (
+    API_ENDPOINTS, AQI_PAGE_SIZE, AQI_PAGE_WORKERS, AQI_PAGE_RETRIES, AQI_PAGE_RETRY_DELAY
+)
 
+AQI_TTL = 1800  # 30 分鐘
+AQI_PARTIAL_TTL = 120  # 部分分頁下載失敗時的快取時間（2 分鐘後重新取得）
 
-def get_aqi_data() -> Optional[List[Dict[str, Any]]]:
+# 各縣市測站明細顯示的欄位
+AQI_STATION_COLUMNS = ['測站', 'AQI', '狀態', 'PM2.5', 'PM10', '發布時間']
+
+# 環保署欄位對應內部欄位
+AQI_SOURCE_FIELDS = {
+    'sitename': 'station',
+    'county': 'county',
+    'aqi': 'aqi',
+    'pm2.5': 'pm25',
+    'pm10': 'pm10',
+    'publishtime': 'publish_time',
+}
+
+# 內部欄位對應 DataFrame 顯示欄名
+AQI_COLUMNS = {
+    'station': '測站',
+    'county': '縣市',
+    'aqi': 'AQI',
+    'status': '狀態',
+    'pm25': 'PM2.5',
+    'pm10': 'PM10',
+    'publish_time': '發布時間',
+    'color': '顏色',
+}
+
+
+def get_aqi_df(force_refresh: bool = False) -> Optional[pd.DataFrame]:
     """
-    取得空氣品質資料
+    取得處理後的空氣品質 DataFrame
     
+    Args:
+        force_refresh: 是否不論快取狀態立即取得新資料
+        
     Returns:
-        空氣品質資料列表
+        處理後的 DataFrame，無法取得資料時回傳 None
+    """
+    def fetch() -> Optional[pd.DataFrame]:
+        # 已有舊資料時使用條件式請求，資料未變更則不重新處理
+        failed_offsets: List[int] = []
+        pages = _fetch_aqi_pages(conditional=cache_manager.has_entry("aqi_df"), failed_offsets=failed_offsets)
+        if pages is NOT_MODIFIED:
+            return NOT_MODIFIED
+        if not pages:
+            return None
+        
+        # 每收到一頁就先處理，全部完成後再合併排序
+        df = process_aqi_pages(pages)
+        if df.empty:
+            return None
+        
+        # 部分頁面下載失敗：仍先顯示已取得的測站，但只短暫快取
+        if failed_offsets:
+            return PartialResult(df, AQI_PARTIAL_TTL)
+        return df
+    
+    if force_refresh:
+        return cache_manager.refresh("aqi_df", fetch, ttl=AQI_TTL)
+    
+    # 檢查快取，未命中時合併並行請求
+    return cache_manager.get_or_fetch("aqi_df", fetch, ttl=AQI_TTL)
+
+
+def _fetch_aqi_pages(conditional: bool = False,
+                     failed_offsets: Optional[List[int]] = None) -> Optional[Iterator[List[Dict[str, Any]]]]:
     """
-    # 檢查快取
-    cache_key = "aqi_data"
-    cached_data = cache_manager.get(cache_key)
+    從環保署 API 分頁取得空氣品質資料
     
-    if cached_data:
-        return cached_data
+    第一頁同步取得並從回應的 total 得知總筆數，其餘頁面在限速內同時下載，
+    依完成順序逐頁產出。環保署每小時整批發布資料，第一頁未變更即視為整批未變更。
     
+    Args:
+        conditional: 是否使用條件式請求（資料未變更時回傳 NOT_MODIFIED）
+        failed_offsets: 下載失敗頁面的起始位置會加入此列表（迭代結束後才完整）
+        
+    Returns:
+        逐頁產出紀錄列表的迭代器、NOT_MODIFIED，或無法取得資料時回傳 None
+    """
     try:
         # 使用環保署開放資料平台 API
-        url = "https://data.moenv.gov.tw/api/v2/aqx_p_432"
+        url = API_ENDPOINTS['aqi']
         
         from config.config import MOENV_API_KEY
         
@@ -34,35 +109,27 @@ def get_aqi_data() -> Optional[List[Dict[str, Any]]]:
             return None
         
         params = {
-            'limit': 1000,
+            'limit': AQI_PAGE_SIZE,
+            'offset': 0,
             'api_key': MOENV_API_KEY,
             'format': 'json'
         }
         
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
+        api_rate_limiter.wait_for_url(url)
+        response = conditional_get(url, params=params, timeout=10, conditional=conditional)
+        if response is NOT_MODIFIED:
+            return NOT_MODIFIED
         
-        # 檢查多種可能的資料結構
-        records = None
-        if isinstance(data, dict):
-            if 'records' in data:
-                records = data['records']
-            elif 'data' in data:
-                records = data['data']
-            elif 'result' in data:
-                records = data['result']
-        elif isinstance(data, list):
-            records = data
-        
-        if records:
-            # 存入快取
-            cache_manager.set(cache_key, records, ttl=1800)  # 30 分鐘
-            return records
-        
-        return None
+        data = json_codec.decode_response(response, AQIResponse)
+        first_page = _extract_aqi_records(data)
+        if not first_page:
+            return None
         
+        total = _parse_total(data)
+        if failed_offsets is None:
+            failed_offsets = []
+        return _iter_aqi_pages(url, params, first_page, total, failed_offsets)
+    
     except Exception as e:
         print(f"取得空氣品質資料錯誤: {e}")
         import traceback
@@ -70,12 +137,139 @@ def get_aqi_data() -> Optional[List[Dict[str, Any]]]:
         return None
 
 
-def process_aqi_data(aqi_data: List[Dict[str, Any]]) -> pd.DataFrame:
+def _iter_aqi_pages(url: str, params: Dict[str, Any], first_page: List[Dict[str, Any]],
+                    total: Optional[int], failed_offsets: List[int]) -> Iterator[List[Dict[str, Any]]]:
+    """
+    依序產出第一頁與其餘頁面的紀錄
+    
+    Args:
+        url: API 網址
+        params: 第一頁的查詢參數
+        first_page: 第一頁的紀錄
+        total: 回應中的總筆數，未提供時為 None
+        failed_offsets: 下載失敗頁面的起始位置會加入此列表
+        
+    Returns:
+        逐頁產出紀錄列表的迭代器
+    """
+    yield first_page
+    
+    if total is None:
+        # 沒有總筆數：依序往下取，直到不足一頁為止
+        offset = len(first_page)
+        page = first_page
+        while len(page) >= AQI_PAGE_SIZE:
+            page = _fetch_aqi_page(url, params, offset)
+            if page is None:
+                failed_offsets.append(offset)
+            if not page:
+                break
+            yield page
+            offset += len(page)
+    else:
+        # 以第一頁實際筆數為間隔：伺服器的每頁上限低於 limit 時才不會漏掉中間的紀錄
+        page_size = len(first_page)
+        offsets = list(range(page_size, total, page_size))
+        if offsets:
+            with ThreadPoolExecutor(max_workers=min(AQI_PAGE_WORKERS, len(offsets))) as executor:
+                futures = {executor.submit(_fetch_aqi_page, url, params, offset): offset for offset in offsets}
+                for future in as_completed(futures):
+                    page = future.result()
+                    if page is None:
+                        failed_offsets.append(futures[future])
+                        continue
+                    yield page
+    
+    if failed_offsets:
+        print(f"⚠️ 空氣品質資料有 {len(failed_offsets)} 頁下載失敗（offset: {sorted(failed_offsets)}），本次資料不完整")
+        # 下次更新不以第一頁判斷未變更，確保會重新取得缺少的頁面
+        change_detector.forget(change_detector.request_key(url, params))
+
+
+def _fetch_aqi_page(url: str, params: Dict[str, Any], offset: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    取得單一頁面的紀錄，失敗時重試
+    
+    Args:
+        url: API 網址
+        params: 第一頁的查詢參數
+        offset: 此頁的起始位置
+        
+    Returns:
+        紀錄列表，重試後仍失敗則回傳 None
+    """
+    page_params = dict(params, offset=offset)
+    
+    for attempt in range(AQI_PAGE_RETRIES + 1):
+        try:
+            api_rate_limiter.wait_for_url(url)
+            response = http_session.get(url, params=page_params, timeout=10)
+            response.raise_for_status()
+            return _extract_aqi_records(json_codec.decode_response(response, AQIResponse)) or []
+            
+        except Exception as e:
+            print(f"取得空氣品質資料第 {offset} 筆起的頁面錯誤（第 {attempt + 1} 次）: {e}")
+            if attempt < AQI_PAGE_RETRIES:
+                time.sleep(AQI_PAGE_RETRY_DELAY * (2 ** attempt))
+    
+    return None
+
+
+def _extract_aqi_records(data: Any) -> Optional[List[Dict[str, Any]]]:
+    """從回應中取出紀錄列表（檢查多種可能的資料結構）"""
+    if isinstance(data, dict):
+        if 'records' in data:
+            return data['records']
+        elif 'data' in data:
+            return data['data']
+        elif 'result' in data:
+            return data['result']
+    elif isinstance(data, list):
+        return data
+    
+    return None
+
+
+def _parse_total(data: Any) -> Optional[int]:
+    """取得回應中的總筆數（API 以字串回傳），無法取得時回傳 None"""
+    if not isinstance(data, dict):
+        return None
+    
+    try:
+        return int(data.get('total'))
+    except (ValueError, TypeError):
+        return None
+
+
+def process_aqi_pages(pages: Iterable[List[Dict[str, Any]]]) -> pd.DataFrame:
+    """
+    逐頁處理空氣品質資料，最後合併並排序
+    
+    Args:
+        pages: 逐頁產出原始 AQI 資料的迭代器
+        
+    Returns:
+        處理後的 DataFrame
+    """
+    frames = [process_aqi_data(page, sort=False) for page in pages]
+    frames = [frame for frame in frames if not frame.empty]
+    
+    if not frames:
+        return pd.DataFrame()
+    
+    df = pd.concat(frames, ignore_index=True)
+    
+    # 按 AQI 值排序
+    return df.sort_values('AQI', ascending=False, kind='stable')
+
+
+def process_aqi_data(aqi_data: List[Dict[str, Any]], sort: bool = True) -> pd.DataFrame:
     """
     處理空氣品質資料
     
     Args:
         aqi_data: 原始 AQI 資料
+        sort: 是否按 AQI 值由高到低排序
         
     Returns:
         處理後的 DataFrame
@@ -83,58 +277,118 @@ def process_aqi_data(aqi_data: List[Dict[str, Any]]) -> pd.DataFrame:
     if not aqi_data:
         return pd.DataFrame()
     
-    processed_data = []
+    # 每個欄位只走訪一次原始紀錄，缺少的欄位為 'N/A'
+    columns = {
+        field: np.array([record.get(source, 'N/A') for record in aqi_data], dtype=object)
+        for source, field in AQI_SOURCE_FIELDS.items()
+    }
     
-    for record in aqi_data:
-        try:
-            aqi_value = record.get('aqi', '')
-            
-            # 跳過空值
-            if not aqi_value or aqi_value == '':
-                continue
-            
-            aqi_int = int(aqi_value)
-            aqi_info = get_aqi_info(aqi_int)
-            
-            processed_data.append({
-                '測站': record.get('sitename', 'N/A'),
-                '縣市': record.get('county', 'N/A'),
-                'AQI': aqi_int,
-                '狀態': aqi_info['label'],
-                'PM2.5': record.get('pm2.5', 'N/A'),
-                'PM10': record.get('pm10', 'N/A'),
-                '發布時間': record.get('publishtime', 'N/A'),
-                '顏色': aqi_info['color']
-            })
-        except (ValueError, TypeError):
-            continue
-    
-    df = pd.DataFrame(processed_data)
+    # AQI 一次轉換：只接受整數字串（與 int() 相同），空值、'N/A' 與小數等無法轉換的測站略過
+    aqi_text = pd.Series(columns['aqi']).astype(str).str.strip()
+    is_integer = aqi_text.str.fullmatch(r'[+-]?\d+').to_numpy(dtype=bool)
+    aqi = pd.to_numeric(aqi_text.where(is_integer), errors='coerce').to_numpy(dtype=float)
+    valid = np.flatnonzero(~np.isnan(aqi))
     
-    # 按 AQI 值排序
-    if not df.empty:
-        df = df.sort_values('AQI', ascending=False)
+    if valid.size == 0:
+        return pd.DataFrame()
     
-    return df
+    # 按 AQI 值由高到低排序後再取出各欄位（索引為測站在有效資料中的順序）
+    order = np.argsort(-aqi[valid], kind='stable') if sort else np.arange(valid.size)
+    rows = valid[order]
+    aqi_values = aqi[rows].astype(int)
+    
+    # 以等級分界一次分類所有測站
+    levels = classify_aqi(aqi_values)
+    
+    data = {
+        'station': columns['station'][rows],
+        'county': columns['county'][rows],
+        'aqi': aqi_values,
+        'status': AQI_LABELS[levels],
+        # PM 值保留原始字串，缺少時顯示 'N/A'
+        'pm25': columns['pm25'][rows],
+        'pm10': columns['pm10'][rows],
+        'publish_time': columns['publish_time'][rows],
+        'color': AQI_COLORS[levels],
+    }
+    
+    return pd.DataFrame(
+        {AQI_COLUMNS[field]: values for field, values in data.items()},
+        index=order
+    )
 
 
-def render_aqi_card(county: str, aqi_df: pd.DataFrame):
+def summarize_aqi_by_county(aqi_df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
     """
-    渲染單一縣市的 AQI 卡片
+    依縣市分組一次，計算各縣市的 AQI 彙總
     
     Args:
-        county: 縣市名稱
         aqi_df: 空氣品質 DataFrame
+        
+    Returns:
+        依縣市名稱排序的字典，每個縣市包含 avg_aqi、info、station_count、stations
     """
-    county_data = aqi_df[aqi_df['縣市'] == county]
+    summary = {}
+    
+    if aqi_df is None or aqi_df.empty:
+        return summary
+    
+    grouped = aqi_df.groupby('縣市', sort=True)
+    averages = grouped['AQI'].mean()
+    counts = grouped.size()
+    
+    for county, stations in grouped[AQI_STATION_COLUMNS]:
+        avg_aqi = int(averages[county])
+        summary[county] = {
+            'avg_aqi': avg_aqi,
+            'info': get_aqi_info(avg_aqi),
+            'station_count': int(counts[county]),
+            'stations': stations,
+        }
     
-    if county_data.empty:
+    return summary
+
+
+def get_aqi_county_summary(aqi_df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """
+    取得各縣市的 AQI 彙總（與 AQI 資料一起快取，資料版本改變時才重新分組）
+    
+    Args:
+        aqi_df: 空氣品質 DataFrame（get_aqi_df 的結果）
+        
+    Returns:
+        依縣市名稱排序的彙總字典
+    """
+    version = cache_manager.get_version("aqi_df")
+    cached = cache_manager.get("aqi_county_summary")
+    
+    if cached and version is not None and cached['version'] == version:
+        return cached['counties']
+    
+    counties = summarize_aqi_by_county(aqi_df)
+    
+    if version is not None:
+        cache_manager.set(
+            "aqi_county_summary", {'version': version, 'counties': counties}, ttl=AQI_TTL
+        )
+    
+    return counties
+
+
+def render_aqi_card(county: str, county_summary: Optional[Dict[str, Any]]):
+    """
+    渲染單一縣市的 AQI 卡片
+    
+    Args:
+        county: 縣市名稱
+        county_summary: 該縣市的 AQI 彙總，沒有資料時為 None
+    """
+    if not county_summary:
         st.info(f'📍 {county} 目前無空氣品質監測資料')
         return
     
-    # 計算平均 AQI
-    avg_aqi = int(county_data['AQI'].mean())
-    aqi_info = get_aqi_info(avg_aqi)
+    avg_aqi = county_summary['avg_aqi']
+    aqi_info = county_summary['info']
     
     # 顯示卡片
     st.markdown(f"""
@@ -154,7 +408,7 @@ def render_aqi_card(county: str, aqi_df: pd.DataFrame):
             ">{avg_aqi}</div>
             <div>
                 <p style="margin: 5px 0; font-size: 18px;"><b>{aqi_info['label']}</b></p>
-                <p style="margin: 5px 0; color: #888;">監測站數: {len(county_data)}</p>
+                <p style="margin: 5px 0; color: #888;">監測站數: {county_summary['station_count']}</p>
             </div>
         </div>
     </div>
@@ -162,8 +416,7 @@ def render_aqi_card(county: str, aqi_df: pd.DataFrame):
     
     # 顯示各測站詳細資料
     with st.expander(f'🔍 查看 {county} 各測站詳細資料'):
-        display_df = county_data[['測站', 'AQI', '狀態', 'PM2.5', 'PM10', '發布時間']].copy()
-        st.dataframe(display_df, width='stretch', hide_index=True)
+        st.dataframe(county_summary['stations'], width='stretch', hide_index=True)
 
 
 def render_aqi_overview():
@@ -171,19 +424,20 @@ def render_aqi_overview():
     st.subheader('💨 空氣品質監測')
     
     with st.spinner('載入空氣品質資料中...'):
-        aqi_data = get_aqi_data()
+        aqi_df = get_aqi_df()
     
-    if not aqi_data:
+    if aqi_df is None:
         st.error('❌ 無法取得空氣品質資料')
         return
     
-    # 處理資料
-    aqi_df = process_aqi_data(aqi_data)
-    
     if aqi_df.empty:
         st.warning('⚠️ 目前無有效的空氣品質資料')
         return
     
+    freshness = cache_manager.get_freshness("aqi_df")
+    if freshness:
+        st.caption(f'🕒 {format_data_age(freshness["age"])}')
+    
     # 統計資訊
     col1, col2, col3, col4 = st.columns(4)
     
@@ -258,20 +512,22 @@ def render_aqi_overview():
     
     tab1, tab2 = st.tabs(['📍 依縣市查看', '📊 完整列表'])
     
+    # 各縣市彙總只在資料更新時分組一次
+    county_summary = get_aqi_county_summary(aqi_df)
+    
     with tab1:
         selected_county = st.selectbox(
             '選擇縣市',
-            ['全部'] + sorted(aqi_df['縣市'].unique().tolist()),
+            ['全部'] + list(county_summary),
             key='aqi_county_select'
         )
         
         if selected_county == '全部':
             # 顯示所有縣市
-            counties = sorted(aqi_df['縣市'].unique())
-            for county in counties:
-                render_aqi_card(county, aqi_df)
+            for county, summary in county_summary.items():
+                render_aqi_card(county, summary)
         else:
-            render_aqi_card(selected_county, aqi_df)
+            render_aqi_card(selected_county, county_summary.get(selected_county))
     
     with tab2:
         # 顯示完整表格
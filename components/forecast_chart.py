@@ -4,47 +4,134 @@
 import streamlit as st
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+import numpy as np
 import pandas as pd
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, List, Any, Optional
 from modules.api_client import weather_api
+from modules.data_processor import weather_processor
 from modules.cache_manager import cache_manager
-from utils.helpers import get_weather_icon
+from modules.change_detector import NOT_MODIFIED
+from utils.constants import TAIWAN_CITIES, WEEK_FORECAST_ELEMENTS
+from utils.helpers import get_weather_icon, format_data_age
 
+WEEK_FORECAST_TTL = 3600  # 1 小時
 
-def get_week_forecast_data(city: str) -> Optional[Dict[str, Any]]:
+
+def get_week_forecast_data(city: Optional[str], conditional: bool = False) -> Optional[Dict[str, Any]]:
     """
-    取得一週天氣預報資料
+    取得一週天氣預報原始資料（不經快取，快取的是解析後的結果）
     
     Args:
-        city: 縣市名稱
+        city: 縣市名稱，None 代表所有縣市
+        conditional: 是否使用條件式請求（資料未變更時回傳 NOT_MODIFIED）
         
     Returns:
         一週預報資料
     """
-    # 檢查快取
+    try:
+        # 只取回圖表使用的天氣元素
+        return weather_api.get_week_forecast(
+            city, conditional=conditional, elements=WEEK_FORECAST_ELEMENTS
+        )
+    
+    except Exception as e:
+        print(f"取得一週預報錯誤: {e}")
+        return None
+
+
+def get_week_forecast_df(city: str, force_refresh: bool = False) -> Optional[pd.DataFrame]:
+    """
+    取得解析後的一週預報 DataFrame
+    
+    快取存放解析結果，重新執行頁面時不必再走訪 JSON 與建立 DataFrame。
+    
+    Args:
+        city: 縣市名稱
+        force_refresh: 是否不論快取狀態立即取得新資料
+        
+    Returns:
+        包含預報資料的 DataFrame
+    """
     cache_key = f"week_forecast_{city}"
-    cached_data = cache_manager.get(cache_key)
     
-    if cached_data:
-        return cached_data
+    def fetch() -> Optional[pd.DataFrame]:
+        # 已有舊資料時使用條件式請求，資料未變更則不重新解析
+        api_data = get_week_forecast_data(city, conditional=cache_manager.has_entry(cache_key))
+        if api_data is NOT_MODIFIED:
+            return NOT_MODIFIED
+        if not api_data:
+            return None
+        return parse_week_forecast(api_data, city)
     
     try:
-        # 取得 API 資料
-        data = weather_api.get_week_forecast(city)
+        if force_refresh:
+            return cache_manager.refresh(cache_key, fetch, ttl=WEEK_FORECAST_TTL)
         
-        if data:
-            # 存入快取
-            cache_manager.set(cache_key, data, ttl=3600)  # 1 小時
-            return data
-        
-        return None
+        # 檢查快取，未命中時合併相同縣市的並行請求
+        return cache_manager.get_or_fetch(cache_key, fetch, ttl=WEEK_FORECAST_TTL)
         
     except Exception as e:
         print(f"取得一週預報錯誤: {e}")
         return None
 
 
+def refresh_all_week_forecasts() -> Optional[Dict[str, pd.DataFrame]]:
+    """
+    以單次請求更新所有縣市的一週預報快取（供背景排程使用）
+    
+    全部縣市的資料量大，以串流方式邊讀邊解析，每讀完一個縣市就存入快取。
+    多個程序共用快取後端時只由一個程序發出請求，其他程序讀取其更新結果。
+    
+    Returns:
+        縣市名稱對應 DataFrame 的字典，無法取得資料時回傳 None
+    """
+    def collect() -> Optional[Dict[str, pd.DataFrame]]:
+        reloaded = {city: cache_manager.reload(f"week_forecast_{city}") for city in TAIWAN_CITIES}
+        return {city: df for city, df in reloaded.items() if df is not None} or None
+    
+    return cache_manager.run_exclusive("all_week_forecasts", _refresh_all_week_forecasts, collect)
+
+
+def _refresh_all_week_forecasts() -> Optional[Dict[str, pd.DataFrame]]:
+    """以單次串流請求更新所有縣市的一週預報快取（在跨程序更新權內執行）"""
+    cache_keys = {city: f"week_forecast_{city}" for city in TAIWAN_CITIES}
+    conditional = all(cache_manager.has_entry(key) for key in cache_keys.values())
+    
+    locations = weather_api.stream_week_forecast(
+        TAIWAN_CITIES, conditional=conditional, elements=WEEK_FORECAST_ELEMENTS
+    )
+    if locations is NOT_MODIFIED:
+        # 資料未變更：延長現有快取期限，不重新解析
+        renewed = {city: cache_manager.renew(key, ttl=WEEK_FORECAST_TTL) for city, key in cache_keys.items()}
+        return {city: df for city, df in renewed.items() if df is not None} or None
+    if locations is None:
+        return None
+    
+    # 內容雜湊要整個回應讀完才知道：先解析所有縣市，再決定寫入或延長快取
+    parsed = {}
+    for location_data in locations:
+        city = location_data.get('LocationName') or location_data.get('locationName')
+        df = parse_week_location(location_data)
+        if df is not None:
+            parsed[city] = df
+    
+    refreshed = {}
+    unchanged = locations.unchanged
+    skipped = unchanged and bool(parsed)
+    for city, df in parsed.items():
+        # 內容與上次相同：沿用現有快取（資料版本不變），已不在快取中的縣市才寫入
+        renewed = cache_manager.renew(cache_keys[city], ttl=WEEK_FORECAST_TTL) if unchanged else None
+        if renewed is None:
+            cache_manager.set(cache_keys[city], df, ttl=WEEK_FORECAST_TTL)
+            skipped = False
+        refreshed[city] = df if renewed is None else renewed
+    
+    locations.record(skipped=skipped)
+    return refreshed or None
+
+
 def parse_week_forecast(api_data: Dict[str, Any], city: str) -> Optional[pd.DataFrame]:
     """
     解析一週預報資料
@@ -60,109 +147,145 @@ def parse_week_forecast(api_data: Dict[str, Any], city: str) -> Optional[pd.Data
         if not api_data or 'records' not in api_data:
             return None
         
-        records = api_data['records']
-        
-        # 處理新的資料結構: records.Locations[0].Location
-        locations = []
-        if 'Locations' in records:
-            # 新版 API 結構
-            locations_list = records['Locations']
-            if isinstance(locations_list, list) and len(locations_list) > 0:
-                first_location_group = locations_list[0]
-                if 'Location' in first_location_group:
-                    locations = first_location_group['Location']
-        elif 'location' in records:
-            # 舊版 API 結構
-            locations = records['location']
+        # 找到指定縣市（支援新版 records.Locations[0].Location 與舊版 records.location）
+        location_data = weather_processor.find_location(api_data, city)
         
-        if not locations:
+        if not location_data:
             return None
         
-        # 找到指定縣市
-        location_data = None
-        for loc in locations:
-            if loc.get('LocationName') == city or loc.get('locationName') == city:
-                location_data = loc
-                break
+        return parse_week_location(location_data)
         
-        if not location_data:
-            return None
+    except Exception as e:
+        print(f"解析一週預報錯誤: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+def _first_value(keys: tuple, convert=None):
+    """
+    建立取值函式：從 ElementValue 列表中找出第一個含有任一鍵值的項目
+    
+    Args:
+        keys: 依序檢查的鍵值
+        convert: 轉換函式，None 代表不轉換
         
-        weather_elements = location_data.get('WeatherElement', [])
+    Returns:
+        取值函式，找不到時回傳 None
+    """
+    def extract(element_values: List[Dict[str, Any]]) -> Any:
+        for ev in element_values:
+            for key in keys:
+                if key in ev:
+                    return convert(ev[key]) if convert else ev[key]
+        return None
+    return extract
+
+
+def _to_pop(value: Any) -> int:
+    """降雨機率轉為整數，無法轉換時為 0"""
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return 0
+
+
+# 天氣元素名稱對應 (欄位名稱, 取值函式)
+_comfort_value = _first_value(('MinComfortIndexDescription', 'MaxComfortIndexDescription'))
+_pop_value = _first_value(('ProbabilityOfPrecipitation',), _to_pop)
+
+WEEK_ELEMENT_PARSERS = {
+    '最低溫度': ('min_temp', _first_value(('MinTemperature',), float)),
+    '最高溫度': ('max_temp', _first_value(('MaxTemperature',), float)),
+    '天氣現象': ('weather', _first_value(('Weather',))),
+    '降雨機率': ('pop', _pop_value),
+    '12小時降雨機率': ('pop', _pop_value),
+    '舒適度': ('comfort', _comfort_value),
+    '舒適度指數': ('comfort', _comfort_value),
+    '最小舒適度指數': ('comfort', _comfort_value),
+    '最大舒適度指數': ('comfort', _comfort_value),
+}
+
+WEEKDAY_NAMES = ('週一', '週二', '週三', '週四', '週五', '週六', '週日')
+WEEKDAY_NAMES_EN = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+
+@lru_cache(maxsize=512)
+def _time_labels(start_time: str) -> tuple:
+    """
+    解析時段開始時間並產生日期標籤（各縣市的時段相同，每個時間字串只解析一次）
+    
+    Args:
+        start_time: ISO 格式時間字串
         
-        # 建立資料字典
-        data_dict = {}
+    Returns:
+        (日期, 月/日字串, 英文星期, 中文星期)
+    """
+    dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
+    weekday = dt.weekday()
+    return dt.date(), dt.strftime('%m/%d'), WEEKDAY_NAMES_EN[weekday], WEEKDAY_NAMES[weekday]
+
+
+def parse_week_location(location_data: Dict[str, Any]) -> Optional[pd.DataFrame]:
+    """
+    解析單一縣市的一週預報資料（可直接使用串流解析取得的縣市資料）
+    
+    Args:
+        location_data: 縣市資料（包含 WeatherElement）
         
-        for element in weather_elements:
-            element_name = element.get('ElementName')
-            time_data = element.get('Time', [])
+    Returns:
+        包含預報資料的 DataFrame
+    """
+    try:
+        # 依開始時間排列的時段，以及各欄位的 {時段索引: 值}
+        row_index: Dict[str, int] = {}
+        start_times: List[str] = []
+        end_times: List[Any] = []
+        columns: Dict[str, Dict[int, Any]] = {}
+        
+        # 單次走訪：以對照表決定每個元素的欄位與取值方式
+        for element in location_data.get('WeatherElement', []):
+            parser = WEEK_ELEMENT_PARSERS.get(element.get('ElementName'))
+            if parser is None:
+                continue
             
-            for time_item in time_data:
+            column_name, extract = parser
+            column = columns.setdefault(column_name, {})
+            
+            for time_item in element.get('Time', []):
                 start_time = time_item.get('StartTime')
-                end_time = time_item.get('EndTime')
-                
-                if start_time not in data_dict:
-                    data_dict[start_time] = {
-                        'start_time': start_time,
-                        'end_time': end_time,
-                    }
+                if start_time is None:
+                    continue
                 
-                # 根據元素名稱解析資料
-                element_values = time_item.get('ElementValue', [])
+                row = row_index.get(start_time)
+                if row is None:
+                    row = row_index[start_time] = len(start_times)
+                    start_times.append(start_time)
+                    end_times.append(time_item.get('EndTime'))
                 
-                if element_name == '最低溫度':  # 最低溫
-                    for ev in element_values:
-                        if 'MinTemperature' in ev:
-                            data_dict[start_time]['min_temp'] = float(ev['MinTemperature'])
-                            break
-                elif element_name == '最高溫度':  # 最高溫
-                    for ev in element_values:
-                        if 'MaxTemperature' in ev:
-                            data_dict[start_time]['max_temp'] = float(ev['MaxTemperature'])
-                            break
-                elif element_name == '天氣現象':  # 天氣現象
-                    for ev in element_values:
-                        if 'Weather' in ev:
-                            data_dict[start_time]['weather'] = ev['Weather']
-                            break
-                elif element_name == '降雨機率' or element_name == '12小時降雨機率':  # 降雨機率
-                    for ev in element_values:
-                        if 'ProbabilityOfPrecipitation' in ev:
-                            try:
-                                data_dict[start_time]['pop'] = int(ev['ProbabilityOfPrecipitation'])
-                            except (ValueError, TypeError):
-                                data_dict[start_time]['pop'] = 0
-                            break
-                elif element_name in ['舒適度', '舒適度指數', '最小舒適度指數', '最大舒適度指數']:  # 舒適度
-                    for ev in element_values:
-                        if 'MinComfortIndexDescription' in ev:
-                            data_dict[start_time]['comfort'] = ev['MinComfortIndexDescription']
-                            break
-                        elif 'MaxComfortIndexDescription' in ev:
-                            data_dict[start_time]['comfort'] = ev['MaxComfortIndexDescription']
-                            break
+                value = extract(time_item.get('ElementValue', []))
+                if value is not None:
+                    column[row] = value
         
-        # 轉換為 DataFrame
-        df = pd.DataFrame(list(data_dict.values()))
+        if not start_times:
+            return pd.DataFrame()
         
-        if not df.empty:
-            # 移除沒有必要資料的行
-            df = df.dropna(subset=['start_time'])
-            
-            if not df.empty:
-                df['date'] = pd.to_datetime(df['start_time']).dt.date
-                df['date_str'] = pd.to_datetime(df['start_time']).dt.strftime('%m/%d')
-                
-                # 使用中文星期
-                weekday_map = {
-                    'Mon': '週一', 'Tue': '週二', 'Wed': '週三', 
-                    'Thu': '週四', 'Fri': '週五', 'Sat': '週六', 'Sun': '週日'
-                }
-                df['weekday_en'] = pd.to_datetime(df['start_time']).dt.strftime('%a')
-                df['weekday'] = df['weekday_en'].map(weekday_map)
+        num_rows = len(start_times)
+        data = {'start_time': start_times, 'end_time': end_times}
+        for column_name, values in columns.items():
+            # 沒有任何值的欄位不建立，與逐筆建立 DataFrame 時相同
+            if values:
+                data[column_name] = [values.get(row, np.nan) for row in range(num_rows)]
         
-        return df
+        # 日期欄位由快取的時間解析結果組成
+        dates, date_strs, weekdays_en, weekdays = zip(*map(_time_labels, start_times))
+        data['date'] = list(dates)
+        data['date_str'] = list(date_strs)
+        data['weekday_en'] = list(weekdays_en)
+        data['weekday'] = list(weekdays)
         
+        return pd.DataFrame(data)
+    
     except Exception as e:
         print(f"解析一週預報錯誤: {e}")
         import traceback
@@ -292,38 +415,6 @@ def create_rain_prob_chart(df: pd.DataFrame) -> go.Figure:
     return fig
 
 
-def display_week_forecast_charts(week_data: List[Dict[str, Any]], city: str):
-    """
-    顯示一週預報圖表（用於一頁式設計）
-    
-    Args:
-        week_data: 一週預報資料列表
-        city: 縣市名稱
-    """
-    if not week_data:
-        st.info('📊 暫無一週預報資料')
-        return
-    
-    # 解析資料
-    api_data = get_week_forecast_data(city)
-    if api_data:
-        df = parse_week_forecast(api_data, city)
-        
-        if df is not None and not df.empty:
-            # 建立兩欄顯示圖表
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.markdown('#### 📈 溫度趨勢')
-                temp_chart = create_temperature_chart(df)
-                st.plotly_chart(temp_chart, width='stretch')
-            
-            with col2:
-                st.markdown('#### 🌧️ 降雨機率')
-                rain_chart = create_rain_prob_chart(df)
-                st.plotly_chart(rain_chart, width='stretch')
-
-
 def render_week_forecast(city: str):
     """
     渲染一週天氣預報
@@ -334,19 +425,20 @@ def render_week_forecast(city: str):
     st.subheader(f'📅 {city} 一週天氣預報')
     
     with st.spinner('載入一週預報資料中...'):
-        api_data = get_week_forecast_data(city)
+        df = get_week_forecast_df(city)
     
-    if not api_data:
+    if df is None:
         st.error('❌ 無法取得一週預報資料')
         return
     
-    # 解析資料
-    df = parse_week_forecast(api_data, city)
-    
-    if df is None or df.empty:
+    if df.empty:
         st.warning('⚠️ 目前無一週預報資料')
         return
     
+    freshness = cache_manager.get_freshness(f"week_forecast_{city}")
+    if freshness:
+        st.caption(f'🕒 {format_data_age(freshness["age"])}')
+    
     # 顯示圖表
     tab1, tab2, tab3 = st.tabs(['📈 溫度趨勢', '🌧️ 降雨機率', '📋 詳細資料'])
     
@@ -4,13 +4,38 @@
 import folium
 from folium import plugins
 import streamlit as st
-from streamlit_folium import st_folium
-from typing import Dict, List, Any
-from utils.constants import CITY_COORDINATES, TAIWAN_CITIES
+import streamlit.components.v1 as components
+from typing import Dict, List, Any, Optional
+from utils.constants import (
+    CITY_COORDINATES, TAIWAN_CITIES, OBSERVATION_ELEMENTS, OBSERVATION_GEO_INFO
+)
 from utils.helpers import get_weather_icon
 from modules.api_client import weather_api
 from modules.data_processor import weather_processor
 from modules.cache_manager import cache_manager
+from modules.change_detector import NOT_MODIFIED
+from modules.records import Observation
+from components.weather_overview import refresh_all_cities_forecast, get_forecast_matrix
+
+OBSERVATION_TTL = 600  # 10 分鐘（觀測資料每 10 分鐘更新）
+
+# 觀測站標記由瀏覽器端依每筆 [緯度, 經度, 站名, 氣溫] 建立，顏色分級與縣市標記相同
+STATION_MARKER_CALLBACK = """
+function (row) {
+    var temp = row[3];
+    var color = temp === null ? 'gray'
+        : temp >= 30 ? 'red'
+        : temp >= 25 ? 'orange'
+        : temp >= 20 ? 'green'
+        : temp >= 15 ? 'lightblue'
+        : 'blue';
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {
+        radius: 5, color: color, fillColor: color, fillOpacity: 0.8, weight: 1
+    });
+    marker.bindTooltip(row[2] + (temp === null ? '' : '：' + temp + '°C'));
+    return marker;
+}
+"""
 
 
 class WeatherMap:
@@ -21,22 +46,25 @@ class WeatherMap:
         self.taiwan_center = [23.5, 121.0]
         self.default_zoom = 7
     
-    def create_weather_map(self, all_cities_data: Dict[str, Any]) -> folium.Map:
+    def create_weather_map(self, all_cities_data: Dict[str, Any],
+                           stations: Optional[List[Observation]] = None) -> folium.Map:
         """
         建立天氣地圖
         
         Args:
             all_cities_data: 所有縣市的天氣資料
+            stations: 自動氣象站觀測資料，如果為 None 則不顯示觀測站圖層
             
         Returns:
             Folium 地圖物件
         """
-        # 建立地圖
+        # 建立地圖（向量標記以 canvas 繪製，大量標記時較順暢）
         weather_map = folium.Map(
             location=self.taiwan_center,
             zoom_start=self.default_zoom,
             tiles='OpenStreetMap',
-            control_scale=True
+            control_scale=True,
+            prefer_canvas=True
         )
         
         # 為每個縣市添加標記
@@ -45,6 +73,9 @@ class WeatherMap:
                 city_weather = all_cities_data[city_name]
                 self._add_city_marker(weather_map, city_name, coordinates, city_weather)
         
+        if stations:
+            self._add_station_layer(weather_map, stations)
+        
         # 添加圖層控制
         folium.LayerControl().add_to(weather_map)
         
@@ -143,6 +174,85 @@ class WeatherMap:
             ).add_to(map_obj)
 
 
+    def _add_station_layer(self, map_obj: folium.Map, stations: List[Observation]) -> None:
+        """
+        添加自動氣象站圖層（瀏覽器端群集）
+        
+        只傳送每站的座標、站名與氣溫，標記在瀏覽器端建立並依縮放程度群集，
+        數百個測站也不會讓頁面變慢。
+        
+        Args:
+            map_obj: Folium 地圖物件
+            stations: 有座標的觀測站資料
+        """
+        rows = [
+            [round(obs.latitude, 4), round(obs.longitude, 4), obs.station_name,
+             _valid_reading(obs.temperature)]
+            for obs in stations
+        ]
+        
+        plugins.FastMarkerCluster(
+            data=rows,
+            callback=STATION_MARKER_CALLBACK,
+            name=f'🌡️ 自動氣象站（{len(rows)}）',
+            options={'disableClusteringAtZoom': 11, 'chunkedLoading': True}
+        ).add_to(map_obj)
+
+
+def _valid_reading(value: Any) -> Optional[float]:
+    """
+    轉換觀測數值（氣象署以 -99 等負值代表缺測）
+    
+    Args:
+        value: 原始觀測值
+        
+    Returns:
+        四捨五入到小數一位的數值，缺測或無法轉換時回傳 None
+    """
+    try:
+        reading = float(value)
+    except (ValueError, TypeError):
+        return None
+    
+    if reading <= -90:
+        return None
+    return round(reading, 1)
+
+
+def get_observation_stations() -> Optional[List[Observation]]:
+    """
+    取得有座標的自動氣象站觀測資料
+    
+    Returns:
+        觀測站資料列表，無法取得資料時回傳 None
+    """
+    cache_key = "observation_stations"
+    
+    def fetch() -> Optional[List[Observation]]:
+        # 只取回地圖使用的觀測項目與站點資訊；已有舊資料時使用條件式請求
+        observation_data = weather_api.get_observation(
+            conditional=cache_manager.has_entry(cache_key),
+            elements=OBSERVATION_ELEMENTS,
+            geo_info=OBSERVATION_GEO_INFO
+        )
+        if observation_data is NOT_MODIFIED:
+            return NOT_MODIFIED
+        if not observation_data:
+            return None
+        
+        stations = [
+            obs for obs in weather_processor.parse_observation_data(observation_data)
+            if obs.latitude is not None and obs.longitude is not None
+        ]
+        return stations or None
+    
+    try:
+        return cache_manager.get_or_fetch(cache_key, fetch, ttl=OBSERVATION_TTL)
+    except Exception as e:
+        print(f"取得觀測站資料錯誤: {e}")
+        return None
+
+
 def get_all_cities_weather() -> Dict[str, Any]:
     """
     取得所有縣市的天氣資料
@@ -159,35 +269,32 @@ def get_all_cities_weather() -> Dict[str, Any]:
     if cached_data:
         return cached_data
     
-    # 取得所有縣市資料
-    with st.spinner('載入全台天氣資料中...'):
-        progress_bar = st.progress(0)
-        total_cities = len(TAIWAN_CITIES)
-        
-        for idx, city in enumerate(TAIWAN_CITIES):
+    missing_cities = []
+    
+    # 檢查個別縣市快取
+    for city in TAIWAN_CITIES:
+        city_data = cache_manager.get(f"forecast_{city}")
+        if city_data:
+            all_cities_data[city] = city_data
+        else:
+            missing_cities.append(city)
+    
+    if missing_cities:
+        with st.spinner('載入全台天氣資料中...'):
             try:
-                # 檢查個別縣市快取
-                city_cache_key = f"forecast_{city}"
-                city_data = cache_manager.get(city_cache_key)
-                
-                if not city_data:
-                    # 從 API 取得資料
-                    forecast_data = weather_api.get_forecast(city)
-                    if forecast_data:
-                        city_data = weather_processor.parse_forecast_data(forecast_data, city)
-                        if city_data:
-                            cache_manager.set(city_cache_key, city_data)
-                
-                if city_data:
-                    all_cities_data[city] = city_data
+                # 與背景更新共用同一路徑：單次請求更新所有縣市的快取，
+                # 條件式請求的變更標記才會與每個縣市的快取內容一致
+                refreshed = refresh_all_cities_forecast()
+                if refreshed:
+                    all_cities_data.update(refreshed)
                 
             except Exception as e:
-                print(f"取得 {city} 天氣資料時發生錯誤: {e}")
-            
-            # 更新進度
-            progress_bar.progress((idx + 1) / total_cities)
-        
-        progress_bar.empty()
+                print(f"取得全台天氣資料時發生錯誤: {e}")
+    
+    # 依縣市順序排列
+    all_cities_data = {
+        city: all_cities_data[city] for city in TAIWAN_CITIES if city in all_cities_data
+    }
     
     # 存入快取
     if all_cities_data:
@@ -196,6 +303,36 @@ def get_all_cities_weather() -> Dict[str, Any]:
     return all_cities_data
 
 
+def get_weather_map_html(all_cities_data: Dict[str, Any],
+                         stations: Optional[List[Observation]] = None) -> str:
+    """
+    取得天氣地圖的 HTML（依資料版本快取，資料更新時才重新建立地圖）
+    
+    Args:
+        all_cities_data: 所有縣市的天氣資料（get_all_cities_weather 的結果）
+        stations: 自動氣象站觀測資料（get_observation_stations 的結果）
+        
+    Returns:
+        完整的地圖 HTML
+    """
+    forecast_version = cache_manager.get_version("all_cities_weather")
+    stations_version = cache_manager.get_version("observation_stations") if stations else None
+    version = (forecast_version, stations_version)
+    cached = cache_manager.get("weather_map_html")
+    
+    if cached and forecast_version is not None and cached['version'] == version:
+        return cached['html']
+    
+    # 建立地圖並輸出為 HTML，之後的重新執行直接使用快取
+    taiwan_map = WeatherMap().create_weather_map(all_cities_data, stations)
+    html = taiwan_map.get_root().render()
+    
+    if forecast_version is not None:
+        cache_manager.set("weather_map_html", {'version': version, 'html': html}, ttl=1800)
+    
+    return html
+
+
 def render_weather_map():
     """渲染天氣地圖元件"""
     st.subheader('🗺️ 全台天氣地圖')
@@ -207,17 +344,11 @@ def render_weather_map():
         st.error('❌ 無法載入天氣資料')
         return
     
-    # 建立地圖
-    weather_map_obj = WeatherMap()
-    taiwan_map = weather_map_obj.create_weather_map(all_cities_data)
+    # 觀測站圖層為選用，取得失敗時仍顯示縣市地圖
+    stations = get_observation_stations()
     
-    # 顯示地圖
-    st_folium(
-        taiwan_map,
-        width=None,
-        height=600,
-        returned_objects=[]
-    )
+    # 顯示地圖（與頁面其他元件無關的重新執行不會重建地圖）
+    components.html(get_weather_map_html(all_cities_data, stations), height=600)
     
     # 顯示圖例說明
     st.markdown('---')
@@ -232,6 +363,7 @@ def render_weather_map():
         - 🟠 橙色圓圈：溫暖 (25-29°C)
         - 🟢 綠色圓圈：舒適 (20-24°C)
         - 🔵 藍色圓圈：涼爽 (<20°C)
+        - 🔢 數字圓圈：自動氣象站群集，放大後顯示各測站氣溫
         """)
     
     with col2:
@@ -240,20 +372,18 @@ def render_weather_map():
         # 統計資訊
         total_cities = len(all_cities_data)
         
-        # 計算平均溫度
-        all_temps = []
-        for city_data in all_cities_data.values():
-            if city_data.get('periods'):
-                period = city_data['periods'][0]
-                if period.get('max_temp'):
-                    all_temps.append(period['max_temp'])
+        # 以目前時段的最高溫計算全台統計
+        matrix = get_forecast_matrix(all_cities_data, "all_cities_weather")
+        temp_stats = None if matrix.empty else matrix.column_stats(matrix.max_temp[:, 0])
         
-        if all_temps:
-            avg_temp = sum(all_temps) / len(all_temps)
-            max_temp_overall = max(all_temps)
-            min_temp_overall = min(all_temps)
+        if temp_stats:
+            avg_temp = temp_stats['mean']
+            max_temp_overall = temp_stats['max']
+            min_temp_overall = temp_stats['min']
             
             st.write(f"📍 顯示縣市數: {total_cities}")
+            if stations:
+                st.write(f"🛰️ 自動氣象站數: {len(stations)}")
             st.write(f"🌡️ 全台平均溫度: {avg_temp:.1f}°C")
             st.write(f"🔥 最高溫: {max_temp_overall}°C")
             st.write(f"❄️ 最低溫: {min_temp_overall}°C")
@@ -3,12 +3,65 @@
 """
 import streamlit as st
 import pandas as pd
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from modules.api_client import weather_api
 from modules.data_processor import weather_processor
 from modules.cache_manager import cache_manager
-from utils.constants import TAIWAN_CITIES
+from modules.change_detector import NOT_MODIFIED
+from modules.forecast_matrix import ForecastMatrix
+from utils.constants import TAIWAN_CITIES, FORECAST_ELEMENTS
 from utils.helpers import get_weather_icon
+from config.config import CACHE_EXPIRY
+
+
+def refresh_all_cities_forecast() -> Optional[Dict[str, Any]]:
+    """
+    以單次請求更新所有縣市的預報快取（供背景排程使用）
+    
+    多個程序共用快取後端時只由一個程序發出請求，其他程序讀取其更新結果。
+    
+    Returns:
+        所有縣市預報資料字典，無法取得資料時回傳 None
+    """
+    def collect() -> Optional[Dict[str, Any]]:
+        for city in TAIWAN_CITIES:
+            cache_manager.reload(f"forecast_{city}")
+        return cache_manager.reload("all_cities_forecast")
+    
+    return cache_manager.run_exclusive("all_cities_forecast", _refresh_all_cities_forecast, collect)
+
+
+def _refresh_all_cities_forecast() -> Optional[Dict[str, Any]]:
+    """以單次請求更新所有縣市的預報快取（在跨程序更新權內執行）"""
+    cache_keys = [f"forecast_{city}" for city in TAIWAN_CITIES]
+    conditional = cache_manager.has_entry("all_cities_forecast") and all(
+        cache_manager.has_entry(key) for key in cache_keys
+    )
+    
+    forecast_data = weather_api.get_all_forecasts(conditional=conditional, elements=FORECAST_ELEMENTS)
+    if forecast_data is NOT_MODIFIED:
+        # 資料未變更：延長現有快取期限，不重新解析
+        for key in cache_keys:
+            cache_manager.renew(key, ttl=CACHE_EXPIRY)
+        return cache_manager.renew("all_cities_forecast", ttl=CACHE_EXPIRY)
+    if not forecast_data:
+        return None
+    
+    parsed_data = weather_processor.parse_all_forecast_data(forecast_data)
+    if not parsed_data:
+        return None
+    
+    for city, city_data in parsed_data.items():
+        cache_manager.set(f"forecast_{city}", city_data, ttl=CACHE_EXPIRY)
+    
+    # 依縣市順序排列後更新總覽快取
+    all_data = {city: parsed_data[city] for city in TAIWAN_CITIES if city in parsed_data}
+    cache_manager.set("all_cities_forecast", all_data, ttl=CACHE_EXPIRY)
+    
+    # 地圖的彙整快取改由已更新的個別縣市快取重建
+    cache_manager.delete("all_cities_weather")
+    
+    return all_data
 
 
 def get_all_cities_forecast() -> Dict[str, Any]:
@@ -26,33 +79,30 @@ def get_all_cities_forecast() -> Dict[str, Any]:
         return cached_data
     
     all_data = {}
-    
-    with st.spinner('載入所有縣市預報資料中...'):
-        progress_bar = st.progress(0)
-        total = len(TAIWAN_CITIES)
-        
-        for idx, city in enumerate(TAIWAN_CITIES):
+    missing_cities = []
+    
+    # 檢查個別快取
+    for city in TAIWAN_CITIES:
+        city_data = cache_manager.get(f"forecast_{city}")
+        if city_data:
+            all_data[city] = city_data
+        else:
+            missing_cities.append(city)
+    
+    if missing_cities:
+        with st.spinner('載入所有縣市預報資料中...'):
             try:
-                # 檢查個別快取
-                city_cache_key = f"forecast_{city}"
-                city_data = cache_manager.get(city_cache_key)
-                
-                if not city_data:
-                    forecast_data = weather_api.get_forecast(city)
-                    if forecast_data:
-                        city_data = weather_processor.parse_forecast_data(forecast_data, city)
-                        if city_data:
-                            cache_manager.set(city_cache_key, city_data)
-                
-                if city_data:
-                    all_data[city] = city_data
-                    
+                # 與背景更新共用同一路徑：單次請求更新所有縣市的快取，
+                # 條件式請求的變更標記才會與每個縣市的快取內容一致
+                refreshed = refresh_all_cities_forecast()
+                if refreshed:
+                    return refreshed
+                        
             except Exception as e:
-                print(f"取得 {city} 資料錯誤: {e}")
-            
-            progress_bar.progress((idx + 1) / total)
-        
-        progress_bar.empty()
+                print(f"取得所有縣市資料錯誤: {e}")
+    
+    # 依縣市順序排列
+    all_data = {city: all_data[city] for city in TAIWAN_CITIES if city in all_data}
     
     # 存入快取
     if all_data:
@@ -61,47 +111,69 @@ def get_all_cities_forecast() -> Dict[str, Any]:
     return all_data
 
 
+def get_forecast_matrix(all_data: Dict[str, Any], source_key: str = "all_cities_forecast") -> ForecastMatrix:
+    """
+    取得所有縣市的欄式預報矩陣（與來源資料一起快取，資料版本改變時才重新建立）
+    
+    Args:
+        all_data: 所有縣市資料（source_key 快取項目的內容）
+        source_key: 來源資料的快取鍵值，以其資料版本判斷矩陣是否需要重建
+        
+    Returns:
+        預報矩陣
+    """
+    cache_key = f"forecast_matrix_{source_key}"
+    version = cache_manager.get_version(source_key)
+    cached = cache_manager.get(cache_key)
+    
+    if cached and version is not None and cached['version'] == version:
+        return cached['matrix']
+    
+    matrix = ForecastMatrix.from_parsed(all_data)
+    
+    if version is not None:
+        cache_manager.set(cache_key, {'version': version, 'matrix': matrix}, ttl=CACHE_EXPIRY)
+    
+    return matrix
+
+
 def create_overview_dataframe(all_data: Dict[str, Any]) -> pd.DataFrame:
     """
-    建立總覽 DataFrame
+    建立總覽 DataFrame（依資料版本快取，資料更新時才重新建立）
     
     Args:
-        all_data: 所有縣市資料
+        all_data: 所有縣市資料（get_all_cities_forecast 的結果）
         
     Returns:
         總覽 DataFrame
     """
-    overview_data = []
+    version = cache_manager.get_version("all_cities_forecast")
+    cached = cache_manager.get("overview_dataframe")
+    
+    if cached and version is not None and cached['version'] == version:
+        return cached['df']
+    
+    # 今日三個時段的溫度範圍與最大降雨機率以陣列運算一次算出所有縣市
+    frame = get_forecast_matrix(all_data).to_overview_frame()
+    
+    if frame.empty:
+        return pd.DataFrame()
+    
+    weather = frame['weather'].fillna('N/A')
+    
+    df = pd.DataFrame({
+        '縣市': frame['city'],
+        '天氣': weather,
+        '圖示': [get_weather_icon(w) for w in frame['weather'].fillna('')],
+        '最低溫': frame['min_temp'],
+        '最高溫': frame['max_temp'],
+        '降雨機率': frame['max_pop'],
+        '舒適度': frame['comfort'].fillna('N/A')
+    })
+    
+    if version is not None:
+        cache_manager.set("overview_dataframe", {'version': version, 'df': df}, ttl=CACHE_EXPIRY)
     
-    for city, data in all_data.items():
-        if not data or 'periods' not in data or not data['periods']:
-            continue
-        
-        # 取得當前時段
-        current = data['periods'][0]
-        
-        # 計算今日溫度範圍
-        all_temps = []
-        for period in data['periods'][:3]:  # 今日三個時段
-            if period.get('min_temp'):
-                all_temps.append(period['min_temp'])
-            if period.get('max_temp'):
-                all_temps.append(period['max_temp'])
-        
-        # 計算最大降雨機率
-        rain_probs = [p.get('pop', 0) for p in data['periods'][:3] if p.get('pop') is not None]
-        
-        overview_data.append({
-            '縣市': city,
-            '天氣': current.get('weather', 'N/A'),
-            '圖示': get_weather_icon(current.get('weather', '')),
-            '最低溫': min(all_temps) if all_temps else None,
-            '最高溫': max(all_temps) if all_temps else None,
-            '降雨機率': max(rain_probs) if rain_probs else 0,
-            '舒適度': current.get('comfort', 'N/A')
-        })
-    
-    df = pd.DataFrame(overview_data)
     return df
 
 
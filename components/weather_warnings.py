@@ -3,43 +3,78 @@
 """
 import streamlit as st
 import pandas as pd
-import requests
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from modules.cache_manager import cache_manager
+from modules.change_detector import conditional_get, NOT_MODIFIED
+from modules.api_schemas import WarningsResponse
+from utils.json_codec import json_codec
+from utils.rate_limiter import api_rate_limiter
 from config.config import CWA_API_KEY, API_ENDPOINTS
+from utils.helpers import format_data_age
 
+# 警報變動較快，設定較短的 TTL
+# 過期後最多再沿用 10 分鐘的舊資料
+WARNINGS_TTL = 600  # 10 分鐘
+WARNINGS_MAX_STALE = 600
 
-def get_warnings_data() -> Optional[Dict[str, Any]]:
+
+def get_warnings_df(force_refresh: bool = False) -> Optional[pd.DataFrame]:
     """
-    取得天氣警特報資料
+    取得處理後的天氣警特報 DataFrame
     
+    Args:
+        force_refresh: 是否不論快取狀態立即取得新資料
+        
     Returns:
-        警特報資料
+        處理後的 DataFrame（無警報時為空的 DataFrame），無法取得資料時回傳 None
     """
-    # 檢查快取
-    cache_key = "warnings_data"
-    cached_data = cache_manager.get(cache_key)
+    def fetch() -> Optional[pd.DataFrame]:
+        # 已有舊資料時使用條件式請求，資料未變更則不重新處理
+        warnings_data = _fetch_warnings_data(conditional=cache_manager.has_entry("warnings_df"))
+        if warnings_data is NOT_MODIFIED:
+            return NOT_MODIFIED
+        if not warnings_data:
+            return None
+        return process_warnings_data(warnings_data)
+    
+    if force_refresh:
+        return cache_manager.refresh(
+            "warnings_df", fetch, ttl=WARNINGS_TTL, max_stale=WARNINGS_MAX_STALE
+        )
     
-    if cached_data:
-        return cached_data
+    # 檢查快取，未命中時合併並行請求
+    return cache_manager.get_or_fetch(
+        "warnings_df", fetch, ttl=WARNINGS_TTL, max_stale=WARNINGS_MAX_STALE
+    )
+
+
+def _fetch_warnings_data(conditional: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    從中央氣象署 API 取得天氣警特報資料
     
+    Args:
+        conditional: 是否使用條件式請求（資料未變更時回傳 NOT_MODIFIED）
+        
+    Returns:
+        警特報資料
+    """
     try:
         url = API_ENDPOINTS['warning']
         params = {'Authorization': CWA_API_KEY}
         
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
+        api_rate_limiter.wait_for_url(url)
+        response = conditional_get(url, params=params, timeout=10, conditional=conditional)
+        if response is NOT_MODIFIED:
+            return NOT_MODIFIED
         
-        data = response.json()
+        data = json_codec.decode_response(response, WarningsResponse)
         
         if data and data.get('success') == 'true':
-            # 存入快取（警報變動較快，設定較短的 TTL）
-            cache_manager.set(cache_key, data, ttl=600)  # 10 分鐘
             return data
         
         return None
-        
+    
     except Exception as e:
         print(f"取得天氣警特報資料錯誤: {e}")
         import traceback
@@ -252,9 +287,9 @@ def render_warnings_page():
     st.subheader('⚠️ 天氣警特報')
     
     with st.spinner('載入天氣警特報資料中...'):
-        warnings_data = get_warnings_data()
+        warnings_df = get_warnings_df()
     
-    if not warnings_data:
+    if warnings_df is None:
         st.info('✅ 目前無天氣警特報')
         st.markdown("""
         ---
@@ -278,9 +313,6 @@ def render_warnings_page():
         """)
         return
     
-    # 處理資料
-    warnings_df = process_warnings_data(warnings_data)
-    
     if warnings_df.empty:
         st.info('✅ 目前無天氣警特報')
         return
@@ -382,5 +414,10 @@ def render_warnings_page():
     
     # 更新時間
     st.markdown('---')
-    st.caption(f'📅 資料更新時間: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}')
+    freshness = cache_manager.get_freshness("warnings_df")
+    if freshness:
+        st.caption(f'📅 資料更新時間: {freshness["updated_at"].strftime("%Y-%m-%d %H:%M:%S")}'
+                   f'（{format_data_age(freshness["age"])}）')
+    else:
+        st.caption(f'📅 資料更新時間: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}')
     st.caption('💡 警特報資料每 10 分鐘自動更新')
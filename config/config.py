@@ -24,8 +24,37 @@ API_ENDPOINTS = {
     'aqi': 'https://data.moenv.gov.tw/api/v2/aqx_p_432',  # 空氣品質指標 (環保署)
 }
 
+# HTTP 連線設定
+HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '4'))  # 保留連線池的主機數量
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '10'))  # 每個主機的最大連線數
+HTTP_TIMEOUT = 10  # 請求逾時（秒）
+JSON_DECODER = os.getenv('JSON_DECODER', '')  # JSON 解碼器（orjson / msgspec / json，留空則自動選擇）
+
+# API 限速設定
+API_CALLS_PER_MINUTE = int(os.getenv('API_CALLS_PER_MINUTE', '60'))  # 每個端點每分鐘請求數
+API_RATE_BURST = int(os.getenv('API_RATE_BURST', '5'))  # 允許的突發請求數
+
+# 空氣品質分頁下載設定
+AQI_PAGE_SIZE = int(os.getenv('AQI_PAGE_SIZE', '1000'))  # 每頁筆數
+AQI_PAGE_WORKERS = int(os.getenv('AQI_PAGE_WORKERS', '4'))  # 同時下載的頁數
+AQI_PAGE_RETRIES = 2  # 單頁失敗時的重試次數
+AQI_PAGE_RETRY_DELAY = 1.0  # 單頁首次重試前的等待（秒），之後每次加倍
+
 # 快取設定
 CACHE_EXPIRY = 1800  # 30分鐘（秒）
+CACHE_MAX_STALE = int(os.getenv('CACHE_MAX_STALE', '3600'))  # 過期後仍可先回傳舊資料的時間（秒）
+CACHE_MAX_ITEMS = int(os.getenv('CACHE_MAX_ITEMS', '256'))  # 快取項目數上限
+CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES', str(64 * 1024 * 1024)))  # 快取大小上限（bytes）
+CACHE_SHARDS = int(os.getenv('CACHE_SHARDS', '8'))  # 快取鎖分片數量
+CACHE_DB_PATH = os.getenv('CACHE_DB_PATH', '')  # 持久化快取檔案路徑（留空則只使用記憶體快取）
+CACHE_LEASE_TIMEOUT = 30  # 多程序共用快取時，等待其他程序取得資料的上限（秒）
+
+# 背景更新設定
+BACKGROUND_REFRESH = os.getenv('BACKGROUND_REFRESH', 'true').lower() == 'true'  # 是否在背景預先更新快取
+REFRESH_LEAD_RATIO = 0.9  # 在快取時間的此比例時更新（過期前更新）
+REFRESH_JITTER = 0.1  # 更新間隔的隨機浮動比例，避免多個資料集同時更新
+REFRESH_RETRY_DELAY = 30  # 更新失敗後的首次重試間隔（秒），之後每次加倍
+REFRESH_MAX_BACKOFF = 600  # 更新失敗後的最長重試間隔（秒）
 
 # 頁面設定
 PAGE_TITLE = '台灣天氣資訊站'
@@ -2,9 +2,93 @@
 API 客戶端 - 負責與中央氣象署 API 互動
 """
 import requests
-from typing import Optional, Dict, Any
+from datetime import datetime
+from typing import Optional, Dict, List, Any, Union, Iterator
 from config.config import CWA_API_KEY, API_ENDPOINTS
 from utils.rate_limiter import rate_limited_request
+from utils.json_stream import iter_array_items
+from utils.json_codec import json_codec
+from modules.change_detector import conditional_get, change_detector, NOT_MODIFIED
+from modules.api_schemas import ForecastResponse, WeekForecastResponse, WarningsResponse, ObservationResponse
+
+STREAM_CHUNK_SIZE = 64 * 1024  # 串流讀取時每次讀取的位元組數
+
+
+class StreamedLocations:
+    """
+    串流回應中的縣市資料（邊讀邊解析，同一時間只會建立一個縣市的資料）
+    
+    讀完後以 unchanged 判斷內容是否與上次相同：呼叫端據此寫入或延長快取，
+    再以 record 記錄更新標記，避免在寫入快取之後才發現資料其實未變更。
+    """
+    
+    def __init__(self, response: requests.Response, request_key: str,
+                 locations: Optional[List[str]], elements: Optional[List[str]]):
+        """
+        初始化串流縣市資料
+        
+        Args:
+            response: 串流讀取的請求回應
+            request_key: 變更偵測使用的請求識別鍵
+            locations: 只回傳這些縣市，如果為 None 則回傳全部
+            elements: 只保留這些天氣元素，如果為 None 則保留全部
+        """
+        self.response = response
+        self.request_key = request_key
+        self.locations = set(locations) if locations else None
+        self.elements = set(elements) if elements else None
+        self.content_hash: Optional[str] = None  # 整個回應讀完後才有值
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """逐一產生符合條件的縣市資料，讀完後計算整個回應內容的雜湊"""
+        hasher = change_detector.new_hasher()
+        
+        def chunks() -> Iterator[bytes]:
+            for chunk in self.response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                hasher.update(chunk)
+                yield chunk
+        
+        chunk_iter = chunks()
+        
+        try:
+            # 舊版結構為 records.location，新版為 records.Locations[0].Location
+            for location in iter_array_items(chunk_iter, ['location', 'Location']):
+                name = location.get('locationName') or location.get('LocationName')
+                if self.locations is not None and name not in self.locations:
+                    continue
+                
+                if self.elements is not None:
+                    for list_key, name_key in (('weatherElement', 'elementName'),
+                                               ('WeatherElement', 'ElementName')):
+                        if list_key in location:
+                            location[list_key] = [
+                                element for element in location[list_key]
+                                if element.get(name_key) in self.elements
+                            ]
+                
+                yield location
+            
+            for _ in chunk_iter:
+                pass
+            self.content_hash = hasher.hexdigest()
+            
+        finally:
+            self.response.close()
+    
+    @property
+    def unchanged(self) -> bool:
+        """整個回應已讀完，且內容與上次相同"""
+        return self.content_hash is not None and change_detector.matches(self.request_key, self.content_hash)
+    
+    def record(self, skipped: bool) -> None:
+        """
+        記錄本次回應的更新標記，讓之後的請求可比對是否變更
+        
+        Args:
+            skipped: 是否確實沿用了舊資料而未重新寫入快取
+        """
+        if self.content_hash is not None:
+            change_detector.record(self.request_key, self.response, self.content_hash, skipped)
 
 
 class WeatherAPIClient:
@@ -17,16 +101,19 @@ class WeatherAPIClient:
         }
     
     @rate_limited_request
-    def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Optional[Dict[str, Any]]:
+    def _make_request(self, endpoint: str, params: Optional[Dict] = None,
+                      conditional: bool = False, schema: Optional[Any] = None) -> Optional[Dict[str, Any]]:
         """
         發送 API 請求（已加入限速保護）
         
         Args:
             endpoint: API 端點 URL
             params: 額外的查詢參數
+            conditional: 是否使用條件式請求，資料未變更時不解析 JSON
+            schema: 回應結構（modules.api_schemas），安裝 msgspec 時只解碼列出的欄位
             
         Returns:
-            API 回應的 JSON 資料，如果失敗則回傳 None
+            API 回應的 JSON 資料，資料未變更時回傳 NOT_MODIFIED，如果失敗則回傳 None
         """
         try:
             # 設定基本參數
@@ -34,16 +121,18 @@ class WeatherAPIClient:
             if params:
                 request_params.update(params)
             
-            # 發送請求
-            response = requests.get(
+            # 發送請求（使用共用連線池）
+            response = conditional_get(
                 endpoint,
                 headers=self.base_headers,
                 params=request_params,
-                timeout=10
+                timeout=10,
+                conditional=conditional
             )
-            response.raise_for_status()
+            if response is NOT_MODIFIED:
+                return NOT_MODIFIED
             
-            return response.json()
+            return json_codec.decode_response(response, schema)
             
         except requests.exceptions.Timeout:
             print("API 請求超時")
@@ -55,12 +144,98 @@ class WeatherAPIClient:
             print(f"JSON 解析錯誤: {e}")
             return None
     
-    def get_forecast(self, location: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    @rate_limited_request
+    def _stream_locations(self, endpoint: str, params: Optional[Dict] = None,
+                          locations: Optional[List[str]] = None,
+                          elements: Optional[List[str]] = None,
+                          conditional: bool = False) -> Optional[StreamedLocations]:
+        """
+        發送 API 請求並以串流方式逐一解析縣市資料（已加入限速保護）
+        
+        回應內容邊讀邊解析，同一時間只會建立一個縣市的資料，
+        適合鄉鎮或一週預報等大型資料集。
+        
+        Args:
+            endpoint: API 端點 URL
+            params: 額外的查詢參數
+            locations: 只回傳這些縣市，如果為 None 則回傳全部
+            elements: 只保留這些天氣元素，如果為 None 則保留全部
+            conditional: 是否使用條件式請求（伺服器回傳 304 時回傳 NOT_MODIFIED）
+            
+        Returns:
+            可迭代的縣市資料，資料未變更時回傳 NOT_MODIFIED，如果失敗則回傳 None
+        """
+        try:
+            request_params = {'Authorization': self.api_key}
+            if params:
+                request_params.update(params)
+            
+            response = conditional_get(
+                endpoint,
+                headers=self.base_headers,
+                params=request_params,
+                timeout=10,
+                conditional=conditional,
+                stream=True
+            )
+            if response is NOT_MODIFIED:
+                return NOT_MODIFIED
+            
+        except requests.exceptions.Timeout:
+            print("API 請求超時")
+            return None
+        except requests.exceptions.RequestException as e:
+            print(f"API 請求錯誤: {e}")
+            return None
+        
+        request_key = change_detector.request_key(endpoint, request_params)
+        return StreamedLocations(response, request_key, locations, elements)
+    
+    @staticmethod
+    def _format_time(value: Union[str, datetime]) -> str:
+        """將時間轉換為 API 接受的格式（yyyy-MM-ddThh:mm:ss）"""
+        if isinstance(value, datetime):
+            return value.strftime('%Y-%m-%dT%H:%M:%S')
+        return value
+    
+    def _add_filters(self, params: Dict[str, Any], elements: Optional[List[str]],
+                     time_from: Optional[Union[str, datetime]], time_to: Optional[Union[str, datetime]],
+                     element_param: str = 'elementName') -> Dict[str, Any]:
+        """
+        加入伺服器端的欄位與時間篩選參數，只取回畫面需要的資料
+        
+        Args:
+            params: 查詢參數
+            elements: 天氣元素名稱列表，如果為 None 則取得全部
+            time_from: 起始時間
+            time_to: 結束時間
+            element_param: 天氣元素的參數名稱（各資料集大小寫不同）
+            
+        Returns:
+            加入篩選條件後的查詢參數
+        """
+        if elements:
+            params[element_param] = ','.join(elements)
+        if time_from:
+            params['timeFrom'] = self._format_time(time_from)
+        if time_to:
+            params['timeTo'] = self._format_time(time_to)
+        return params
+    
+    def get_forecast(self, location: Optional[str] = None,
+                     conditional: bool = False,
+                     elements: Optional[List[str]] = None,
+                     time_from: Optional[Union[str, datetime]] = None,
+                     time_to: Optional[Union[str, datetime]] = None) -> Optional[Dict[str, Any]]:
         """
         取得一般天氣預報（36小時）
         
         Args:
             location: 縣市名稱，如果為 None 則取得所有縣市
+            conditional: 是否使用條件式請求（資料未變更時回傳 NOT_MODIFIED）
+            elements: 天氣元素（Wx、PoP、MinT、MaxT、CI），如果為 None 則取得全部
+            time_from: 起始時間
+            time_to: 結束時間
             
         Returns:
             天氣預報資料
@@ -68,15 +243,47 @@ class WeatherAPIClient:
         params = {}
         if location:
             params['locationName'] = location
+        self._add_filters(params, elements, time_from, time_to)
+        
+        return self._make_request(API_ENDPOINTS['forecast'], params, conditional, ForecastResponse)
+    
+    def get_all_forecasts(self, locations: Optional[List[str]] = None,
+                          conditional: bool = False,
+                          elements: Optional[List[str]] = None,
+                          time_from: Optional[Union[str, datetime]] = None,
+                          time_to: Optional[Union[str, datetime]] = None) -> Optional[Dict[str, Any]]:
+        """
+        批次取得多個縣市的一般天氣預報（單次請求）
+        
+        Args:
+            locations: 縣市名稱列表，如果為 None 則取得所有縣市
+            conditional: 是否使用條件式請求（資料未變更時回傳 NOT_MODIFIED）
+            elements: 天氣元素（Wx、PoP、MinT、MaxT、CI），如果為 None 則取得全部
+            time_from: 起始時間
+            time_to: 結束時間
+            
+        Returns:
+            包含多個縣市的天氣預報資料
+        """
+        params = {}
+        if locations:
+            params['locationName'] = ','.join(locations)
+        self._add_filters(params, elements, time_from, time_to)
         
-        return self._make_request(API_ENDPOINTS['forecast'], params)
+        return self._make_request(API_ENDPOINTS['forecast'], params, conditional, ForecastResponse)
     
-    def get_weather_36hr(self, location: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    def get_weather_36hr(self, location: Optional[str] = None,
+                         elements: Optional[List[str]] = None,
+                         time_from: Optional[Union[str, datetime]] = None,
+                         time_to: Optional[Union[str, datetime]] = None) -> Optional[Dict[str, Any]]:
         """
         取得36小時詳細天氣預報
         
         Args:
             location: 縣市名稱
+            elements: 天氣元素名稱列表，如果為 None 則取得全部
+            time_from: 起始時間
+            time_to: 結束時間
             
         Returns:
             詳細天氣預報資料
@@ -84,15 +291,24 @@ class WeatherAPIClient:
         params = {}
         if location:
             params['locationName'] = location
+        self._add_filters(params, elements, time_from, time_to, element_param='ElementName')
             
         return self._make_request(API_ENDPOINTS['weather_36hr'], params)
     
-    def get_week_forecast(self, location: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    def get_week_forecast(self, location: Optional[str] = None,
+                          conditional: bool = False,
+                          elements: Optional[List[str]] = None,
+                          time_from: Optional[Union[str, datetime]] = None,
+                          time_to: Optional[Union[str, datetime]] = None) -> Optional[Dict[str, Any]]:
         """
         取得一週天氣預報
         
         Args:
             location: 縣市名稱
+            conditional: 是否使用條件式請求（資料未變更時回傳 NOT_MODIFIED）
+            elements: 天氣元素中文名稱（例如 最高溫度、天氣現象），如果為 None 則取得全部
+            time_from: 起始時間
+            time_to: 結束時間
             
         Returns:
             一週天氣預報資料
@@ -100,15 +316,41 @@ class WeatherAPIClient:
         params = {}
         if location:
             params['locationName'] = location
+        self._add_filters(params, elements, time_from, time_to, element_param='ElementName')
             
-        return self._make_request(API_ENDPOINTS['weather_week'], params)
+        return self._make_request(API_ENDPOINTS['weather_week'], params, conditional, WeekForecastResponse)
+    
+    def stream_week_forecast(self, locations: Optional[List[str]] = None,
+                             conditional: bool = False,
+                             elements: Optional[List[str]] = None) -> Optional[StreamedLocations]:
+        """
+        以串流方式逐一取得一週天氣預報的縣市資料
+        
+        Args:
+            locations: 只回傳這些縣市，如果為 None 則回傳全部
+            conditional: 是否使用條件式請求（資料未變更時回傳 NOT_MODIFIED）
+            elements: 天氣元素中文名稱，同時作為伺服器端與本機的篩選條件
+            
+        Returns:
+            可迭代的縣市資料（LocationName、WeatherElement），資料未變更時回傳 NOT_MODIFIED，失敗則回傳 None
+        """
+        params = self._add_filters({}, elements, None, None, element_param='ElementName')
+        return self._stream_locations(
+            API_ENDPOINTS['weather_week'], params, locations, elements, conditional
+        )
     
-    def get_observation(self, station: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    def get_observation(self, station: Optional[str] = None,
+                        conditional: bool = False,
+                        elements: Optional[List[str]] = None,
+                        geo_info: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
         """
         取得觀測站即時資料
         
         Args:
-            station: 觀測站名稱
+            station: 觀測站名稱，如果為 None 則取得所有觀測站
+            conditional: 是否使用條件式請求（資料未變更時回傳 NOT_MODIFIED）
+            elements: 觀測項目（AirTemperature、RelativeHumidity 等），如果為 None 則取得全部
+            geo_info: 站點資訊（Coordinates、CountyName 等），如果為 None 則取得全部
             
         Returns:
             觀測資料
@@ -116,8 +358,11 @@ class WeatherAPIClient:
         params = {}
         if station:
             params['stationName'] = station
+        self._add_filters(params, elements, None, None, element_param='WeatherElement')
+        if geo_info:
+            params['GeoInfo'] = ','.join(geo_info)
             
-        return self._make_request(API_ENDPOINTS['observation'], params)
+        return self._make_request(API_ENDPOINTS['observation'], params, conditional, ObservationResponse)
     
     def get_warnings(self) -> Optional[Dict[str, Any]]:
         """
@@ -126,7 +371,7 @@ class WeatherAPIClient:
         Returns:
             警特報資料
         """
-        return self._make_request(API_ENDPOINTS['warning'])
+        return self._make_request(API_ENDPOINTS['warning'], schema=WarningsResponse)
 
 
 # 建立全域 API 客戶端實例
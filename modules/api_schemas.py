@@ -0,0 +1,175 @@
+"""
+API 回應結構 - 只列出解析時會用到的欄位
+
+安裝 msgspec 時，回應會直接解碼成這些結構：未列出的欄位不會建立，
+解碼結果仍是一般的 dict / list，現有的解析函數不需修改。
+"""
+from typing import Any, Dict, List, Optional, TypedDict
+
+
+# ===== 一般天氣預報 F-C0032-001 =====
+
+class ForecastParameter(TypedDict, total=False):
+    parameterName: str
+    parameterValue: str
+    parameterUnit: str
+
+
+class ForecastTime(TypedDict, total=False):
+    startTime: str
+    endTime: str
+    parameter: ForecastParameter
+
+
+class ForecastElement(TypedDict, total=False):
+    elementName: str
+    time: List[ForecastTime]
+
+
+class ForecastLocation(TypedDict, total=False):
+    locationName: str
+    weatherElement: List[ForecastElement]
+
+
+class ForecastRecords(TypedDict, total=False):
+    datasetDescription: Any
+    location: List[ForecastLocation]
+
+
+class ForecastResponse(TypedDict, total=False):
+    success: str
+    records: ForecastRecords
+
+
+# ===== 一週天氣預報 F-D0047-091 =====
+
+class WeekForecastTime(TypedDict, total=False):
+    StartTime: str
+    EndTime: str
+    DataTime: str
+    ElementValue: List[Dict[str, str]]
+
+
+class WeekForecastElement(TypedDict, total=False):
+    ElementName: str
+    Time: List[WeekForecastTime]
+
+
+class WeekForecastLocation(TypedDict, total=False):
+    LocationName: str
+    Geocode: str
+    Latitude: str
+    Longitude: str
+    WeatherElement: List[WeekForecastElement]
+
+
+class WeekForecastLocations(TypedDict, total=False):
+    DatasetDescription: str
+    LocationsName: str
+    Location: List[WeekForecastLocation]
+
+
+class WeekForecastRecords(TypedDict, total=False):
+    Locations: List[WeekForecastLocations]
+    location: List[Dict[str, Any]]  # 舊版結構
+
+
+class WeekForecastResponse(TypedDict, total=False):
+    success: str
+    records: WeekForecastRecords
+
+
+# ===== 天氣警特報 W-C0033-001 =====
+
+class HazardInfo(TypedDict, total=False):
+    language: str
+    phenomena: str
+    significance: str
+
+
+class HazardValidTime(TypedDict, total=False):
+    startTime: str
+    endTime: str
+
+
+class Hazard(TypedDict, total=False):
+    info: HazardInfo
+    validTime: HazardValidTime
+
+
+class HazardConditions(TypedDict, total=False):
+    hazards: List[Hazard]
+
+
+class WarningLocation(TypedDict, total=False):
+    locationName: str
+    geocode: Any
+    hazardConditions: HazardConditions
+
+
+class WarningRecords(TypedDict, total=False):
+    location: List[WarningLocation]
+
+
+class WarningsResponse(TypedDict, total=False):
+    success: str
+    records: WarningRecords
+
+
+# ===== 自動氣象站觀測 O-A0001-001 =====
+
+class StationCoordinate(TypedDict, total=False):
+    CoordinateName: str
+    StationLatitude: Any
+    StationLongitude: Any
+
+
+class StationGeoInfo(TypedDict, total=False):
+    Coordinates: List[StationCoordinate]
+    CountyName: str
+
+
+class ObservationTime(TypedDict, total=False):
+    DateTime: str
+
+
+class ObservationStation(TypedDict, total=False):
+    StationName: str
+    StationId: str
+    ObsTime: ObservationTime
+    GeoInfo: StationGeoInfo
+    WeatherElement: Dict[str, Any]
+
+
+class ObservationRecords(TypedDict, total=False):
+    Station: List[ObservationStation]
+
+
+class ObservationResponse(TypedDict, total=False):
+    success: str
+    records: ObservationRecords
+
+
+# ===== 空氣品質 aqx_p_432 =====
+
+# 欄位名稱含有「.」，使用函數形式定義
+AQIRecord = TypedDict('AQIRecord', {
+    'sitename': Optional[str],
+    'siteid': Optional[str],
+    'county': Optional[str],
+    'aqi': Optional[str],
+    'pollutant': Optional[str],
+    'status': Optional[str],
+    'pm2.5': Optional[str],
+    'pm10': Optional[str],
+    'publishtime': Optional[str],
+    'longitude': Optional[str],
+    'latitude': Optional[str],
+}, total=False)
+
+
+class AQIResponse(TypedDict, total=False):
+    total: Any
+    offset: Any
+    limit: Any
+    records: List[AQIRecord]
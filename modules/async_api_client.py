@@ -0,0 +1,121 @@
+"""
+非同步 API 客戶端 - 同時執行多個資料載入函數（API 請求）
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Coroutine
+
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx, add_script_run_ctx
+except ImportError:  # 選用套件：不在 Streamlit 中執行時不需要
+    get_script_run_ctx = None
+    add_script_run_ctx = None
+
+
+class AsyncWeatherAPIClient:
+    """非同步載入器：在執行緒中同時執行多個同步資料載入函數（沿用各自的快取、連線池與限速保護）"""
+    
+    def __init__(self, max_concurrency: int = 8):
+        """
+        初始化非同步載入器
+        
+        Args:
+            max_concurrency: 同時進行的最大請求數
+        """
+        self.max_concurrency = max_concurrency
+    
+    async def gather(self, calls: Dict[str, Callable[[], Any]], script_ctx: Any = None) -> Dict[str, Any]:
+        """
+        同時執行多個資料載入函數
+        
+        Args:
+            calls: 名稱對應載入函數（無參數的同步函數）的字典
+            script_ctx: Streamlit 腳本執行環境（ScriptRunContext），會附加到執行載入函數的工作執行緒
+            
+        Returns:
+            名稱對應結果的字典，失敗的項目為 None
+        """
+        # 每次呼叫建立新的 Semaphore，避免綁定到其他事件迴圈
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def run(func: Callable[[], Any]) -> Any:
+            async with semaphore:
+                return await asyncio.to_thread(func)
+        
+        # Streamlit 的 st.cache_data 等功能需要腳本執行環境，工作執行緒沿用呼叫端的環境
+        if script_ctx is not None:
+            calls = {name: _with_script_ctx(func, script_ctx) for name, func in calls.items()}
+        
+        results = await asyncio.gather(
+            *(run(func) for func in calls.values()),
+            return_exceptions=True
+        )
+        
+        output = {}
+        for name, result in zip(calls, results):
+            if isinstance(result, Exception):
+                print(f"非同步載入 {name} 錯誤: {result}")
+                output[name] = None
+            else:
+                output[name] = result
+        
+        return output
+
+
+def _with_script_ctx(func: Callable[[], Any], script_ctx: Any) -> Callable[[], Any]:
+    """
+    包裝載入函數：在工作執行緒上附加 Streamlit 腳本執行環境
+    
+    Args:
+        func: 載入函數
+        script_ctx: 呼叫端執行緒的 ScriptRunContext
+        
+    Returns:
+        包裝後的函數
+    """
+    def run() -> Any:
+        # asyncio.run 結束時會關閉預設執行緒池，工作執行緒不會被其他腳本重複使用
+        add_script_run_ctx(threading.current_thread(), script_ctx)
+        return func()
+    
+    return run
+
+
+def run_sync(coro: Coroutine) -> Any:
+    """
+    在同步程式碼（例如 Streamlit 腳本）中執行協程
+    
+    Args:
+        coro: 要執行的協程
+        
+    Returns:
+        協程的回傳值
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    
+    # 目前執行緒已有事件迴圈在執行，改在獨立執行緒中執行
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+def fetch_concurrently(calls: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+    """
+    同步介面：同時執行多個資料載入函數，總耗時約等於最慢的一個
+    
+    Args:
+        calls: 名稱對應載入函數的字典
+        
+    Returns:
+        名稱對應結果的字典
+    """
+    # 在呼叫端執行緒取得腳本執行環境（run_sync 可能改在其他執行緒執行協程）
+    script_ctx = get_script_run_ctx(suppress_warning=True) if get_script_run_ctx else None
+    return run_sync(async_weather_api.gather(calls, script_ctx))
+
+
+# 建立全域非同步 API 客戶端實例
+async_weather_api = AsyncWeatherAPIClient()
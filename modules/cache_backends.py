@@ -0,0 +1,297 @@
+"""
+快取後端模組 - 快取管理器的第二層（持久化）儲存
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Optional, Dict, Any, Iterator, Tuple
+
+
+class CacheBackend(ABC):
+    """快取後端介面（子類別必須實作所有抽象方法，更新權預設不做協調）"""
+    
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        取得快取項目
+        
+        Args:
+            key: 快取鍵值
+            
+        Returns:
+            包含 data、created_at、expires_at、stale_until 的項目，不存在或已失效則回傳 None
+        """
+    
+    @abstractmethod
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        """
+        寫入快取項目
+        
+        Args:
+            key: 快取鍵值
+            entry: 包含 data、created_at、expires_at、stale_until 的項目
+        """
+    
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """刪除快取項目"""
+    
+    @abstractmethod
+    def clear(self) -> None:
+        """清空所有快取項目"""
+    
+    @abstractmethod
+    def load_all(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        依建立時間順序列出所有仍可使用的項目（啟動時預先載入用）
+        
+        Returns:
+            (鍵值, 項目) 的迭代器
+        """
+    
+    @abstractmethod
+    def cleanup_expired(self) -> int:
+        """
+        清理超過最長可用時間的項目
+        
+        Returns:
+            清理的項目數量
+        """
+    
+    def get_meta(self, key: str) -> Optional[Dict[str, float]]:
+        """
+        只取得快取項目的時間資訊（不還原資料），用來判斷是否需要讀取整個項目
+        
+        Args:
+            key: 快取鍵值
+            
+        Returns:
+            包含 created_at、expires_at、stale_until 的字典，不存在或已失效則回傳 None
+        """
+        entry = self.get(key)
+        if entry is None:
+            return None
+        return {field: entry[field] for field in ('created_at', 'expires_at', 'stale_until')}
+    
+    def touch(self, key: str, expires_at: float, stale_until: float) -> bool:
+        """
+        只延長快取項目的期限（資料與建立時間不變）
+        
+        Args:
+            key: 快取鍵值
+            expires_at: 新的過期時間
+            stale_until: 新的最長可用時間
+            
+        Returns:
+            是否有項目被更新（項目不存在時回傳 False）
+        """
+        entry = self.get(key)
+        if entry is None:
+            return False
+        self.set(key, dict(entry, expires_at=expires_at, stale_until=stale_until))
+        return True
+    
+    def acquire_lease(self, key: str, owner: str, timeout: float) -> bool:
+        """
+        取得鍵值的更新權（跨程序的 single-flight），預設不做協調
+        
+        Args:
+            key: 快取鍵值
+            owner: 持有者識別
+            timeout: 更新權自動失效的時間（秒），避免持有者當機後無法釋放
+            
+        Returns:
+            是否取得更新權
+        """
+        return True
+    
+    def release_lease(self, key: str, owner: str) -> None:
+        """釋放鍵值的更新權"""
+        return None
+    
+    def is_leased(self, key: str) -> bool:
+        """
+        檢查鍵值的更新權是否仍由某個程序持有（未逾時）
+        
+        Args:
+            key: 快取鍵值
+            
+        Returns:
+            是否仍有持有者
+        """
+        return False
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    以本機 SQLite 檔案儲存的快取後端，重新啟動後仍保留資料
+    
+    使用 WAL 模式，同一主機上的多個 Streamlit 程序可指向同一個檔案共用快取，
+    並透過更新權表格讓同一鍵值只由一個程序向上游取得資料。
+    """
+    
+    def __init__(self, path: str):
+        """
+        初始化 SQLite 快取後端
+        
+        Args:
+            path: 資料庫檔案路徑
+        """
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        
+        # sqlite3 連線不可跨執行緒共用，每個執行緒各自建立連線
+        self._local = threading.local()
+        
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    stale_until REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_entries_stale_until "
+                "ON cache_entries (stale_until)"
+            )
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS fetch_leases (
+                    key TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+    
+    def _connection(self) -> sqlite3.Connection:
+        """取得目前執行緒的資料庫連線"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            # WAL 模式：讀取不會被其他程序的寫入阻擋
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT value, created_at, expires_at, stale_until FROM cache_entries "
+            "WHERE key = ? AND stale_until >= ?",
+            (key, time.time())
+        ).fetchone()
+        
+        if row is None:
+            return None
+        
+        return self._row_to_entry(row)
+    
+    def get_meta(self, key: str) -> Optional[Dict[str, float]]:
+        row = self._connection().execute(
+            "SELECT created_at, expires_at, stale_until FROM cache_entries "
+            "WHERE key = ? AND stale_until >= ?",
+            (key, time.time())
+        ).fetchone()
+        
+        if row is None:
+            return None
+        
+        created_at, expires_at, stale_until = row
+        return {'created_at': created_at, 'expires_at': expires_at, 'stale_until': stale_until}
+    
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        value = pickle.dumps(entry['data'], protocol=pickle.HIGHEST_PROTOCOL)
+        
+        # 單一交易寫入，其他讀取者不會看到寫到一半的資料
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries "
+                "(key, value, created_at, expires_at, stale_until) VALUES (?, ?, ?, ?, ?)",
+                (key, value, entry['created_at'], entry['expires_at'], entry['stale_until'])
+            )
+    
+    def touch(self, key: str, expires_at: float, stale_until: float) -> bool:
+        # 只更新期限欄位，不需要重新序列化資料
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE cache_entries SET expires_at = ?, stale_until = ? WHERE key = ?",
+                (expires_at, stale_until, key)
+            )
+            return cursor.rowcount == 1
+    
+    def delete(self, key: str) -> None:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+    
+    def clear(self) -> None:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM cache_entries")
+    
+    def load_all(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        rows = self._connection().execute(
+            "SELECT key, value, created_at, expires_at, stale_until FROM cache_entries "
+            "WHERE stale_until >= ? ORDER BY created_at",
+            (time.time(),)
+        ).fetchall()
+        
+        for row in rows:
+            entry = self._row_to_entry(row[1:])
+            if entry is not None:
+                yield row[0], entry
+    
+    def cleanup_expired(self) -> int:
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM cache_entries WHERE stale_until < ?", (time.time(),)
+            )
+            return cursor.rowcount
+    
+    def acquire_lease(self, key: str, owner: str, timeout: float) -> bool:
+        current_time = time.time()
+        with self._connection() as conn:
+            # 移除已逾時的更新權（持有者可能已結束）
+            conn.execute(
+                "DELETE FROM fetch_leases WHERE key = ? AND expires_at < ?",
+                (key, current_time)
+            )
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO fetch_leases (key, owner, expires_at) VALUES (?, ?, ?)",
+                (key, owner, current_time + timeout)
+            )
+            return cursor.rowcount == 1
+    
+    def release_lease(self, key: str, owner: str) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                "DELETE FROM fetch_leases WHERE key = ? AND owner = ?", (key, owner)
+            )
+    
+    def is_leased(self, key: str) -> bool:
+        row = self._connection().execute(
+            "SELECT 1 FROM fetch_leases WHERE key = ? AND expires_at >= ?",
+            (key, time.time())
+        ).fetchone()
+        return row is not None
+    
+    @staticmethod
+    def _row_to_entry(row: Tuple) -> Optional[Dict[str, Any]]:
+        """將資料列轉換為快取項目，無法還原的資料視為不存在"""
+        value, created_at, expires_at, stale_until = row
+        try:
+            data = pickle.loads(value)
+        except Exception as e:
+            print(f"還原快取資料錯誤: {e}")
+            return None
+        
+        return {
+            'data': data,
+            'created_at': created_at,
+            'expires_at': expires_at,
+            'stale_until': stale_until,
+        }
@@ -1,23 +1,128 @@
 """
 快取管理模組 - 管理 API 資料快取
 """
+import os
+import sys
 import time
-from typing import Optional, Dict, Any
+import threading
+import itertools
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Callable, List, Set
 from datetime import datetime, timedelta
+from config.config import (
+    CACHE_EXPIRY, CACHE_MAX_STALE, CACHE_MAX_ITEMS, CACHE_MAX_BYTES, CACHE_SHARDS, CACHE_DB_PATH,
+    CACHE_LEASE_TIMEOUT
+)
+from modules.single_flight import SingleFlight, request_coalescer
+from modules.cache_backends import CacheBackend, SQLiteCacheBackend
+from modules.change_detector import NOT_MODIFIED
+
+
+class PartialResult:
+    """
+    不完整的取得結果（例如部分分頁下載失敗），由 fetch 回傳
+    
+    以較短的期限存入快取：期限到後 get_or_fetch 先回傳這份資料，並於背景重新取得完整資料。
+    """
+    
+    __slots__ = ('data', 'ttl')
+    
+    def __init__(self, data: Any, ttl: int):
+        self.data = data
+        self.ttl = ttl
+
+
+class _CacheShard:
+    """快取分片：各自擁有鎖、LRU 順序與統計計數（容量上限由 CacheManager 全域控管）"""
+    
+    __slots__ = ('lock', 'entries', 'total_bytes',
+                 'hits', 'misses', 'evictions', 'rejected', 'stale_served', 'renewed')
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0
+        self.stale_served = 0
+        self.renewed = 0
+    
+    def remove(self, key: str) -> bool:
+        """移除快取項目並更新大小統計（呼叫前需持有鎖）"""
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return False
+        
+        self.total_bytes -= entry['size']
+        return True
+    
+    def cleanup_expired(self, current_time: float) -> int:
+        """清理超過最長可用時間的項目（呼叫前需持有鎖）"""
+        expired_keys = [
+            key for key, entry in self.entries.items()
+            if current_time > entry['stale_until']
+        ]
+        
+        for key in expired_keys:
+            self.remove(key)
+        
+        return len(expired_keys)
+    
+    def oldest_access(self) -> Optional[int]:
+        """取得最久未使用項目的存取序號（呼叫前需持有鎖）"""
+        if not self.entries:
+            return None
+        return next(iter(self.entries.values()))['last_used']
 
 
 class CacheManager:
-    """快取管理器"""
+    """快取管理器（依鍵值雜湊分片上鎖，可供多個 Streamlit session 同時使用）"""
     
-    def __init__(self, default_ttl: int = 1800):
+    def __init__(self, default_ttl: int = 1800, max_stale: int = 0,
+                 max_items: Optional[int] = None, max_bytes: Optional[int] = None,
+                 num_shards: int = 8, single_flight: SingleFlight = request_coalescer,
+                 backend: Optional[CacheBackend] = None, warm_load: bool = True):
         """
         初始化快取管理器
         
         Args:
             default_ttl: 預設快取過期時間（秒），預設 30 分鐘
+            max_stale: 過期後仍可回傳舊資料並於背景更新的時間（秒），0 表示停用
+            max_items: 最多保留的項目數，超過時淘汰最久未使用的項目（None 表示不限）
+            max_bytes: 快取資料總大小上限（bytes），超過時淘汰最久未使用的項目（None 表示不限）
+            num_shards: 分片數量（只分散鎖的競爭，容量上限與 LRU 順序仍以全部分片計算）
+            single_flight: 快取未命中時用來合併相同請求的合併器
+            backend: 第二層快取後端（例如 SQLite 檔案），重新啟動後仍可使用
+            warm_load: 是否在初始化時從後端預先載入仍可使用的項目
         """
-        self._cache: Dict[str, Dict[str, Any]] = {}
         self.default_ttl = default_ttl
+        self.max_stale = max_stale
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.num_shards = max(1, num_shards)
+        self.single_flight = single_flight
+        
+        self._shards: List[_CacheShard] = [_CacheShard() for _ in range(self.num_shards)]
+        
+        # 全域存取序號：各分片的項目可依此比較使用先後，淘汰時選出全部分片中最久未使用者
+        self._access_clock = itertools.count()
+        self._evict_lock = threading.Lock()
+        self._last_expired_sweep = 0.0
+        
+        self._refreshing: Set[str] = set()
+        self._refresh_lock = threading.Lock()
+        
+        self.backend = backend
+        self.lease_timeout = CACHE_LEASE_TIMEOUT
+        self._owner_id = f"{os.getpid()}-{id(self)}"
+        if backend is not None and warm_load:
+            self.warm_load()
+    
+    def _shard_for(self, key: str) -> _CacheShard:
+        """依鍵值取得所屬分片"""
+        return self._shards[hash(key) % self.num_shards]
     
     def get(self, key: str) -> Optional[Any]:
         """
@@ -29,22 +134,358 @@ class CacheManager:
         Returns:
             快取的資料，如果不存在或已過期則回傳 None
         """
-        if key not in self._cache:
-            self._track_miss()
-            return None
+        shard = self._shard_for(key)
         
-        cache_entry = self._cache[key]
+        # 記憶體中沒有或已過期時，從第二層後端載入（可能已由其他程序更新）
+        if self.backend is not None:
+            with shard.lock:
+                memory_entry = shard.entries.get(key)
+                needs_backend = memory_entry is None or time.time() > memory_entry['expires_at']
+            if needs_backend:
+                self._load_from_backend(key)
         
-        # 檢查是否過期
-        if time.time() > cache_entry['expires_at']:
-            del self._cache[key]
-            self._track_miss()
-            return None
+        with shard.lock:
+            cache_entry = shard.entries.get(key)
+            if cache_entry is None:
+                shard.misses += 1
+                return None
+            
+            current_time = time.time()
+            
+            # 檢查是否過期（仍在可用舊資料期間內的項目保留給 get_or_fetch 使用）
+            if current_time > cache_entry['expires_at']:
+                if current_time > cache_entry['stale_until']:
+                    shard.remove(key)
+                shard.misses += 1
+                return None
+            
+            # 標記為最近使用
+            shard.entries.move_to_end(key)
+            cache_entry['last_used'] = next(self._access_clock)
+            shard.hits += 1
+            return cache_entry['data']
+    
+    def get_or_fetch(self, key: str, fetch: Callable[[], Any], ttl: Optional[int] = None,
+                     max_stale: Optional[int] = None) -> Optional[Any]:
+        """
+        從快取取得資料，未命中時取得新資料並存入快取
+        
+        同一鍵值的並行未命中只會呼叫一次 fetch，其他呼叫者等待並共用結果。
+        已過期但仍在 max_stale 期間內的資料會立即回傳，並於背景更新。
+        
+        Args:
+            key: 快取鍵值
+            fetch: 取得新資料的函數，回傳 None 或空值時不存入快取（DataFrame 即使沒有資料列也會存入），
+                回傳 NOT_MODIFIED 時沿用現有資料並延長期限，回傳 PartialResult 時以其較短的期限存入
+            ttl: 快取過期時間（秒），如果為 None 則使用預設值
+            max_stale: 過期後仍可回傳舊資料的時間（秒），如果為 None 則使用預設值
+            
+        Returns:
+            快取或新取得的資料
+        """
+        cached_data = self.get(key)
+        if _has_data(cached_data):
+            return cached_data
+        
+        # 過期但未超過最長可用時間：先回傳舊資料，背景更新
+        shard = self._shard_for(key)
+        with shard.lock:
+            entry = shard.entries.get(key)
+            stale_data = None
+            if entry and _has_data(entry['data']) and time.time() <= entry['stale_until']:
+                stale_data = entry['data']
+                shard.stale_served += 1
+        
+        if stale_data is not None:
+            self._refresh_in_background(key, fetch, ttl, max_stale)
+            return stale_data
         
-        self._track_hit()
-        return cache_entry['data']
+        return self.single_flight.do(key, lambda: self._load(key, fetch, ttl, max_stale))
     
-    def set(self, key: str, data: Any, ttl: Optional[int] = None) -> None:
+    def refresh(self, key: str, fetch: Callable[[], Any], ttl: Optional[int] = None,
+                max_stale: Optional[int] = None) -> Optional[Any]:
+        """
+        不論快取是否過期，立即取得新資料並存入快取（供背景排程在過期前預先更新）
+        
+        Args:
+            key: 快取鍵值
+            fetch: 取得新資料的函數，回傳 None 或空值時不存入快取
+            ttl: 快取過期時間（秒），如果為 None 則使用預設值
+            max_stale: 過期後仍可回傳舊資料的時間（秒），如果為 None 則使用預設值
+            
+        Returns:
+            新取得的資料；若其他程序正在更新，則回傳共用後端中的資料
+        """
+        def load() -> Any:
+            if self.backend is None:
+                return self._fetch_and_set(key, fetch, ttl, max_stale)
+            
+            # 其他程序正在更新同一鍵值時，沿用其結果
+            return self._fetch_with_lease(key, fetch, ttl, max_stale)
+        
+        return self.single_flight.do(key, load)
+    
+    def run_exclusive(self, name: str, job: Callable[[], Any], collect: Callable[[], Any]) -> Optional[Any]:
+        """
+        執行一次寫入多個快取鍵值的批次更新（例如以單次請求更新所有縣市預報）
+        
+        同一程序內的並行呼叫只執行一次；多個程序共用後端時，只由取得更新權的程序向上游取得資料，
+        其他程序等待其完成後改由 collect 讀取共用後端中的結果。
+        
+        Args:
+            name: 批次工作名稱（作為 single-flight 與更新權的鍵值）
+            job: 實際更新快取的函數
+            collect: 由其他程序更新時，取得結果的函數（通常以 reload 讀取工作寫入的鍵值）
+            
+        Returns:
+            job 或 collect 的回傳值
+        """
+        lease_key = f"job:{name}"
+        
+        def run() -> Any:
+            if self.backend is None:
+                return job()
+            
+            if self.backend.acquire_lease(lease_key, self._owner_id, self.lease_timeout):
+                try:
+                    return job()
+                finally:
+                    try:
+                        self.backend.release_lease(lease_key, self._owner_id)
+                    except Exception as e:
+                        print(f"釋放快取更新權錯誤: {e}")
+            
+            # 其他程序正在執行同一工作：等待完成後沿用其結果
+            if self._wait_for_release(lease_key, time.time() + self.lease_timeout):
+                return collect()
+            
+            # 等待逾時：自行執行
+            return job()
+        
+        return self.single_flight.do(lease_key, run)
+    
+    def _wait_for_release(self, lease_key: str, deadline: float) -> bool:
+        """
+        等待其他程序釋放更新權
+        
+        Args:
+            lease_key: 更新權鍵值
+            deadline: 停止等待的時間（time.time() 的值）
+            
+        Returns:
+            是否已在期限內釋放
+        """
+        interval = 0.05
+        
+        while time.time() < deadline:
+            try:
+                if not self.backend.is_leased(lease_key):
+                    return True
+            except Exception as e:
+                print(f"讀取快取更新權錯誤: {e}")
+            
+            time.sleep(interval)
+            interval = min(interval * 2, 0.5)
+        
+        return False
+    
+    def reload(self, key: str) -> Optional[Any]:
+        """
+        從共用後端重新讀取項目（其他程序更新後立即取得新資料）
+        
+        Args:
+            key: 快取鍵值
+            
+        Returns:
+            未過期的資料，如果不存在或已過期則回傳 None
+        """
+        if self.backend is not None:
+            self._load_from_backend(key)
+        return self._peek_fresh(key)
+    
+    def _peek_fresh(self, key: str) -> Optional[Any]:
+        """取得未過期的資料，不影響統計與 LRU 順序"""
+        shard = self._shard_for(key)
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if entry and time.time() <= entry['expires_at']:
+                return entry['data']
+        return None
+    
+    def _load(self, key: str, fetch: Callable[[], Any], ttl: Optional[int],
+              max_stale: Optional[int]) -> Any:
+        """取得新資料並存入快取（在 single-flight 內執行）"""
+        # 等待期間可能已由其他請求填入快取
+        fresh_data = self._peek_fresh(key)
+        if _has_data(fresh_data):
+            return fresh_data
+        
+        if self.backend is None:
+            return self._fetch_and_set(key, fetch, ttl, max_stale)
+        
+        # 共用後端：其他程序可能已更新
+        self._load_from_backend(key)
+        fresh_data = self._peek_fresh(key)
+        if _has_data(fresh_data):
+            return fresh_data
+        
+        # 取得跨程序的更新權，其他程序等待結果
+        return self._fetch_with_lease(key, fetch, ttl, max_stale)
+    
+    def _fetch_with_lease(self, key: str, fetch: Callable[[], Any], ttl: Optional[int],
+                          max_stale: Optional[int]) -> Any:
+        """取得跨程序的更新權後取得資料；其他程序持有更新權時等待其寫入共用後端"""
+        deadline = time.time() + self.lease_timeout
+        
+        while True:
+            if self.backend.acquire_lease(key, self._owner_id, self.lease_timeout):
+                try:
+                    return self._fetch_and_set(key, fetch, ttl, max_stale)
+                finally:
+                    try:
+                        self.backend.release_lease(key, self._owner_id)
+                    except Exception as e:
+                        print(f"釋放快取更新權錯誤: {e}")
+            
+            fresh_data = self._wait_for_backend(key, deadline)
+            if _has_data(fresh_data):
+                return fresh_data
+            
+            # 等待逾時：自行取得資料
+            if time.time() >= deadline:
+                return self._fetch_and_set(key, fetch, ttl, max_stale)
+            
+            # 持有者已釋放更新權但沒有寫入資料（例如取得失敗）：重新嘗試取得更新權
+    
+    def _fetch_and_set(self, key: str, fetch: Callable[[], Any], ttl: Optional[int],
+                       max_stale: Optional[int]) -> Any:
+        """呼叫 fetch 並將結果存入快取"""
+        data = fetch()
+        
+        # 上游資料未變更：沿用現有項目並延長期限，不重新解析也不改變資料版本
+        if data is NOT_MODIFIED:
+            return self.renew(key, ttl, max_stale)
+        
+        # 資料不完整：以較短的期限存入，盡快重新取得
+        if isinstance(data, PartialResult):
+            ttl = data.ttl
+            data = data.data
+        
+        if _has_data(data):
+            self.set(key, data, ttl, max_stale)
+        return data
+    
+    def _wait_for_backend(self, key: str, deadline: float) -> Optional[Any]:
+        """
+        等待其他程序將資料寫入共用後端
+        
+        Args:
+            key: 快取鍵值
+            deadline: 停止等待的時間（time.time() 的值）
+            
+        Returns:
+            其他程序寫入的資料；逾時或持有者已釋放更新權而沒有寫入資料時回傳 None
+        """
+        interval = 0.05
+        
+        while time.time() < deadline:
+            time.sleep(interval)
+            interval = min(interval * 2, 0.5)
+            
+            # 先確認更新權狀態再讀取：持有者寫入資料後才釋放，釋放後讀取必定能看到結果
+            try:
+                leased = self.backend.is_leased(key)
+            except Exception as e:
+                print(f"讀取快取更新權錯誤: {e}")
+                leased = True
+            
+            self._load_from_backend(key)
+            fresh_data = self._peek_fresh(key)
+            if _has_data(fresh_data):
+                return fresh_data
+            
+            if not leased:
+                return None
+        
+        return None
+    
+    def _refresh_in_background(self, key: str, fetch: Callable[[], Any], ttl: Optional[int],
+                               max_stale: Optional[int]) -> None:
+        """在背景執行緒更新快取，同一鍵值同時只會有一個更新"""
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        
+        def refresh() -> None:
+            try:
+                self.single_flight.do(key, lambda: self._load(key, fetch, ttl, max_stale))
+            except Exception as e:
+                print(f"背景更新快取 {key} 錯誤: {e}")
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(key)
+        
+        threading.Thread(target=refresh, name=f"cache-refresh-{key}", daemon=True).start()
+    
+    def has_entry(self, key: str) -> bool:
+        """
+        檢查是否有仍可使用的項目（包含已過期但仍在可用舊資料期間內的項目）
+        
+        可用來決定是否發送條件式請求：有舊資料才能在上游未變更時沿用。
+        
+        Args:
+            key: 快取鍵值
+            
+        Returns:
+            是否有可用項目
+        """
+        shard = self._shard_for(key)
+        with shard.lock:
+            entry = shard.entries.get(key)
+            return entry is not None and time.time() <= entry['stale_until']
+    
+    def renew(self, key: str, ttl: Optional[int] = None, max_stale: Optional[int] = None) -> Optional[Any]:
+        """
+        上游資料未變更時延長現有項目的期限（資料與版本不變）
+        
+        Args:
+            key: 快取鍵值
+            ttl: 快取過期時間（秒），如果為 None 則使用預設值
+            max_stale: 過期後仍可回傳舊資料的時間（秒），如果為 None 則使用預設值
+            
+        Returns:
+            沿用的資料，如果項目已不存在則回傳 None
+        """
+        if ttl is None:
+            ttl = self.default_ttl
+        if max_stale is None:
+            max_stale = self.max_stale
+        
+        shard = self._shard_for(key)
+        current_time = time.time()
+        
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is None or current_time > entry['stale_until']:
+                return None
+            
+            entry['expires_at'] = current_time + ttl
+            entry['stale_until'] = current_time + ttl + max_stale
+            shard.renewed += 1
+            renewed_entry = dict(entry)
+        
+        if self.backend is not None:
+            try:
+                # 只延長後端項目的期限；後端已沒有該項目時才寫入完整資料
+                if not self.backend.touch(key, renewed_entry['expires_at'], renewed_entry['stale_until']):
+                    self.backend.set(key, renewed_entry)
+            except Exception as e:
+                print(f"寫入快取後端錯誤: {e}")
+        
+        return renewed_entry['data']
+    
+    def set(self, key: str, data: Any, ttl: Optional[int] = None, max_stale: Optional[int] = None) -> None:
         """
         將資料存入快取
         
@@ -52,16 +493,193 @@ class CacheManager:
             key: 快取鍵值
             data: 要快取的資料
             ttl: 快取過期時間（秒），如果為 None 則使用預設值
+            max_stale: 過期後仍可回傳舊資料的時間（秒），如果為 None 則使用預設值
         """
         if ttl is None:
             ttl = self.default_ttl
+        if max_stale is None:
+            max_stale = self.max_stale
         
-        self._cache[key] = {
+        current_time = time.time()
+        entry = {
             'data': data,
-            'expires_at': time.time() + ttl,
-            'created_at': time.time()
+            'created_at': current_time,
+            'expires_at': current_time + ttl,
+            'stale_until': current_time + ttl + max_stale,
+        }
+        
+        if self._store(key, entry) and self.backend is not None:
+            try:
+                self.backend.set(key, entry)
+            except Exception as e:
+                print(f"寫入快取後端錯誤: {e}")
+    
+    def _store(self, key: str, entry: Dict[str, Any]) -> bool:
+        """
+        將項目存入記憶體分片
+        
+        Args:
+            key: 快取鍵值
+            entry: 包含 data、created_at、expires_at、stale_until 的項目
+            
+        Returns:
+            是否成功存入（超過容量上限時不存入）
+        """
+        # 在鎖外計算大小，避免阻擋同分片的其他操作
+        size = _deep_sizeof(entry['data'])
+        shard = self._shard_for(key)
+        
+        with shard.lock:
+            # 單一項目超過整體容量上限時不存入快取
+            if self.max_bytes is not None and size > self.max_bytes:
+                shard.rejected += 1
+                shard.remove(key)
+                print(f"快取項目 {key} 大小 {size} bytes 超過上限 {self.max_bytes} bytes，不存入快取")
+                return False
+            
+            shard.remove(key)
+            shard.entries[key] = dict(entry, size=size, last_used=next(self._access_clock))
+            shard.total_bytes += size
+        
+        # 在分片鎖外淘汰，淘汰時需依序檢查所有分片
+        self._evict_if_needed()
+        return True
+    
+    def _is_over_capacity(self) -> bool:
+        """檢查全部分片合計是否超過項目數或大小上限"""
+        if self.max_items is not None and sum(len(shard.entries) for shard in self._shards) > self.max_items:
+            return True
+        if self.max_bytes is not None and sum(shard.total_bytes for shard in self._shards) > self.max_bytes:
+            return True
+        return False
+    
+    def _evict_if_needed(self) -> None:
+        """超過容量時先清除已失效項目，再淘汰全部分片中最久未使用的項目"""
+        if not self._is_over_capacity():
+            return
+        
+        with self._evict_lock:
+            # 清除已失效項目需走訪所有項目，每秒最多一次
+            current_time = time.time()
+            if current_time - self._last_expired_sweep >= 1.0:
+                self._last_expired_sweep = current_time
+                for shard in self._shards:
+                    with shard.lock:
+                        shard.cleanup_expired(current_time)
+            
+            while self._is_over_capacity():
+                oldest_shard = None
+                oldest_access = None
+                for shard in self._shards:
+                    with shard.lock:
+                        access = shard.oldest_access()
+                    if access is not None and (oldest_access is None or access < oldest_access):
+                        oldest_shard, oldest_access = shard, access
+                
+                if oldest_shard is None:
+                    break
+                
+                with oldest_shard.lock:
+                    # 選出後可能已被存取或移除，改淘汰該分片目前最久未使用的項目
+                    if oldest_shard.entries:
+                        oldest_shard.remove(next(iter(oldest_shard.entries)))
+                        oldest_shard.evictions += 1
+    
+    def _load_from_backend(self, key: str) -> None:
+        """從後端讀取單一項目放入記憶體（只在後端資料較新時取代）"""
+        try:
+            # 先只讀取時間資訊，同一版本的資料不需要還原整個項目
+            meta = self.backend.get_meta(key)
+        except Exception as e:
+            print(f"讀取快取後端錯誤: {e}")
+            return
+        
+        if meta is None:
+            return
+        
+        shard = self._shard_for(key)
+        with shard.lock:
+            memory_entry = shard.entries.get(key)
+            if memory_entry is not None and memory_entry['created_at'] >= meta['created_at']:
+                # 同一版本的資料：其他程序已延長期限時只更新期限
+                if memory_entry['created_at'] == meta['created_at'] and meta['expires_at'] > memory_entry['expires_at']:
+                    memory_entry['expires_at'] = meta['expires_at']
+                    memory_entry['stale_until'] = meta['stale_until']
+                return
+        
+        try:
+            entry = self.backend.get(key)
+        except Exception as e:
+            print(f"讀取快取後端錯誤: {e}")
+            return
+        
+        if entry is not None:
+            self._store(key, entry)
+    
+    def warm_load(self) -> int:
+        """
+        從後端預先載入所有仍可使用的項目（重新啟動後立即提供快取資料）
+        
+        Returns:
+            載入的項目數量
+        """
+        if self.backend is None:
+            return 0
+        
+        loaded = 0
+        try:
+            for key, entry in self.backend.load_all():
+                if self._store(key, entry):
+                    loaded += 1
+        except Exception as e:
+            print(f"載入快取後端錯誤: {e}")
+        
+        return loaded
+    
+    def get_freshness(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        取得快取項目的新鮮度資訊（供 UI 顯示「N 分鐘前更新」）
+        
+        Args:
+            key: 快取鍵值
+            
+        Returns:
+            新鮮度資訊字典，如果不存在則回傳 None
+        """
+        shard = self._shard_for(key)
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if not entry:
+                return None
+            entry = dict(entry)
+        
+        current_time = time.time()
+        return {
+            'version': entry['created_at'],
+            'created_at': entry['created_at'],
+            'updated_at': datetime.fromtimestamp(entry['created_at']),
+            'age': current_time - entry['created_at'],
+            'expires_at': entry['expires_at'],
+            'stale_until': entry['stale_until'],
+            'is_stale': current_time > entry['expires_at'],
+            'is_refreshing': key in self._refreshing,
         }
     
+    def get_version(self, key: str) -> Optional[float]:
+        """
+        取得快取項目的資料版本（每次存入新資料時改變，可作為衍生結果的快取鍵）
+        
+        Args:
+            key: 快取鍵值
+            
+        Returns:
+            資料版本，如果不存在則回傳 None
+        """
+        shard = self._shard_for(key)
+        with shard.lock:
+            entry = shard.entries.get(key)
+            return entry['created_at'] if entry else None
+    
     def delete(self, key: str) -> bool:
         """
         刪除快取項目
@@ -72,32 +690,43 @@ class CacheManager:
         Returns:
             是否成功刪除
         """
-        if key in self._cache:
-            del self._cache[key]
-            return True
-        return False
+        shard = self._shard_for(key)
+        with shard.lock:
+            removed = shard.remove(key)
+        
+        if self.backend is not None:
+            self.backend.delete(key)
+        
+        return removed
     
     def clear(self) -> None:
         """清空所有快取"""
-        self._cache.clear()
+        for shard in self._shards:
+            with shard.lock:
+                shard.entries.clear()
+                shard.total_bytes = 0
+        
+        if self.backend is not None:
+            self.backend.clear()
     
     def cleanup_expired(self) -> int:
         """
-        清理所有過期的快取項目
+        清理所有超過最長可用時間的快取項目
         
         Returns:
             清理的項目數量
         """
         current_time = time.time()
-        expired_keys = [
-            key for key, entry in self._cache.items()
-            if current_time > entry['expires_at']
-        ]
+        removed = 0
         
-        for key in expired_keys:
-            del self._cache[key]
+        for shard in self._shards:
+            with shard.lock:
+                removed += shard.cleanup_expired(current_time)
         
-        return len(expired_keys)
+        if self.backend is not None:
+            self.backend.cleanup_expired()
+        
+        return removed
     
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -106,58 +735,147 @@ class CacheManager:
         Returns:
             快取統計資訊字典
         """
-        import sys
-        
         current_time = time.time()
-        valid_entries = sum(
-            1 for entry in self._cache.values()
-            if current_time <= entry['expires_at']
-        )
+        total_entries = 0
+        valid_entries = 0
+        stale_entries = 0
+        total_size = 0
+        evictions = 0
+        rejected = 0
+        stale_served = 0
+        renewed = 0
         
-        # 計算快取總大小
-        total_size = sum(
-            sys.getsizeof(entry['data'])
-            for entry in self._cache.values()
-        )
+        for shard in self._shards:
+            with shard.lock:
+                total_entries += len(shard.entries)
+                for entry in shard.entries.values():
+                    if current_time <= entry['expires_at']:
+                        valid_entries += 1
+                    elif current_time <= entry['stale_until']:
+                        stale_entries += 1
+                total_size += shard.total_bytes
+                evictions += shard.evictions
+                rejected += shard.rejected
+                stale_served += shard.stale_served
+                renewed += shard.renewed
         
         return {
-            'items': len(self._cache),  # 總項目數
-            'total_entries': len(self._cache),
+            'items': total_entries,  # 總項目數
+            'total_entries': total_entries,
             'valid_entries': valid_entries,
-            'expired_entries': len(self._cache) - valid_entries,
-            'size': total_size,  # 總大小（bytes）
-            'default_ttl': self.default_ttl
+            'stale_entries': stale_entries,
+            'expired_entries': total_entries - valid_entries,
+            'size': total_size,  # 總大小（bytes，含巢狀物件）
+            'max_items': self.max_items,
+            'max_bytes': self.max_bytes,
+            'shards': self.num_shards,
+            'evictions': evictions,
+            'rejected': rejected,
+            'default_ttl': self.default_ttl,
+            'max_stale': self.max_stale,
+            'stale_served': stale_served,
+            'unchanged_refreshes': renewed,  # 上游未變更而略過解析的更新次數
+            'coalesced_requests': self.single_flight.get_stats()['coalesced'],
+            'backend': type(self.backend).__name__ if self.backend is not None else None
         }
     
     def get_cache_hit_rate(self) -> float:
         """
-        取得快取命中率（需要追蹤 hits 和 misses）
+        取得快取命中率
         
         Returns:
             快取命中率（0-1之間）
         """
-        if not hasattr(self, '_hits'):
-            self._hits = 0
-            self._misses = 0
+        hits = 0
+        misses = 0
+        for shard in self._shards:
+            with shard.lock:
+                hits += shard.hits
+                misses += shard.misses
         
-        total = self._hits + self._misses
+        total = hits + misses
         if total == 0:
             return 0.0
         
-        return self._hits / total
+        return hits / total
+
+
+def _has_data(data: Any) -> bool:
+    """
+    判斷資料是否值得快取
     
-    def _track_hit(self) -> None:
-        """記錄快取命中"""
-        if not hasattr(self, '_hits'):
-            self._hits = 0
-        self._hits += 1
+    解析後的 DataFrame 即使沒有資料列（例如目前無警特報）也是有效結果，
+    其他物件則依一般真假值判斷。
+    
+    Args:
+        data: 要判斷的資料
+        
+    Returns:
+        是否為有效資料
+    """
+    if data is None:
+        return False
+    if hasattr(data, 'empty') and hasattr(data, 'columns'):
+        return True
+    return bool(data)
+
+
+def _deep_sizeof(obj: Any) -> int:
+    """
+    計算物件實際佔用的記憶體大小（包含巢狀的容器與元素）
+    
+    Args:
+        obj: 要計算的物件
+        
+    Returns:
+        估計的大小（bytes）
+    """
+    total = 0
+    seen = set()
+    stack = [obj]
+    
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        
+        # pandas 物件與 NumPy 陣列使用本身提供的大小計算
+        if hasattr(current, 'memory_usage') and hasattr(current, 'columns'):
+            total += int(current.memory_usage(index=True, deep=True).sum())
+            continue
+        if hasattr(current, 'memory_usage') and hasattr(current, 'index'):
+            total += int(current.memory_usage(index=True, deep=True))
+            continue
+        if hasattr(current, 'nbytes') and hasattr(current, 'dtype'):
+            total += int(current.nbytes)
+            continue
+        
+        total += sys.getsizeof(current)
+        
+        if isinstance(current, (str, bytes, bytearray, int, float, bool)) or current is None:
+            continue
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        else:
+            if hasattr(current, '__dict__'):
+                stack.append(current.__dict__)
+            for slot in getattr(type(current), '__slots__', ()):
+                if hasattr(current, slot):
+                    stack.append(getattr(current, slot))
     
-    def _track_miss(self) -> None:
-        """記錄快取未命中"""
-        if not hasattr(self, '_misses'):
-            self._misses = 0
-        self._misses += 1
+    return total
 
 
 # 建立全域快取管理器實例
-cache_manager = CacheManager()
+cache_manager = CacheManager(
+    default_ttl=CACHE_EXPIRY,
+    max_stale=CACHE_MAX_STALE,
+    max_items=CACHE_MAX_ITEMS,
+    max_bytes=CACHE_MAX_BYTES,
+    num_shards=CACHE_SHARDS,
+    backend=SQLiteCacheBackend(CACHE_DB_PATH) if CACHE_DB_PATH else None
+)
@@ -0,0 +1,262 @@
+"""
+變更偵測模組 - 以條件式請求與內容雜湊判斷資料集是否更新
+"""
+import hashlib
+import threading
+import time
+from typing import Optional, Dict, Any, Iterable, Union
+import requests
+from modules.http_client import http_session
+from utils.json_codec import json_codec, endpoint_label
+
+
+class _NotModified:
+    """上游資料未變更的標記"""
+    
+    __slots__ = ()
+    
+    def __repr__(self) -> str:
+        return 'NOT_MODIFIED'
+
+
+# 條件式請求確認資料未變更時回傳的標記（呼叫端應以 `is NOT_MODIFIED` 判斷）
+NOT_MODIFIED = _NotModified()
+
+
+class ChangeDetector:
+    """資料集變更偵測器"""
+    
+    def __init__(self, ignore_params: Iterable[str] = ('Authorization', 'api_key')):
+        """
+        初始化變更偵測器
+        
+        Args:
+            ignore_params: 不影響資料內容、不納入請求識別的查詢參數（例如 API 金鑰）
+        """
+        self.ignore_params = set(ignore_params)
+        self._markers: Dict[str, Dict[str, Optional[str]]] = {}
+        self._lock = threading.Lock()
+        self._checks = 0
+        self._not_modified = 0  # 伺服器回傳 304
+        self._unchanged_content = 0  # 內容雜湊相同
+        self._changed = 0
+    
+    def request_key(self, url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        取得請求識別鍵（網址加上排序後的查詢參數）
+        
+        Args:
+            url: 請求網址
+            params: 查詢參數
+            
+        Returns:
+            請求識別鍵
+        """
+        if not params:
+            return url
+        
+        query = '&'.join(
+            f"{name}={params[name]}" for name in sorted(params) if name not in self.ignore_params
+        )
+        return f"{url}?{query}"
+    
+    def conditional_headers(self, key: str) -> Dict[str, str]:
+        """
+        取得條件式請求標頭（伺服器曾提供 ETag 或 Last-Modified 時）
+        
+        Args:
+            key: 請求識別鍵
+            
+        Returns:
+            If-None-Match / If-Modified-Since 標頭
+        """
+        with self._lock:
+            marker = self._markers.get(key)
+        
+        headers = {}
+        if marker:
+            if marker['etag']:
+                headers['If-None-Match'] = marker['etag']
+            if marker['last_modified']:
+                headers['If-Modified-Since'] = marker['last_modified']
+        return headers
+    
+    def check(self, key: str, response: requests.Response, content_hash: Optional[str] = None) -> bool:
+        """
+        判斷回應是否與上次相同，並記錄本次的更新標記
+        
+        Args:
+            key: 請求識別鍵
+            response: 請求回應
+            content_hash: 已計算好的內容雜湊（串流讀取時），如果為 None 則由回應內容計算
+            
+        Returns:
+            資料是否未變更
+        """
+        with self._lock:
+            self._checks += 1
+            
+            if response.status_code == 304:
+                self._not_modified += 1
+                return True
+            
+            # 雜湊原始內容比解析 JSON 便宜，伺服器不支援條件式請求時仍可跳過解析
+            if content_hash is None:
+                content_hash = self.hash_content(response.content)
+            previous = self._markers.get(key)
+            
+            self._markers[key] = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'content_hash': content_hash,
+            }
+            
+            if previous is not None and previous['content_hash'] == content_hash:
+                self._unchanged_content += 1
+                return True
+            
+            self._changed += 1
+            return False
+    
+    def matches(self, key: str, content_hash: str) -> bool:
+        """
+        比對內容雜湊是否與上次記錄的相同（不記錄標記也不計入統計）
+        
+        Args:
+            key: 請求識別鍵
+            content_hash: 本次回應內容的雜湊
+            
+        Returns:
+            內容是否與上次相同
+        """
+        with self._lock:
+            previous = self._markers.get(key)
+            return previous is not None and previous['content_hash'] == content_hash
+    
+    def record(self, key: str, response: requests.Response, content_hash: str, skipped: bool) -> None:
+        """
+        記錄串流回應的更新標記（呼叫端已依 matches 的結果寫入或延長快取）
+        
+        Args:
+            key: 請求識別鍵
+            response: 請求回應
+            content_hash: 回應內容的雜湊
+            skipped: 是否確實沿用了舊資料而未重新寫入快取
+        """
+        with self._lock:
+            self._checks += 1
+            self._markers[key] = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'content_hash': content_hash,
+            }
+            
+            if skipped:
+                self._unchanged_content += 1
+            else:
+                self._changed += 1
+    
+    @staticmethod
+    def new_hasher() -> Any:
+        """建立內容雜湊物件（串流讀取時逐段更新）"""
+        return hashlib.blake2b(digest_size=16)
+    
+    @classmethod
+    def hash_content(cls, content: bytes) -> str:
+        """
+        計算回應內容的雜湊
+        
+        Args:
+            content: 回應內容
+            
+        Returns:
+            雜湊字串
+        """
+        hasher = cls.new_hasher()
+        hasher.update(content)
+        return hasher.hexdigest()
+    
+    def forget(self, key: str) -> None:
+        """
+        清除請求的更新標記（下次請求必定視為已變更）
+        
+        Args:
+            key: 請求識別鍵
+        """
+        with self._lock:
+            self._markers.pop(key, None)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        取得變更偵測統計
+        
+        Returns:
+            檢查次數、304 次數、內容未變更次數與已變更次數
+        """
+        with self._lock:
+            skipped = self._not_modified + self._unchanged_content
+            return {
+                'checks': self._checks,
+                'not_modified': self._not_modified,
+                'unchanged_content': self._unchanged_content,
+                'changed': self._changed,
+                'skipped': skipped,
+                'skip_rate': skipped / self._checks if self._checks else 0.0,
+                'tracked_requests': len(self._markers),
+            }
+
+
+# 建立全域變更偵測器實例
+change_detector = ChangeDetector()
+
+
+def conditional_get(url: str, params: Optional[Dict[str, Any]] = None,
+                    headers: Optional[Dict[str, str]] = None,
+                    timeout: Optional[float] = None,
+                    conditional: bool = False,
+                    stream: bool = False) -> Union[requests.Response, _NotModified]:
+    """
+    發送 GET 請求，conditional 為 True 時資料未變更則回傳 NOT_MODIFIED
+    
+    呼叫端只應在快取中已有上次的資料時使用 conditional，否則無資料可沿用。
+    
+    Args:
+        url: 請求網址
+        params: 查詢參數
+        headers: 額外的請求標頭
+        timeout: 請求逾時（秒）
+        conditional: 是否使用條件式請求並比對內容
+        stream: 是否串流讀取內容；此時只依 304 判斷未變更，
+            內容雜湊由呼叫端讀完後以 change_detector.matches / record 比對並記錄
+        
+    Returns:
+        requests Response 物件，或 NOT_MODIFIED
+    """
+    key = change_detector.request_key(url, params)
+    
+    request_headers = dict(headers or {})
+    if conditional:
+        request_headers.update(change_detector.conditional_headers(key))
+    
+    start_time = time.perf_counter()
+    response = http_session.get(url, params=params, headers=request_headers, timeout=timeout, stream=stream)
+    if not stream:
+        # 網路時間包含下載內容，與之後的解碼時間分開統計
+        _ = response.content
+        json_codec.record(endpoint_label(url), network_seconds=time.perf_counter() - start_time)
+    
+    # 304 不會觸發 raise_for_status，需先行處理
+    if response.status_code == 304:
+        change_detector.check(key, response)
+        return NOT_MODIFIED if conditional else response
+    
+    response.raise_for_status()
+    
+    if stream:
+        return response
+    
+    unchanged = change_detector.check(key, response)
+    if conditional and unchanged:
+        return NOT_MODIFIED
+    
+    return response
@@ -1,9 +1,11 @@
 """
 資料處理模組 - 解析和處理天氣資料
 """
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Tuple
 from datetime import datetime
 import pandas as pd
+from modules.forecast_matrix import TODAY_PERIODS
+from modules.records import ForecastPeriod, Observation
 
 
 class WeatherDataProcessor:
@@ -25,78 +27,191 @@ class WeatherDataProcessor:
             if not api_response or 'records' not in api_response:
                 return None
             
-            locations = api_response['records']['location']
-            
-            # 找到指定縣市的資料
-            location_data = None
-            for loc in locations:
-                if loc['locationName'] == location:
-                    location_data = loc
-                    break
+            # 只查詢單一縣市，找到即停止，不需建立整份索引
+            location_data = WeatherDataProcessor.find_location(api_response, location)
             
             if not location_data:
                 return None
             
-            weather_elements = location_data['weatherElement']
-            
-            # 建立時間段對應的資料
-            time_periods = []
-            
-            # 取得第一個元素的時間資訊作為基準
-            if weather_elements and len(weather_elements[0]['time']) > 0:
-                num_periods = len(weather_elements[0]['time'])
-                
-                for i in range(num_periods):
-                    period_data = {
-                        'start_time': None,
-                        'end_time': None,
-                        'weather': None,
-                        'pop': None,  # 降雨機率
-                        'min_temp': None,
-                        'max_temp': None,
-                        'comfort': None,  # 舒適度
-                        'wind': None,  # 風向
-                    }
-                    
-                    # 遍歷所有天氣元素
-                    for element in weather_elements:
-                        element_name = element['elementName']
-                        time_data = element['time'][i] if i < len(element['time']) else None
-                        
-                        if not time_data:
-                            continue
-                        
-                        # 記錄時間
-                        if not period_data['start_time']:
-                            period_data['start_time'] = time_data.get('startTime')
-                            period_data['end_time'] = time_data.get('endTime')
-                        
-                        # 解析不同的天氣元素
-                        if element_name == 'Wx':  # 天氣現象
-                            period_data['weather'] = time_data['parameter']['parameterName']
-                        elif element_name == 'PoP':  # 降雨機率
-                            period_data['pop'] = int(time_data['parameter']['parameterName'])
-                        elif element_name == 'MinT':  # 最低溫度
-                            period_data['min_temp'] = float(time_data['parameter']['parameterName'])
-                        elif element_name == 'MaxT':  # 最高溫度
-                            period_data['max_temp'] = float(time_data['parameter']['parameterName'])
-                        elif element_name == 'CI':  # 舒適度
-                            period_data['comfort'] = time_data['parameter']['parameterName']
-                        elif element_name == 'WD':  # 風向
-                            period_data['wind'] = time_data['parameter']['parameterName']
-                    
-                    time_periods.append(period_data)
-            
             return {
                 'location': location,
-                'update_time': api_response['records']['datasetDescription']['update_time'] if 'update_time' in api_response['records']['datasetDescription'] else datetime.now().isoformat(),
-                'periods': time_periods
+                'update_time': WeatherDataProcessor._get_update_time(api_response),
+                'periods': WeatherDataProcessor._parse_forecast_periods(location_data['weatherElement'])
             }
             
         except Exception as e:
             print(f"解析天氣預報資料時發生錯誤: {e}")
             return None
     
+    @staticmethod
+    def parse_all_forecast_data(api_response: Dict[str, Any],
+                                locations: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        一次解析批次天氣預報資料中的所有縣市 (36小時預報)
+        
+        Args:
+            api_response: 批次 API 回應的原始資料
+            locations: 要保留的縣市名稱，如果為 None 則保留全部
+            
+        Returns:
+            縣市名稱對應解析後天氣資料的字典
+        """
+        all_data = {}
+        
+        try:
+            if not api_response or 'records' not in api_response:
+                return all_data
+            
+            update_time = WeatherDataProcessor._get_update_time(api_response)
+            # 每次解析只建立一次縣市索引，之後各縣市的查詢都是 O(1)
+            index = WeatherDataProcessor.get_location_index(api_response)
+            
+            if locations:
+                selected = [(name, index[name]) for name in locations if name in index]
+            else:
+                selected = list(index.items())
+            
+            for location, loc in selected:
+                try:
+                    all_data[location] = {
+                        'location': location,
+                        'update_time': update_time,
+                        'periods': WeatherDataProcessor._parse_forecast_periods(loc['weatherElement'])
+                    }
+                except Exception as e:
+                    print(f"解析 {location} 天氣預報資料時發生錯誤: {e}")
+            
+        except Exception as e:
+            print(f"解析批次天氣預報資料時發生錯誤: {e}")
+        
+        return all_data
+    
+    @staticmethod
+    def _extract_locations(api_response: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """取得回應中的縣市列表（支援 records.location 與 records.Locations[0].Location）"""
+        records = api_response.get('records') or {}
+        
+        if 'location' in records:
+            return records['location'] or []
+        
+        locations_list = records.get('Locations')
+        if isinstance(locations_list, list) and locations_list:
+            return locations_list[0].get('Location') or []
+        
+        return []
+    
+    @staticmethod
+    def get_location_index(api_response: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        建立 API 回應的縣市索引（縣市名稱對應資料）
+        
+        需要查詢多個縣市時建立一次，再傳給 find_location 重複使用。
+        
+        Args:
+            api_response: API 回應的原始資料
+            
+        Returns:
+            縣市名稱對應縣市資料的字典
+        """
+        if not api_response:
+            return {}
+        
+        index = {}
+        for loc in WeatherDataProcessor._extract_locations(api_response):
+            name = loc.get('locationName') or loc.get('LocationName')
+            if name and name not in index:
+                index[name] = loc
+        
+        return index
+    
+    @staticmethod
+    def find_location(api_response: Dict[str, Any], location: str,
+                      index: Optional[Dict[str, Dict[str, Any]]] = None) -> Optional[Dict[str, Any]]:
+        """
+        從 API 回應中取得指定縣市的資料
+        
+        Args:
+            api_response: API 回應的原始資料
+            location: 縣市名稱
+            index: get_location_index 建立的縣市索引，如果為 None 則依序搜尋
+            
+        Returns:
+            縣市資料，如果不存在則回傳 None
+        """
+        if index is not None:
+            return index.get(location)
+        
+        if not api_response:
+            return None
+        
+        for loc in WeatherDataProcessor._extract_locations(api_response):
+            if (loc.get('locationName') or loc.get('LocationName')) == location:
+                return loc
+        
+        return None
+    
+    @staticmethod
+    def _get_update_time(api_response: Dict[str, Any]) -> str:
+        """取得資料集更新時間，若無則使用目前時間"""
+        description = api_response['records'].get('datasetDescription', {})
+        if 'update_time' in description:
+            return description['update_time']
+        return datetime.now().isoformat()
+    
+    @staticmethod
+    def _parse_forecast_periods(weather_elements: List[Dict[str, Any]]) -> List[ForecastPeriod]:
+        """
+        將單一縣市的天氣元素轉換為各時段資料
+        
+        Args:
+            weather_elements: 縣市的 weatherElement 列表
+            
+        Returns:
+            時段資料列表
+        """
+        time_periods = []
+        
+        # 取得第一個元素的時間資訊作為基準
+        if not weather_elements or len(weather_elements[0]['time']) == 0:
+            return time_periods
+        
+        num_periods = len(weather_elements[0]['time'])
+        
+        for i in range(num_periods):
+            # 降雨機率 pop、舒適度 comfort、風向 wind 等欄位預設為 None
+            period_data = ForecastPeriod()
+            
+            # 遍歷所有天氣元素
+            for element in weather_elements:
+                element_name = element['elementName']
+                time_data = element['time'][i] if i < len(element['time']) else None
+                
+                if not time_data:
+                    continue
+                
+                # 記錄時間
+                if not period_data.start_time:
+                    period_data.start_time = time_data.get('startTime')
+                    period_data.end_time = time_data.get('endTime')
+                
+                # 解析不同的天氣元素
+                if element_name == 'Wx':  # 天氣現象
+                    period_data.weather = time_data['parameter']['parameterName']
+                elif element_name == 'PoP':  # 降雨機率
+                    period_data.pop = int(time_data['parameter']['parameterName'])
+                elif element_name == 'MinT':  # 最低溫度
+                    period_data.min_temp = float(time_data['parameter']['parameterName'])
+                elif element_name == 'MaxT':  # 最高溫度
+                    period_data.max_temp = float(time_data['parameter']['parameterName'])
+                elif element_name == 'CI':  # 舒適度
+                    period_data.comfort = time_data['parameter']['parameterName']
+                elif element_name == 'WD':  # 風向
+                    period_data.wind = time_data['parameter']['parameterName']
+            
+            time_periods.append(period_data)
+        
+        return time_periods
+    
     @staticmethod
     def get_current_weather(parsed_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
@@ -129,7 +244,7 @@ class WeatherDataProcessor:
         if not parsed_data or 'periods' not in parsed_data:
             return {}
         
-        periods = parsed_data['periods'][:3]  # 取前三個時段
+        periods = parsed_data['periods'][:TODAY_PERIODS]  # 取前三個時段
         
         # 計算今日溫度範圍
         all_temps = []
@@ -199,7 +314,7 @@ class WeatherDataProcessor:
             return f"{start_time} - {end_time}"
     
     @staticmethod
-    def parse_observation_data(api_response: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def parse_observation_data(api_response: Dict[str, Any]) -> List[Observation]:
         """
         解析觀測站即時資料
         
@@ -217,31 +332,24 @@ class WeatherDataProcessor:
             observations = []
             
             for station in stations:
-                obs_data = {
-                    'station_name': station.get('StationName', 'N/A'),
-                    'obs_time': station.get('ObsTime', {}).get('DateTime', 'N/A'),
-                    'temperature': None,
-                    'humidity': None,
-                    'pressure': None,
-                    'wind_speed': None,
-                    'wind_direction': None,
-                }
-                
-                # 解析天氣元素
+                # 解析天氣元素，缺少的欄位為 None
                 weather_element = station.get('WeatherElement', {})
                 
-                if 'AirTemperature' in weather_element:
-                    obs_data['temperature'] = weather_element['AirTemperature']
-                if 'RelativeHumidity' in weather_element:
-                    obs_data['humidity'] = weather_element['RelativeHumidity']
-                if 'AirPressure' in weather_element:
-                    obs_data['pressure'] = weather_element['AirPressure']
-                if 'WindSpeed' in weather_element:
-                    obs_data['wind_speed'] = weather_element['WindSpeed']
-                if 'WindDirection' in weather_element:
-                    obs_data['wind_direction'] = weather_element['WindDirection']
+                geo_info = station.get('GeoInfo', {})
+                latitude, longitude = WeatherDataProcessor._get_wgs84_coordinates(geo_info)
                 
-                observations.append(obs_data)
+                observations.append(Observation(
+                    station_name=station.get('StationName', 'N/A'),
+                    obs_time=station.get('ObsTime', {}).get('DateTime', 'N/A'),
+                    temperature=weather_element.get('AirTemperature'),
+                    humidity=weather_element.get('RelativeHumidity'),
+                    pressure=weather_element.get('AirPressure'),
+                    wind_speed=weather_element.get('WindSpeed'),
+                    wind_direction=weather_element.get('WindDirection'),
+                    county=geo_info.get('CountyName'),
+                    latitude=latitude,
+                    longitude=longitude,
+                ))
             
             return observations
             
@@ -249,6 +357,27 @@ class WeatherDataProcessor:
             print(f"解析觀測資料時發生錯誤: {e}")
             return []
     
+    @staticmethod
+    def _get_wgs84_coordinates(geo_info: Dict[str, Any]) -> Tuple[Optional[float], Optional[float]]:
+        """
+        取得觀測站的 WGS84 座標（GeoInfo.Coordinates 同時提供 TWD67 與 WGS84）
+        
+        Args:
+            geo_info: 觀測站的 GeoInfo
+            
+        Returns:
+            (緯度, 經度)，沒有座標時回傳 (None, None)
+        """
+        for coordinate in geo_info.get('Coordinates') or []:
+            if coordinate.get('CoordinateName') != 'WGS84':
+                continue
+            try:
+                return float(coordinate['StationLatitude']), float(coordinate['StationLongitude'])
+            except (KeyError, ValueError, TypeError):
+                break
+        
+        return None, None
+    
     @staticmethod
     def create_forecast_dataframe(parsed_data: Dict[str, Any]) -> pd.DataFrame:
         """
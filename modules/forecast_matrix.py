@@ -0,0 +1,223 @@
+"""
+欄式預報資料模組 - 以 NumPy 陣列儲存所有縣市 × 時段的預報，彙總統計改為向量化運算
+"""
+from typing import Dict, List, Any, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+# 今日的時段數（36 小時預報的前三個時段）
+TODAY_PERIODS = 3
+
+
+class ForecastMatrix:
+    """
+    所有縣市 × 時段的欄式預報資料
+    
+    數值欄位（最低溫、最高溫、降雨機率）為 float 陣列，缺值為 NaN；
+    文字欄位（天氣、舒適度、風向）以類別代碼儲存，缺值為 -1。
+    """
+    
+    def __init__(self, cities: List[str], num_periods: int):
+        """
+        建立空的預報矩陣
+        
+        Args:
+            cities: 縣市名稱（列的順序）
+            num_periods: 時段數
+        """
+        shape = (len(cities), num_periods)
+        
+        self.cities = list(cities)
+        self.num_periods = num_periods
+        self.start_times = np.full(shape, None, dtype=object)
+        self.end_times = np.full(shape, None, dtype=object)
+        self.min_temp = np.full(shape, np.nan)
+        self.max_temp = np.full(shape, np.nan)
+        self.pop = np.full(shape, np.nan)
+        self.weather_codes = np.full(shape, -1, dtype=np.int16)
+        self.comfort_codes = np.full(shape, -1, dtype=np.int16)
+        self.wind_codes = np.full(shape, -1, dtype=np.int16)
+        
+        # 類別代碼對應的文字
+        self.weather_categories: List[str] = []
+        self.comfort_categories: List[str] = []
+        self.wind_categories: List[str] = []
+        
+        self._row_index = {city: i for i, city in enumerate(self.cities)}
+    
+    @classmethod
+    def from_parsed(cls, all_data: Dict[str, Dict[str, Any]]) -> 'ForecastMatrix':
+        """
+        由解析後的各縣市預報資料建立矩陣
+        
+        Args:
+            all_data: 縣市名稱對應解析後天氣資料（含 periods）的字典
+            
+        Returns:
+            預報矩陣（沒有時段資料的縣市不列入）
+        """
+        rows = [
+            (city, data['periods']) for city, data in all_data.items()
+            if data and data.get('periods')
+        ]
+        num_periods = max((len(periods) for _, periods in rows), default=0)
+        matrix = cls([city for city, _ in rows], num_periods)
+        
+        weather_lookup: Dict[str, int] = {}
+        comfort_lookup: Dict[str, int] = {}
+        wind_lookup: Dict[str, int] = {}
+        
+        # 唯一一次逐筆走訪，之後的彙總都在陣列上完成
+        for i, (_, periods) in enumerate(rows):
+            for j, period in enumerate(periods):
+                matrix.start_times[i, j] = period.get('start_time')
+                matrix.end_times[i, j] = period.get('end_time')
+                if period.get('min_temp') is not None:
+                    matrix.min_temp[i, j] = period['min_temp']
+                if period.get('max_temp') is not None:
+                    matrix.max_temp[i, j] = period['max_temp']
+                if period.get('pop') is not None:
+                    matrix.pop[i, j] = period['pop']
+                matrix.weather_codes[i, j] = cls._encode(period.get('weather'), weather_lookup)
+                matrix.comfort_codes[i, j] = cls._encode(period.get('comfort'), comfort_lookup)
+                matrix.wind_codes[i, j] = cls._encode(period.get('wind'), wind_lookup)
+        
+        matrix.weather_categories = list(weather_lookup)
+        matrix.comfort_categories = list(comfort_lookup)
+        matrix.wind_categories = list(wind_lookup)
+        
+        return matrix
+    
+    @staticmethod
+    def _encode(value: Optional[str], lookup: Dict[str, int]) -> int:
+        """取得文字的類別代碼，新出現的文字會加入對照表"""
+        if not value:
+            return -1
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(lookup)
+        return code
+    
+    @staticmethod
+    def _decode(codes: np.ndarray, categories: List[str], default: Optional[str] = None) -> List[Optional[str]]:
+        """將類別代碼轉回文字，缺值使用 default"""
+        lookup = np.array(list(categories) + [default], dtype=object)
+        # 代碼 -1 對應到最後一個位置的預設值
+        return lookup[codes].tolist()
+    
+    def __len__(self) -> int:
+        return len(self.cities)
+    
+    @property
+    def empty(self) -> bool:
+        """是否沒有任何縣市資料"""
+        return len(self.cities) == 0 or self.num_periods == 0
+    
+    def row(self, city: str) -> Optional[int]:
+        """
+        取得縣市所在的列
+        
+        Args:
+            city: 縣市名稱
+            
+        Returns:
+            列索引，不存在時回傳 None
+        """
+        return self._row_index.get(city)
+    
+    def weather(self, period: int = 0, default: Optional[str] = None) -> List[Optional[str]]:
+        """取得各縣市指定時段的天氣描述"""
+        return self._decode(self.weather_codes[:, period], self.weather_categories, default)
+    
+    def comfort(self, period: int = 0, default: Optional[str] = None) -> List[Optional[str]]:
+        """取得各縣市指定時段的舒適度"""
+        return self._decode(self.comfort_codes[:, period], self.comfort_categories, default)
+    
+    def wind(self, period: int = 0, default: Optional[str] = None) -> List[Optional[str]]:
+        """取得各縣市指定時段的風向"""
+        return self._decode(self.wind_codes[:, period], self.wind_categories, default)
+    
+    def temp_range(self, periods: int = TODAY_PERIODS) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        計算各縣市前幾個時段的溫度範圍
+        
+        Args:
+            periods: 納入計算的時段數
+            
+        Returns:
+            (最低溫陣列, 最高溫陣列)，無資料的縣市為 NaN
+        """
+        # 最低溫與最高溫一起比較，與逐筆收集所有溫度取 min/max 的結果相同
+        temps = np.concatenate(
+            [self.min_temp[:, :periods], self.max_temp[:, :periods]], axis=1
+        )
+        has_value = ~np.isnan(temps)
+        lows = np.where(has_value, temps, np.inf).min(axis=1, initial=np.inf)
+        highs = np.where(has_value, temps, -np.inf).max(axis=1, initial=-np.inf)
+        no_value = ~has_value.any(axis=1)
+        lows[no_value] = np.nan
+        highs[no_value] = np.nan
+        return lows, highs
+    
+    def pop_stats(self, periods: int = TODAY_PERIODS) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        計算各縣市前幾個時段的降雨機率統計
+        
+        Args:
+            periods: 納入計算的時段數
+            
+        Returns:
+            (平均降雨機率陣列, 最大降雨機率陣列)，無資料的縣市為 0
+        """
+        pop = self.pop[:, :periods]
+        has_value = ~np.isnan(pop)
+        counts = has_value.sum(axis=1)
+        totals = np.where(has_value, pop, 0).sum(axis=1)
+        averages = np.divide(totals, counts, out=np.zeros(len(self.cities)), where=counts > 0)
+        maxima = np.where(has_value, pop, 0).max(axis=1, initial=0)
+        return averages, maxima
+    
+    def column_stats(self, values: np.ndarray) -> Optional[Dict[str, float]]:
+        """
+        計算單一欄位（例如所有縣市某時段的最高溫）的全台統計
+        
+        Args:
+            values: 一維數值陣列，NaN 視為缺值
+            
+        Returns:
+            包含 mean、min、max、count 的字典，沒有任何數值時回傳 None
+        """
+        valid = values[~np.isnan(values)]
+        if valid.size == 0:
+            return None
+        return {
+            'mean': float(valid.mean()),
+            'min': float(valid.min()),
+            'max': float(valid.max()),
+            'count': int(valid.size),
+        }
+    
+    def to_overview_frame(self, periods: int = TODAY_PERIODS) -> pd.DataFrame:
+        """
+        建立各縣市今日概況的 DataFrame（欄位名稱為英文，由呼叫端決定顯示名稱）
+        
+        Args:
+            periods: 納入今日計算的時段數
+            
+        Returns:
+            含 city、weather、comfort、min_temp、max_temp、max_pop 欄位的 DataFrame
+        """
+        if self.empty:
+            return pd.DataFrame()
+        
+        lows, highs = self.temp_range(periods)
+        _, max_pop = self.pop_stats(periods)
+        
+        return pd.DataFrame({
+            'city': self.cities,
+            'weather': self.weather(0),
+            'comfort': self.comfort(0),
+            'min_temp': lows,
+            'max_temp': highs,
+            'max_pop': max_pop.astype(int),
+        })
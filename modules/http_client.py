@@ -0,0 +1,114 @@
+"""
+HTTP 連線模組 - 共用連線池與 keep-alive 的 HTTP Session
+"""
+import threading
+from typing import Optional, Dict, Any
+import requests
+from requests.adapters import HTTPAdapter
+from config.config import HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_TIMEOUT
+
+
+class HTTPSessionManager:
+    """共用 HTTP Session 管理器"""
+    
+    def __init__(self, pool_connections: int = HTTP_POOL_CONNECTIONS,
+                 pool_maxsize: int = HTTP_POOL_MAXSIZE,
+                 timeout: float = HTTP_TIMEOUT):
+        """
+        初始化 HTTP Session
+        
+        Args:
+            pool_connections: 保留連線池的主機數量
+            pool_maxsize: 每個主機的最大連線數（超過時等待可用連線）
+            timeout: 預設請求逾時（秒）
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        
+        # pool_block=True：每個主機的連線數不超過 pool_maxsize
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=True
+        )
+        
+        self._session = requests.Session()
+        self._session.mount('https://', self._adapter)
+        self._session.mount('http://', self._adapter)
+        self._session.headers.update({
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+        })
+        
+        self._lock = threading.Lock()
+        self._total_requests = 0
+    
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None,
+            headers: Optional[Dict[str, str]] = None,
+            timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        """
+        透過共用連線池發送 GET 請求
+        
+        Args:
+            url: 請求網址
+            params: 查詢參數
+            headers: 額外的請求標頭
+            timeout: 請求逾時（秒），如果為 None 則使用預設值
+            
+        Returns:
+            requests Response 物件
+        """
+        with self._lock:
+            self._total_requests += 1
+        
+        return self._session.get(
+            url,
+            params=params,
+            headers=headers,
+            timeout=timeout if timeout is not None else self.timeout,
+            **kwargs
+        )
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        取得連線統計資訊
+        
+        Returns:
+            各主機的請求數、新建連線數與重用連線數
+        """
+        hosts = {}
+        pools = self._adapter.poolmanager.pools
+        
+        for pool_key in list(pools.keys()):
+            pool = pools.get(pool_key)
+            if pool is None:
+                continue
+            
+            new_connections = pool.num_connections
+            hosts[pool.host] = {
+                'requests': pool.num_requests,
+                'new_connections': new_connections,
+                'reused_connections': max(pool.num_requests - new_connections, 0),
+            }
+        
+        total_new = sum(host['new_connections'] for host in hosts.values())
+        total_reused = sum(host['reused_connections'] for host in hosts.values())
+        
+        return {
+            'total_requests': self._total_requests,
+            'new_connections': total_new,
+            'reused_connections': total_reused,
+            'reuse_rate': total_reused / (total_new + total_reused) if (total_new + total_reused) else 0.0,
+            'pool_connections': self.pool_connections,
+            'pool_maxsize': self.pool_maxsize,
+            'hosts': hosts,
+        }
+    
+    def close(self) -> None:
+        """關閉所有連線"""
+        self._session.close()
+
+
+# 建立全域 HTTP Session 實例
+http_session = HTTPSessionManager()
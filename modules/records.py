@@ -0,0 +1,103 @@
+"""
+資料紀錄模組 - 以 __slots__ 定義的精簡紀錄類別，取代大量重複鍵值的字典
+"""
+from typing import Dict, Any, Iterator, Tuple
+
+
+class Record:
+    """
+    精簡紀錄的基底類別
+    
+    欄位以 __slots__ 宣告，不為每筆紀錄建立 __dict__；
+    同時提供 record['key'] 與 record.get('key') 存取方式，與原本的字典用法相容。
+    """
+    
+    __slots__ = ()
+    
+    def __init__(self, **fields: Any):
+        for name in self.__slots__:
+            setattr(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError(f"{type(self).__name__} 不支援的欄位: {', '.join(fields)}")
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+    
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Record):
+            return type(self) is type(other) and self.to_tuple() == other.to_tuple()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+    
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+    
+    def __getstate__(self) -> Tuple:
+        return self.to_tuple()
+    
+    def __setstate__(self, state: Tuple) -> None:
+        # 舊版快取的欄位可能較少，缺少的欄位為 None
+        for index, name in enumerate(self.__slots__):
+            setattr(self, name, state[index] if index < len(state) else None)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        取得欄位值（與 dict.get 相同，欄位不存在時回傳 default）
+        
+        Args:
+            key: 欄位名稱
+            default: 預設值
+            
+        Returns:
+            欄位值
+        """
+        if key not in self.__slots__:
+            return default
+        return getattr(self, key)
+    
+    def keys(self) -> Tuple[str, ...]:
+        """取得所有欄位名稱"""
+        return self.__slots__
+    
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """依序取得 (欄位名稱, 欄位值)"""
+        return ((name, getattr(self, name)) for name in self.__slots__)
+    
+    def to_tuple(self) -> Tuple:
+        """轉換為欄位值的 tuple"""
+        return tuple(getattr(self, name) for name in self.__slots__)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """轉換為字典"""
+        return dict(self.items())
+
+
+class ForecastPeriod(Record):
+    """36 小時預報的單一時段"""
+    
+    __slots__ = (
+        'start_time', 'end_time', 'weather', 'pop',
+        'min_temp', 'max_temp', 'comfort', 'wind',
+    )
+
+
+class Observation(Record):
+    """觀測站即時資料"""
+    
+    __slots__ = (
+        'station_name', 'obs_time', 'temperature', 'humidity',
+        'pressure', 'wind_speed', 'wind_direction',
+        'county', 'latitude', 'longitude',
+    )
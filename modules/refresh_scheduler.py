@@ -0,0 +1,194 @@
+"""
+背景更新排程模組 - 在快取過期前於背景預先取得新資料
+"""
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Callable, Any, Optional
+from config.config import REFRESH_JITTER, REFRESH_RETRY_DELAY, REFRESH_MAX_BACKOFF
+
+
+class _RefreshJob:
+    """單一資料集的更新工作"""
+    
+    __slots__ = ('name', 'func', 'interval', 'next_run', 'runs', 'failures',
+                 'last_run', 'last_success', 'last_duration', 'last_error')
+    
+    def __init__(self, name: str, func: Callable[[], Any], interval: float, next_run: float):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.next_run = next_run
+        self.runs = 0
+        self.failures = 0  # 連續失敗次數
+        self.last_run: Optional[float] = None
+        self.last_success: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+
+class RefreshScheduler:
+    """背景更新排程器（單一背景執行緒依序執行到期的工作）"""
+    
+    def __init__(self, jitter: float = REFRESH_JITTER, retry_delay: float = REFRESH_RETRY_DELAY,
+                 max_backoff: float = REFRESH_MAX_BACKOFF):
+        """
+        初始化排程器
+        
+        Args:
+            jitter: 更新間隔的隨機浮動比例（0.1 代表 ±10%）
+            retry_delay: 失敗後的首次重試間隔（秒），之後每次加倍
+            max_backoff: 失敗後的最長重試間隔（秒）
+        """
+        self.jitter = jitter
+        self.retry_delay = retry_delay
+        self.max_backoff = max_backoff
+        self._jobs: Dict[str, _RefreshJob] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def add_job(self, name: str, func: Callable[[], Any], interval: float,
+                run_immediately: bool = True) -> None:
+        """
+        新增更新工作
+        
+        Args:
+            name: 工作名稱
+            func: 更新函數，回傳 None 或拋出例外視為失敗
+            interval: 更新間隔（秒）
+            run_immediately: 是否在排程啟動後立即執行一次（預先載入快取）
+        """
+        now = time.time()
+        next_run = now if run_immediately else now + self._jittered(interval)
+        
+        with self._lock:
+            self._jobs[name] = _RefreshJob(name, func, interval, next_run)
+        self._wakeup.set()
+    
+    def remove_job(self, name: str) -> bool:
+        """
+        移除更新工作
+        
+        Args:
+            name: 工作名稱
+            
+        Returns:
+            是否成功移除
+        """
+        with self._lock:
+            return self._jobs.pop(name, None) is not None
+    
+    def start(self) -> None:
+        """啟動背景執行緒（已啟動時不做任何事）"""
+        if self.is_running():
+            return
+        
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='refresh-scheduler', daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        停止背景執行緒
+        
+        Args:
+            timeout: 等待執行緒結束的時間（秒）
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+    
+    def is_running(self) -> bool:
+        """排程器是否執行中"""
+        return self._thread is not None and self._thread.is_alive()
+    
+    def _jittered(self, delay: float) -> float:
+        """為間隔加入隨機浮動，避免多個工作或多個程序同時更新"""
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+    
+    def _run(self) -> None:
+        """背景執行緒主迴圈"""
+        while not self._stopped.is_set():
+            with self._lock:
+                job = min(self._jobs.values(), key=lambda j: j.next_run, default=None)
+            
+            if job is None:
+                wait_time = None
+            else:
+                wait_time = max(0.0, job.next_run - time.time())
+            
+            # 等待到期，期間新增工作或停止排程會提前喚醒
+            if wait_time is None or wait_time > 0:
+                self._wakeup.wait(wait_time)
+                self._wakeup.clear()
+                continue
+            
+            self._run_job(job)
+    
+    def _run_job(self, job: _RefreshJob) -> None:
+        """執行單一工作並安排下次執行時間"""
+        start_time = time.time()
+        error = None
+        
+        try:
+            result = job.func()
+            if result is None:
+                error = '未取得資料'
+        except Exception as e:
+            error = str(e)
+        
+        end_time = time.time()
+        
+        with self._lock:
+            job.runs += 1
+            job.last_run = start_time
+            job.last_duration = end_time - start_time
+            job.last_error = error
+            
+            if error is None:
+                job.failures = 0
+                job.last_success = end_time
+                job.next_run = end_time + self._jittered(job.interval)
+            else:
+                # 失敗時以指數退避重試，但不超過原本的更新間隔
+                job.failures += 1
+                backoff = min(self.retry_delay * (2 ** (job.failures - 1)), self.max_backoff, job.interval)
+                job.next_run = end_time + self._jittered(backoff)
+        
+        if error is not None:
+            print(f"背景更新 {job.name} 失敗（連續 {job.failures} 次）: {error}")
+    
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        """
+        取得所有工作的狀態
+        
+        Returns:
+            工作名稱對應狀態的字典
+        """
+        def to_datetime(timestamp: Optional[float]) -> Optional[datetime]:
+            return datetime.fromtimestamp(timestamp) if timestamp is not None else None
+        
+        with self._lock:
+            return {
+                name: {
+                    'interval': job.interval,
+                    'runs': job.runs,
+                    'failures': job.failures,
+                    'last_run': to_datetime(job.last_run),
+                    'last_success': to_datetime(job.last_success),
+                    'last_duration': job.last_duration,
+                    'last_error': job.last_error,
+                    'next_run': to_datetime(job.next_run),
+                    'healthy': job.failures == 0,
+                }
+                for name, job in self._jobs.items()
+            }
+
+
+# 建立全域背景更新排程器實例
+refresh_scheduler = RefreshScheduler()
@@ -0,0 +1,84 @@
+"""
+請求合併模組 - 相同鍵值的並行請求只發送一次
+"""
+import threading
+from typing import Dict, Callable, Any, Optional
+
+
+class _InFlightCall:
+    """進行中的請求"""
+    
+    __slots__ = ('event', 'result', 'error')
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """請求合併器（single-flight）"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _InFlightCall] = {}
+        self._executed = 0
+        self._coalesced = 0
+    
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        """
+        執行函數；若相同鍵值已有請求進行中，則等待並共用其結果
+        
+        Args:
+            key: 請求識別鍵（CacheManager 使用快取鍵值，批次工作使用 job: 前綴）
+            func: 實際取得資料的函數
+            
+        Returns:
+            函數的回傳值
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            
+            if is_leader:
+                call = _InFlightCall()
+                self._calls[key] = call
+                self._executed += 1
+            else:
+                self._coalesced += 1
+        
+        if not is_leader:
+            # 等待進行中的請求完成
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+    
+    def get_stats(self) -> Dict[str, int]:
+        """
+        取得請求合併統計資訊
+        
+        Returns:
+            統計資訊字典
+        """
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'executed': self._executed,
+                'coalesced': self._coalesced,
+            }
+
+
+# 建立全域請求合併器實例
+request_coalescer = SingleFlight()
@@ -0,0 +1,118 @@
+"""
+空氣品質資料處理測試
+"""
+import components.air_quality as air_quality_module
+from components.air_quality import process_aqi_data
+from modules.cache_manager import CacheManager
+from modules.single_flight import SingleFlight
+
+URL = 'https://data.moenv.gov.tw/api/v2/aqx_p_432'
+
+
+def make_record(station: str, aqi, **fields) -> dict:
+    record = {'sitename': station, 'county': '臺北市', 'aqi': aqi,
+              'pm2.5': '12', 'pm10': '30', 'publishtime': '2026/10/16 10:00:00'}
+    record.update(fields)
+    return record
+
+
+def test_only_integer_aqi_values_are_kept():
+    records = [
+        make_record('松山', '42'),
+        make_record('中山', '12.7'),
+        make_record('古亭', ''),
+        make_record('士林', 'N/A'),
+        make_record('萬華', ' 88 '),
+    ]
+    
+    df = process_aqi_data(records)
+    
+    assert df['測站'].tolist() == ['萬華', '松山']
+    assert df['AQI'].tolist() == [88, 42]
+
+
+def test_pm_values_keep_the_source_text_and_missing_fields_show_na():
+    record = make_record('松山', '42', **{'pm2.5': '7.5'})
+    del record['pm10']
+    
+    df = process_aqi_data([record])
+    
+    assert df.loc[0, 'PM2.5'] == '7.5'
+    assert df.loc[0, 'PM10'] == 'N/A'
+
+
+def test_sorted_by_aqi_with_index_in_valid_station_order():
+    records = [make_record('松山', '20'), make_record('中山', ''), make_record('古亭', '150')]
+    
+    df = process_aqi_data(records)
+    
+    assert df['測站'].tolist() == ['古亭', '松山']
+    assert df.index.tolist() == [1, 0]
+    assert df['狀態'].tolist() == ['對敏感族群不健康', '良好']
+
+
+def make_page(offset: int, size: int) -> list:
+    return [make_record(f'站{i}', str(i % 300)) for i in range(offset, offset + size)]
+
+
+def test_pages_are_requested_by_the_first_page_size(monkeypatch):
+    requested = []
+    
+    def fetch_page(url, params, offset):
+        requested.append(offset)
+        return make_page(offset, min(100, 250 - offset))
+    
+    monkeypatch.setattr(air_quality_module, '_fetch_aqi_page', fetch_page)
+    failed_offsets = []
+    
+    # 伺服器每頁只回傳 100 筆（低於 limit），仍須取得全部 250 筆
+    pages = list(air_quality_module._iter_aqi_pages(URL, {}, make_page(0, 100), 250, failed_offsets))
+    
+    assert sorted(requested) == [100, 200]
+    assert sorted(record['sitename'] for page in pages for record in page) == sorted(f'站{i}' for i in range(250))
+    assert failed_offsets == []
+
+
+def test_pages_without_total_are_fetched_until_a_short_page(monkeypatch):
+    monkeypatch.setattr(air_quality_module, 'AQI_PAGE_SIZE', 100)
+    monkeypatch.setattr(
+        air_quality_module, '_fetch_aqi_page',
+        lambda url, params, offset: make_page(offset, 100 if offset < 200 else 30)
+    )
+    
+    pages = list(air_quality_module._iter_aqi_pages(URL, {}, make_page(0, 100), None, []))
+    
+    assert [len(page) for page in pages] == [100, 100, 30]
+
+
+def test_failed_pages_are_reported_and_the_change_marker_is_cleared(monkeypatch):
+    forgotten = []
+    monkeypatch.setattr(
+        air_quality_module, '_fetch_aqi_page',
+        lambda url, params, offset: None if offset == 100 else make_page(offset, 50)
+    )
+    monkeypatch.setattr(air_quality_module.change_detector, 'forget', forgotten.append)
+    failed_offsets = []
+    
+    pages = list(air_quality_module._iter_aqi_pages(URL, {}, make_page(0, 50), 200, failed_offsets))
+    
+    assert len(pages) == 3
+    assert failed_offsets == [100]
+    assert forgotten
+
+
+def test_partial_download_is_cached_with_the_short_ttl(monkeypatch):
+    cache = CacheManager(single_flight=SingleFlight())
+    monkeypatch.setattr(air_quality_module, 'cache_manager', cache)
+    
+    def fetch_pages(conditional=False, failed_offsets=None):
+        failed_offsets.append(100)
+        return iter([make_page(0, 100)])
+    
+    monkeypatch.setattr(air_quality_module, '_fetch_aqi_pages', fetch_pages)
+    
+    df = air_quality_module.get_aqi_df()
+    
+    freshness = cache.get_freshness('aqi_df')
+    assert len(df) == 100
+    assert round(freshness['expires_at'] - freshness['created_at']) == air_quality_module.AQI_PARTIAL_TTL
@@ -0,0 +1,77 @@
+"""
+串流縣市資料測試
+"""
+import json
+import pytest
+import requests
+import modules.api_client as api_client_module
+from modules.api_client import StreamedLocations
+from modules.change_detector import ChangeDetector
+
+URL = 'https://opendata.cwa.gov.tw/api/v1/rest/datastore/F-D0047-091'
+
+
+def make_response(payload: dict) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    response._content_consumed = True
+    response.url = URL
+    return response
+
+
+def week_payload(temperature: str) -> dict:
+    """建立兩個縣市的一週預報資料"""
+    return {'records': {'Locations': [{'Location': [
+        {'LocationName': city, 'WeatherElement': [
+            {'ElementName': '平均溫度', 'Time': [{'ElementValue': [{'Temperature': temperature}]}]},
+            {'ElementName': '紫外線指數', 'Time': []},
+        ]}
+        for city in ('臺北市', '高雄市')
+    ]}]}}
+
+
+@pytest.fixture
+def detector(monkeypatch):
+    """每個測試使用獨立的變更偵測器，不影響全域標記"""
+    detector = ChangeDetector()
+    monkeypatch.setattr(api_client_module, 'change_detector', detector)
+    return detector
+
+
+def test_stream_filters_locations_and_elements(detector):
+    stream = StreamedLocations(make_response(week_payload('25')), URL, ['高雄市'], ['平均溫度'])
+    
+    locations = list(stream)
+    
+    assert [location['LocationName'] for location in locations] == ['高雄市']
+    assert [element['ElementName'] for element in locations[0]['WeatherElement']] == ['平均溫度']
+    assert stream.content_hash is not None
+
+
+def test_unchanged_is_known_only_after_the_whole_body_is_read(detector):
+    first = StreamedLocations(make_response(week_payload('25')), URL, None, None)
+    list(first)
+    assert not first.unchanged
+    first.record(skipped=False)
+    
+    second = StreamedLocations(make_response(week_payload('25')), URL, None, None)
+    assert not second.unchanged
+    list(second)
+    assert second.unchanged
+    
+    changed = StreamedLocations(make_response(week_payload('26')), URL, None, None)
+    list(changed)
+    assert not changed.unchanged
+
+
+def test_only_skipped_writes_are_counted_as_unchanged(detector):
+    for skipped in (False, True, False):
+        stream = StreamedLocations(make_response(week_payload('25')), URL, None, None)
+        list(stream)
+        stream.record(skipped=skipped)
+    
+    stats = detector.get_stats()
+    assert stats['checks'] == 3
+    assert stats['unchanged_content'] == 1
+    assert stats['changed'] == 2
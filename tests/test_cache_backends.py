@@ -0,0 +1,133 @@
+"""
+快取後端測試
+"""
+import threading
+import time
+from modules.cache_backends import SQLiteCacheBackend
+from modules.cache_manager import CacheManager
+from modules.single_flight import SingleFlight
+
+
+def make_entry(data, ttl: float = 60, max_stale: float = 0) -> dict:
+    """建立快取項目"""
+    current_time = time.time()
+    return {
+        'data': data,
+        'created_at': current_time,
+        'expires_at': current_time + ttl,
+        'stale_until': current_time + ttl + max_stale,
+    }
+
+
+def test_entry_round_trips_through_sqlite(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / 'cache.db'))
+    entry = make_entry({'臺北市': [1, 2, 3]})
+    backend.set('forecast', entry)
+    
+    assert backend.get('forecast') == entry
+    assert backend.get('missing') is None
+
+
+def test_entries_past_stale_until_are_not_returned_and_are_cleaned_up(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / 'cache.db'))
+    backend.set('old', make_entry('old', ttl=-10))
+    backend.set('new', make_entry('new'))
+    
+    assert backend.get('old') is None
+    assert [key for key, _ in backend.load_all()] == ['new']
+    assert backend.cleanup_expired() == 1
+
+
+def test_unreadable_blob_is_treated_as_missing(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / 'cache.db'))
+    backend.set('forecast', make_entry('data'))
+    with backend._connection() as conn:
+        conn.execute("UPDATE cache_entries SET value = ? WHERE key = ?", (b'not a pickle', 'forecast'))
+    
+    assert backend.get('forecast') is None
+
+
+def test_cache_survives_restart_through_warm_load(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    first = CacheManager(single_flight=SingleFlight(), backend=SQLiteCacheBackend(path))
+    first.set('aqi_df', [1, 2, 3])
+    version = first.get_version('aqi_df')
+    
+    # 新的程序：初始化時從檔案預先載入，不需要重新取得資料
+    second = CacheManager(single_flight=SingleFlight(), backend=SQLiteCacheBackend(path))
+    
+    assert second.get_or_fetch('aqi_df', lambda: 'unexpected') == [1, 2, 3]
+    assert second.get_version('aqi_df') == version
+
+
+def test_lease_is_exclusive_until_released_or_expired(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / 'cache.db'))
+    
+    assert backend.acquire_lease('forecast', 'worker-1', timeout=30)
+    assert not backend.acquire_lease('forecast', 'worker-2', timeout=30)
+    assert backend.is_leased('forecast')
+    
+    # 只有持有者可以釋放
+    backend.release_lease('forecast', 'worker-2')
+    assert backend.is_leased('forecast')
+    backend.release_lease('forecast', 'worker-1')
+    assert not backend.is_leased('forecast')
+    
+    # 逾時的更新權可由其他程序取得
+    assert backend.acquire_lease('aqi_df', 'worker-1', timeout=-1)
+    assert backend.acquire_lease('aqi_df', 'worker-2', timeout=30)
+
+
+def test_touch_extends_expiry_without_rewriting_data(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / 'cache.db'))
+    entry = make_entry('data')
+    backend.set('forecast', entry)
+    
+    assert backend.touch('forecast', entry['expires_at'] + 100, entry['stale_until'] + 100)
+    assert not backend.touch('missing', 0, 0)
+    assert backend.get_meta('forecast') == {
+        'created_at': entry['created_at'],
+        'expires_at': entry['expires_at'] + 100,
+        'stale_until': entry['stale_until'] + 100,
+    }
+
+
+def test_same_version_is_not_unpickled_again(tmp_path, monkeypatch):
+    path = str(tmp_path / 'cache.db')
+    writer = CacheManager(single_flight=SingleFlight(), backend=SQLiteCacheBackend(path))
+    reader = CacheManager(single_flight=SingleFlight(), backend=SQLiteCacheBackend(path))
+    writer.set('aqi_df', 'data')
+    assert reader.reload('aqi_df') == 'data'
+    
+    # 其他程序只延長期限：讀取端只更新期限，不讀取整個項目
+    writer.renew('aqi_df', ttl=3600)
+    monkeypatch.setattr(reader.backend, 'get', lambda key: None)
+    
+    assert reader.reload('aqi_df') == 'data'
+    assert reader.get_freshness('aqi_df')['expires_at'] == writer.get_freshness('aqi_df')['expires_at']
+
+
+def test_run_exclusive_waits_for_other_process_and_collects_its_result(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    other = SQLiteCacheBackend(path)
+    cache = CacheManager(single_flight=SingleFlight(), backend=SQLiteCacheBackend(path))
+    cache.lease_timeout = 5
+    
+    # 模擬其他程序持有批次工作的更新權，稍後寫入結果並釋放
+    assert other.acquire_lease('job:all_cities', 'other-process', timeout=30)
+    
+    def finish_other_process():
+        time.sleep(0.1)
+        other.set('city:臺北市', make_entry('sunny'))
+        other.release_lease('job:all_cities', 'other-process')
+    
+    threading.Thread(target=finish_other_process).start()
+    jobs = []
+    result = cache.run_exclusive(
+        'all_cities',
+        lambda: jobs.append(1),
+        lambda: cache.reload('city:臺北市')
+    )
+    
+    assert result == 'sunny'
+    assert jobs == []
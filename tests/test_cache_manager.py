@@ -0,0 +1,140 @@
+"""
+快取管理器測試
+"""
+import threading
+import time
+from modules.cache_manager import CacheManager, PartialResult
+from modules.change_detector import NOT_MODIFIED
+from modules.single_flight import SingleFlight
+
+
+def make_cache(**kwargs) -> CacheManager:
+    """建立使用獨立合併器、沒有後端的快取管理器"""
+    return CacheManager(single_flight=SingleFlight(), **kwargs)
+
+
+def wait_until(condition, timeout: float = 5.0) -> bool:
+    """等待條件成立（背景更新在其他執行緒完成）"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def expire(cache: CacheManager, key: str, seconds: float) -> None:
+    """將項目的建立時間與期限往前移，模擬經過了 seconds 秒"""
+    shard = cache._shard_for(key)
+    with shard.lock:
+        entry = shard.entries[key]
+        for field in ('created_at', 'expires_at', 'stale_until'):
+            entry[field] -= seconds
+
+
+def test_get_or_fetch_caches_result():
+    cache = make_cache(default_ttl=60)
+    calls = []
+    
+    def fetch():
+        calls.append(1)
+        return {'value': 1}
+    
+    assert cache.get_or_fetch('key', fetch) == {'value': 1}
+    assert cache.get_or_fetch('key', fetch) == {'value': 1}
+    assert len(calls) == 1
+
+
+def test_stale_entry_is_served_while_refreshing_in_background():
+    cache = make_cache(default_ttl=60, max_stale=600)
+    cache.set('forecast', 'old')
+    expire(cache, 'forecast', 61)
+    
+    refresh_started = threading.Event()
+    allow_refresh = threading.Event()
+    
+    def fetch():
+        refresh_started.set()
+        allow_refresh.wait(timeout=5)
+        return 'new'
+    
+    # 過期資料立即回傳，不等待取得新資料
+    assert cache.get_or_fetch('forecast', fetch) == 'old'
+    assert refresh_started.wait(timeout=5)
+    assert cache.get_freshness('forecast')['is_refreshing']
+    
+    # 背景更新進行中，其他呼叫者仍取得舊資料，且不會再觸發更新
+    assert cache.get_or_fetch('forecast', lambda: 'unexpected') == 'old'
+    
+    allow_refresh.set()
+    assert wait_until(lambda: cache.get('forecast') == 'new')
+    assert wait_until(lambda: not cache.get_freshness('forecast')['is_refreshing'])
+    assert cache.get_stats()['stale_served'] == 2
+
+
+def test_entry_past_max_stale_is_fetched_synchronously():
+    cache = make_cache(default_ttl=60, max_stale=10)
+    cache.set('forecast', 'old')
+    expire(cache, 'forecast', 100)
+    
+    assert cache.get_or_fetch('forecast', lambda: 'new') == 'new'
+
+
+def test_least_recently_used_item_is_evicted_first():
+    cache = make_cache(max_items=3, num_shards=1)
+    for key in ('a', 'b', 'c'):
+        cache.set(key, key)
+    
+    # 讀取 a 之後，最久未使用的是 b
+    cache.get('a')
+    cache.set('d', 'd')
+    
+    assert cache.get('a') == 'a'
+    assert cache.get('b') is None
+    assert cache.get_stats()['evictions'] == 1
+
+
+def test_item_larger_than_max_bytes_is_rejected():
+    cache = make_cache(max_bytes=10_000)
+    cache.set('big', 'x' * 20_000)
+    
+    assert cache.get('big') is None
+    assert cache.get_stats()['rejected'] == 1
+
+
+def test_max_items_is_a_global_cap_with_global_lru_order():
+    cache = make_cache(max_items=22, num_shards=8)
+    for i in range(22):
+        cache.set(f'key{i}', i)
+    
+    assert cache.get_stats()['items'] == 22
+    
+    # key0 最近被讀取，應淘汰的是全部分片中最久未使用的 key1
+    cache.get('key0')
+    cache.set('key22', 22)
+    
+    assert cache.get_stats()['items'] == 22
+    assert cache.get('key0') == 0
+    assert cache.get('key1') is None
+    assert cache.get('key22') == 22
+
+
+def test_not_modified_renews_existing_entry_without_changing_version():
+    cache = make_cache(default_ttl=60, max_stale=600)
+    cache.set('aqi_df', 'data')
+    expire(cache, 'aqi_df', 61)
+    version = cache.get_version('aqi_df')
+    
+    assert cache.refresh('aqi_df', lambda: NOT_MODIFIED) == 'data'
+    assert cache.get('aqi_df') == 'data'
+    assert cache.get_version('aqi_df') == version
+    assert cache.get_stats()['unchanged_refreshes'] == 1
+
+
+def test_partial_result_is_stored_with_its_shorter_ttl():
+    cache = make_cache(default_ttl=1800)
+    
+    assert cache.refresh('aqi_df', lambda: PartialResult('partial', 120)) == 'partial'
+    
+    freshness = cache.get_freshness('aqi_df')
+    assert round(freshness['expires_at'] - freshness['created_at']) == 120
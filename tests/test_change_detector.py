@@ -0,0 +1,107 @@
+"""
+條件式請求與內容雜湊測試
+"""
+import pytest
+import requests
+import modules.change_detector as change_detector_module
+from modules.change_detector import ChangeDetector, conditional_get, NOT_MODIFIED
+
+URL = 'https://opendata.cwa.gov.tw/api/v1/rest/datastore/F-C0032-001'
+
+
+def make_response(status_code: int = 200, content: bytes = b'{"records": {}}',
+                  headers: dict = None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content
+    response.headers.update(headers or {})
+    response.url = URL
+    return response
+
+
+class FakeSession:
+    """依序回傳預先準備的回應，並記錄請求標頭"""
+    
+    def __init__(self, *responses: requests.Response):
+        self.responses = list(responses)
+        self.sent_headers = []
+    
+    def get(self, url, params=None, headers=None, timeout=None, stream=False):
+        self.sent_headers.append(dict(headers or {}))
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def detector(monkeypatch):
+    """每個測試使用獨立的變更偵測器，不影響全域標記"""
+    detector = ChangeDetector()
+    monkeypatch.setattr(change_detector_module, 'change_detector', detector)
+    return detector
+
+
+def use_session(monkeypatch, *responses) -> FakeSession:
+    session = FakeSession(*responses)
+    monkeypatch.setattr(change_detector_module, 'http_session', session)
+    return session
+
+
+def test_304_returns_not_modified_and_sends_validators(monkeypatch, detector):
+    session = use_session(
+        monkeypatch,
+        make_response(headers={'ETag': '"v1"', 'Last-Modified': 'Wed, 01 Jan 2025 00:00:00 GMT'}),
+        make_response(status_code=304, content=b''),
+    )
+    
+    first = conditional_get(URL, params={'Authorization': 'key'}, conditional=True)
+    second = conditional_get(URL, params={'Authorization': 'key'}, conditional=True)
+    
+    assert isinstance(first, requests.Response)
+    assert second is NOT_MODIFIED
+    assert session.sent_headers[1] == {
+        'If-None-Match': '"v1"',
+        'If-Modified-Since': 'Wed, 01 Jan 2025 00:00:00 GMT',
+    }
+    assert detector.get_stats()['not_modified'] == 1
+
+
+def test_same_content_hash_returns_not_modified(monkeypatch, detector):
+    use_session(monkeypatch, make_response(content=b'{"a": 1}'), make_response(content=b'{"a": 1}'))
+    
+    conditional_get(URL, conditional=True)
+    
+    assert conditional_get(URL, conditional=True) is NOT_MODIFIED
+    assert detector.get_stats()['unchanged_content'] == 1
+
+
+def test_changed_content_returns_response(monkeypatch, detector):
+    use_session(monkeypatch, make_response(content=b'{"a": 1}'), make_response(content=b'{"a": 2}'))
+    
+    conditional_get(URL, conditional=True)
+    response = conditional_get(URL, conditional=True)
+    
+    assert isinstance(response, requests.Response)
+    assert response.content == b'{"a": 2}'
+
+
+def test_unconditional_request_always_returns_response(monkeypatch, detector):
+    use_session(monkeypatch, make_response(content=b'{"a": 1}'), make_response(content=b'{"a": 1}'))
+    
+    conditional_get(URL)
+    
+    assert isinstance(conditional_get(URL), requests.Response)
+
+
+def test_forget_forces_next_request_to_be_changed(monkeypatch, detector):
+    use_session(monkeypatch, make_response(content=b'{"a": 1}'), make_response(content=b'{"a": 1}'))
+    
+    conditional_get(URL, conditional=True)
+    detector.forget(detector.request_key(URL))
+    
+    assert isinstance(conditional_get(URL, conditional=True), requests.Response)
+
+
+def test_request_key_ignores_api_keys():
+    detector = ChangeDetector()
+    
+    assert detector.request_key(URL, {'Authorization': 'a', 'locationName': '臺北市'}) == \
+        detector.request_key(URL, {'locationName': '臺北市', 'Authorization': 'b'})
@@ -0,0 +1,124 @@
+"""
+欄式預報資料測試：結果需與原本逐筆計算的 DataFrame 相同
+"""
+import random
+import numpy as np
+import pandas as pd
+from modules.forecast_matrix import ForecastMatrix
+from utils.constants import TAIWAN_CITIES
+
+WEATHER = ['晴時多雲', '多雲', '陰短暫雨', '多雲時晴']
+COMFORT = ['舒適', '悶熱', '稍有寒意']
+
+
+def make_all_data(seed: int) -> dict:
+    """建立所有縣市解析後的預報資料（含缺值與沒有時段的縣市）"""
+    rng = random.Random(seed)
+    
+    def maybe(value):
+        return value if rng.random() > 0.15 else None
+    
+    all_data = {}
+    for city in TAIWAN_CITIES:
+        periods = [
+            {
+                'start_time': f'2026-10-16 {6 + 12 * i:02d}:00:00',
+                'end_time': f'2026-10-16 {18 + 12 * i:02d}:00:00',
+                'weather': maybe(rng.choice(WEATHER)),
+                'comfort': maybe(rng.choice(COMFORT)),
+                'wind': maybe('偏北風'),
+                'min_temp': maybe(float(rng.randint(12, 24))),
+                'max_temp': maybe(float(rng.randint(25, 35))),
+                'pop': maybe(rng.choice([0, 10, 20, 30, 60, 90])),
+            }
+            for i in range(3)
+        ]
+        all_data[city] = {'city': city, 'periods': periods if rng.random() > 0.1 else []}
+    return all_data
+
+
+def baseline_overview(all_data: dict) -> pd.DataFrame:
+    """原本逐筆計算的總覽（只保留矩陣負責的欄位）"""
+    rows = []
+    for city, data in all_data.items():
+        if not data or 'periods' not in data or not data['periods']:
+            continue
+        
+        current = data['periods'][0]
+        all_temps = []
+        for period in data['periods'][:3]:
+            if period.get('min_temp'):
+                all_temps.append(period['min_temp'])
+            if period.get('max_temp'):
+                all_temps.append(period['max_temp'])
+        rain_probs = [p.get('pop', 0) for p in data['periods'][:3] if p.get('pop') is not None]
+        
+        rows.append({
+            'city': city,
+            'weather': current.get('weather') or None,
+            'comfort': current.get('comfort') or None,
+            'min_temp': min(all_temps) if all_temps else None,
+            'max_temp': max(all_temps) if all_temps else None,
+            'max_pop': max(rain_probs) if rain_probs else 0,
+        })
+    return pd.DataFrame(rows)
+
+
+def baseline_map_stats(all_data: dict):
+    """原本逐筆計算的地圖統計（目前時段的最高溫）"""
+    temps = [
+        data['periods'][0]['max_temp'] for data in all_data.values()
+        if data.get('periods') and data['periods'][0].get('max_temp')
+    ]
+    if not temps:
+        return None
+    return {'mean': sum(temps) / len(temps), 'min': min(temps), 'max': max(temps), 'count': len(temps)}
+
+
+def test_overview_frame_matches_the_row_by_row_result():
+    for seed in range(20):
+        all_data = make_all_data(seed)
+        
+        frame = ForecastMatrix.from_parsed(all_data).to_overview_frame()
+        
+        pd.testing.assert_frame_equal(
+            frame.astype({'min_temp': float, 'max_temp': float}),
+            baseline_overview(all_data).astype({'min_temp': float, 'max_temp': float}),
+            check_dtype=False
+        )
+
+
+def test_map_stats_match_the_row_by_row_result():
+    for seed in range(20):
+        all_data = make_all_data(seed)
+        matrix = ForecastMatrix.from_parsed(all_data)
+        
+        stats = matrix.column_stats(matrix.max_temp[:, 0])
+        expected = baseline_map_stats(all_data)
+        
+        if expected is None:
+            assert stats is None
+        else:
+            assert (stats['min'], stats['max'], stats['count']) == (expected['min'], expected['max'], expected['count'])
+            assert np.isclose(stats['mean'], expected['mean'])
+
+
+def test_categories_round_trip_and_missing_values_use_the_default():
+    all_data = {
+        '臺北市': {'periods': [{'weather': '多雲', 'comfort': '舒適', 'wind': '偏北風'}]},
+        '高雄市': {'periods': [{'weather': None, 'comfort': '悶熱', 'wind': ''}]},
+    }
+    matrix = ForecastMatrix.from_parsed(all_data)
+    
+    assert matrix.weather(0, default='N/A') == ['多雲', 'N/A']
+    assert matrix.comfort(0) == ['舒適', '悶熱']
+    assert matrix.wind(0) == ['偏北風', None]
+    assert matrix.row('高雄市') == 1
+    assert matrix.row('臺南市') is None
+
+
+def test_cities_without_periods_give_an_empty_matrix():
+    matrix = ForecastMatrix.from_parsed({'臺北市': {'periods': []}, '高雄市': None})
+    
+    assert matrix.empty
+    assert matrix.to_overview_frame().empty
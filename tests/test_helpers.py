@@ -0,0 +1,57 @@
+"""
+AQI 等級分類測試
+"""
+import numpy as np
+import pytest
+from utils.constants import AQI_LEVELS, AQI_NO_DATA
+from utils.helpers import get_aqi_info, classify_aqi, AQI_LEVEL_KEYS, AQI_LABELS, AQI_COLORS
+
+# 每個等級的上下界與相鄰值
+BOUNDARY_CASES = [
+    (0, 'good'), (50, 'good'),
+    (51, 'moderate'), (100, 'moderate'),
+    (101, 'unhealthy_sensitive'), (150, 'unhealthy_sensitive'),
+    (151, 'unhealthy'), (200, 'unhealthy'),
+    (201, 'very_unhealthy'), (300, 'very_unhealthy'),
+    (301, 'hazardous'), (500, 'hazardous'),
+    # 超出範圍時為危害等級
+    (501, 'hazardous'), (-1, 'hazardous'),
+]
+
+
+@pytest.mark.parametrize('value, level', BOUNDARY_CASES)
+def test_get_aqi_info_boundaries(value, level):
+    info = get_aqi_info(value)
+    
+    assert info['level'] == level
+    assert info['label'] == AQI_LEVELS[level]['label']
+    assert info['color'] == AQI_LEVELS[level]['color']
+    assert info['value'] == value
+
+
+def test_classify_aqi_boundaries_match_get_aqi_info():
+    values = np.array([value for value, _ in BOUNDARY_CASES])
+    
+    levels = classify_aqi(values)
+    
+    assert [AQI_LEVEL_KEYS[index] for index in levels] == [level for _, level in BOUNDARY_CASES]
+
+
+@pytest.mark.parametrize('value', [float('nan'), np.nan, None])
+def test_missing_value_is_no_data(value):
+    assert get_aqi_info(value)['level'] == AQI_NO_DATA['level']
+
+
+def test_classify_aqi_nan_is_no_data():
+    levels = classify_aqi(np.array([np.nan, 42.0, np.nan, 350.0]))
+    
+    assert [AQI_LEVEL_KEYS[index] for index in levels] == ['no_data', 'good', 'no_data', 'hazardous']
+    assert AQI_LABELS[levels[0]] == AQI_NO_DATA['label']
+    assert AQI_COLORS[levels[0]] == AQI_NO_DATA['color']
+    assert get_aqi_info(np.nan)['level'] == AQI_LEVEL_KEYS[levels[0]]
+
+
+def test_classify_aqi_accepts_integer_arrays():
+    levels = classify_aqi(np.array([10, 120], dtype=int))
+    
+    assert [AQI_LEVEL_KEYS[index] for index in levels] == ['good', 'unhealthy_sensitive']
@@ -0,0 +1,100 @@
+"""
+JSON 解碼器測試
+"""
+import json
+import pytest
+import requests
+import utils.json_codec as json_codec_module
+from utils.json_codec import JSONCodec
+from modules.api_schemas import ForecastResponse
+
+PAYLOAD = {
+    'success': 'true',
+    'records': {
+        'datasetDescription': '三十六小時天氣預報',
+        'location': [{
+            'locationName': '臺北市',
+            'geocode': '63',
+            'weatherElement': [{
+                'elementName': 'Wx',
+                'time': [{
+                    'startTime': '2026-10-16 06:00:00',
+                    'endTime': '2026-10-16 18:00:00',
+                    'parameter': {'parameterName': '晴時多雲', 'parameterValue': '2'},
+                }],
+            }],
+        }],
+    },
+}
+CONTENT = json.dumps(PAYLOAD, ensure_ascii=False).encode('utf-8')
+
+
+def test_backend_detection_prefers_orjson_then_msgspec_then_json(monkeypatch):
+    monkeypatch.setattr(json_codec_module, 'orjson', object())
+    monkeypatch.setattr(json_codec_module, 'msgspec', object())
+    assert JSONCodec().backend == 'orjson'
+    
+    monkeypatch.setattr(json_codec_module, 'orjson', None)
+    assert JSONCodec().backend == 'msgspec'
+    
+    monkeypatch.setattr(json_codec_module, 'msgspec', None)
+    codec = JSONCodec()
+    assert codec.backend == 'json'
+    assert not codec.typed_decoding
+
+
+def test_unknown_or_missing_backend_is_rejected(monkeypatch):
+    with pytest.raises(ValueError):
+        JSONCodec('simdjson')
+    
+    monkeypatch.setattr(json_codec_module, 'orjson', None)
+    with pytest.raises(ValueError):
+        JSONCodec('orjson')
+
+
+@pytest.mark.parametrize('backend', JSONCodec.BACKENDS)
+def test_every_backend_decodes_the_same_data(backend):
+    if backend != 'json':
+        pytest.importorskip(backend)
+    
+    assert JSONCodec(backend).loads(CONTENT) == PAYLOAD
+
+
+def test_typed_decode_drops_fields_not_in_the_schema():
+    pytest.importorskip('msgspec')
+    codec = JSONCodec('msgspec')
+    
+    data = codec.decode(CONTENT, ForecastResponse)
+    
+    location = data['records']['location'][0]
+    assert 'geocode' not in location
+    assert location['weatherElement'][0]['time'][0]['parameter']['parameterName'] == '晴時多雲'
+    # 結果仍是一般的 dict，現有解析函數不需修改
+    assert type(data) is dict
+
+
+def test_typed_decode_falls_back_when_the_schema_does_not_match():
+    pytest.importorskip('msgspec')
+    codec = JSONCodec('msgspec')
+    content = json.dumps({'success': True, 'records': {}}).encode('utf-8')
+    
+    assert codec.decode(content, ForecastResponse) == {'success': True, 'records': {}}
+
+
+def test_json_backend_ignores_the_schema():
+    codec = JSONCodec('json')
+    
+    assert codec.decode(CONTENT, ForecastResponse) == PAYLOAD
+
+
+def test_decode_response_records_decode_time_per_endpoint():
+    codec = JSONCodec('json')
+    response = requests.Response()
+    response._content = CONTENT
+    response.url = 'https://opendata.cwa.gov.tw/api/v1/rest/datastore/F-C0032-001?Authorization=key'
+    
+    codec.decode_response(response)
+    
+    stats = codec.get_stats()['endpoints']['opendata.cwa.gov.tw/api/v1/rest/datastore/F-C0032-001']
+    assert stats['decodes'] == 1
+    assert stats['bytes'] == len(CONTENT)
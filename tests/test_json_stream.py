@@ -0,0 +1,60 @@
+"""
+串流 JSON 解析測試
+"""
+import json
+import pytest
+from utils.json_stream import iter_array_items
+
+
+DOCUMENT = {
+    'success': 'true',
+    'records': {
+        'datasetDescription': '一週天氣預報',
+        'location': [
+            {'locationName': '臺北市', 'values': [12, 3.5, -7, 1e3], 'note': '陰短暫雨 "引號" \\ 反斜線'},
+            {'locationName': '連江縣', 'values': [], 'nested': {'a': [1, {'b': None}]}},
+            {'locationName': '花蓮縣', 'values': [123456789], 'flag': True},
+        ],
+    },
+}
+
+
+def split_bytes(data: bytes, size: int):
+    """依固定大小切成位元組片段（中文字的 UTF-8 位元組會被切開）"""
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 5, 7, 64, 100000])
+def test_items_match_full_parse_at_any_chunk_size(chunk_size):
+    data = json.dumps(DOCUMENT, ensure_ascii=False).encode('utf-8')
+    
+    items = list(iter_array_items(split_bytes(data, chunk_size), ['location', 'Location']))
+    
+    assert items == DOCUMENT['records']['location']
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3])
+def test_numbers_split_across_chunks_are_not_truncated(chunk_size):
+    data = b'{"Location": [123456, 7.25, -98765]}'
+    
+    items = list(iter_array_items(split_bytes(data, chunk_size), ['location', 'Location']))
+    
+    assert items == [123456, 7.25, -98765]
+
+
+def test_first_matching_key_is_used():
+    data = json.dumps({'Location': [1, 2], 'location': [3]}).encode('utf-8')
+    
+    assert list(iter_array_items(split_bytes(data, 4), ['location', 'Location'])) == [1, 2]
+
+
+def test_missing_array_yields_nothing():
+    data = json.dumps({'records': {'other': [1, 2, 3]}}).encode('utf-8')
+    
+    assert list(iter_array_items(split_bytes(data, 3), ['location'])) == []
+
+
+def test_empty_chunks_are_skipped():
+    chunks = [b'', b'{"location": [', b'', b'{"a": 1}', b'', b', 2]}', b'']
+    
+    assert list(iter_array_items(chunks, ['location'])) == [{'a': 1}, 2]
@@ -0,0 +1,67 @@
+"""
+Token Bucket 限速器測試
+"""
+import pytest
+import utils.rate_limiter as rate_limiter_module
+from utils.rate_limiter import RateLimiter
+
+
+class FakeClock:
+    """可手動推進的 time.monotonic"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter_module.time, 'monotonic', clock)
+    return clock
+
+
+def test_burst_is_available_immediately(clock):
+    limiter = RateLimiter(calls_per_minute=60, burst=3)
+    
+    assert [limiter.reserve('cwa') for _ in range(3)] == [0.0, 0.0, 0.0]
+
+
+def test_reservations_queue_behind_each_other(clock):
+    limiter = RateLimiter(calls_per_minute=60, burst=1)
+    
+    # 名額預支後，之後的請求依序排在後面（每秒補充一個名額）
+    waits = [limiter.reserve('cwa') for _ in range(4)]
+    
+    assert waits == pytest.approx([0.0, 1.0, 2.0, 3.0])
+
+
+def test_tokens_refill_over_time_up_to_burst(clock):
+    limiter = RateLimiter(calls_per_minute=120, burst=2)
+    limiter.reserve('cwa')
+    limiter.reserve('cwa')
+    
+    assert limiter.reserve('cwa') == pytest.approx(0.5)
+    
+    # 閒置很久也只補到桶容量
+    clock.now += 3600
+    assert [limiter.reserve('cwa') for _ in range(2)] == [0.0, 0.0]
+    assert limiter.reserve('cwa') == pytest.approx(0.5)
+
+
+def test_keys_have_independent_buckets(clock):
+    limiter = RateLimiter(calls_per_minute=60, burst=1)
+    limiter.reserve('opendata.cwa.gov.tw/a')
+    
+    assert limiter.reserve('opendata.cwa.gov.tw/b') == 0.0
+    assert limiter.reserve('opendata.cwa.gov.tw/a') == pytest.approx(1.0)
+
+
+def test_key_for_url_groups_by_endpoint_or_host():
+    url = 'https://opendata.cwa.gov.tw/api/v1/rest/datastore/F-C0032-001?x=1'
+    
+    assert RateLimiter().key_for_url(url) == 'opendata.cwa.gov.tw/api/v1/rest/datastore/F-C0032-001'
+    assert RateLimiter(key_by='host').key_for_url(url) == 'opendata.cwa.gov.tw'
+    assert RateLimiter().key_for_url('not a url') is None
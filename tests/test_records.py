@@ -0,0 +1,59 @@
+"""
+精簡紀錄類別測試
+"""
+import pickle
+import pytest
+from modules.records import ForecastPeriod, Observation
+
+
+def make_period() -> ForecastPeriod:
+    return ForecastPeriod(
+        start_time='2025-01-01 06:00:00', end_time='2025-01-01 18:00:00',
+        weather='多雲', pop=20, min_temp=15.0, max_temp=22.0, comfort='舒適', wind=None,
+    )
+
+
+@pytest.mark.parametrize('protocol', range(pickle.HIGHEST_PROTOCOL + 1))
+def test_pickle_round_trip(protocol):
+    period = make_period()
+    
+    restored = pickle.loads(pickle.dumps(period, protocol=protocol))
+    
+    assert type(restored) is ForecastPeriod
+    assert restored == period
+    assert restored.to_dict() == period.to_dict()
+
+
+def test_setstate_fills_fields_missing_from_older_state():
+    observation = Observation.__new__(Observation)
+    # 舊版快取沒有 county、latitude、longitude 欄位
+    observation.__setstate__(('臺北', '2025-01-01 12:00:00', 20.5, 70, 1013.0, 2.5, 90))
+    
+    assert observation['station_name'] == '臺北'
+    assert observation['county'] is None
+    assert observation['longitude'] is None
+
+
+def test_dict_compatible_access():
+    period = make_period()
+    
+    assert period['weather'] == '多雲'
+    assert period.get('missing', 'default') == 'default'
+    assert 'pop' in period
+    assert period == period.to_dict()
+    
+    period['pop'] = 30
+    assert period.pop == 30
+    
+    with pytest.raises(KeyError):
+        period['missing']
+
+
+def test_unknown_field_is_rejected():
+    with pytest.raises(TypeError):
+        ForecastPeriod(unknown=1)
+
+
+def test_records_have_no_instance_dict():
+    assert not hasattr(make_period(), '__dict__')
+
@@ -0,0 +1,88 @@
+"""
+背景更新排程器測試
+"""
+import threading
+import time
+from modules.refresh_scheduler import RefreshScheduler
+
+
+def run_once(scheduler: RefreshScheduler, name: str) -> float:
+    """直接執行一次工作（不啟動背景執行緒），回傳距離下次執行的秒數"""
+    job = scheduler._jobs[name]
+    scheduler._run_job(job)
+    return job.next_run - job.last_run - job.last_duration
+
+
+def test_failures_back_off_exponentially_up_to_the_limits():
+    scheduler = RefreshScheduler(jitter=0, retry_delay=10, max_backoff=60)
+    scheduler.add_job('aqi', lambda: None, interval=1800)
+    
+    delays = [round(run_once(scheduler, 'aqi')) for _ in range(5)]
+    
+    assert delays == [10, 20, 40, 60, 60]
+    assert scheduler.get_status()['aqi']['failures'] == 5
+    assert not scheduler.get_status()['aqi']['healthy']
+
+
+def test_backoff_never_exceeds_the_job_interval():
+    scheduler = RefreshScheduler(jitter=0, retry_delay=10, max_backoff=600)
+    scheduler.add_job('warnings', lambda: None, interval=30)
+    
+    delays = [round(run_once(scheduler, 'warnings')) for _ in range(4)]
+    
+    assert delays == [10, 20, 30, 30]
+
+
+def test_success_resets_failures_and_uses_the_interval():
+    results = iter([None, RuntimeError('timeout'), 'data'])
+    
+    def refresh():
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    
+    scheduler = RefreshScheduler(jitter=0, retry_delay=10, max_backoff=60)
+    scheduler.add_job('forecast', refresh, interval=1800)
+    
+    assert round(run_once(scheduler, 'forecast')) == 10
+    assert round(run_once(scheduler, 'forecast')) == 20
+    assert scheduler.get_status()['forecast']['last_error'] == 'timeout'
+    assert round(run_once(scheduler, 'forecast')) == 1800
+    assert scheduler.get_status()['forecast']['failures'] == 0
+    assert scheduler.get_status()['forecast']['last_error'] is None
+
+
+def test_jitter_stays_within_the_configured_ratio():
+    scheduler = RefreshScheduler(jitter=0.1)
+    delays = [scheduler._jittered(100) for _ in range(1000)]
+    
+    assert all(90 <= delay <= 110 for delay in delays)
+    # 多個工作或程序不應落在同一個時間點
+    assert len(set(delays)) > 1
+
+
+def test_jobs_not_run_immediately_start_after_a_jittered_interval():
+    scheduler = RefreshScheduler(jitter=0.1)
+    before = time.time()
+    scheduler.add_job('map', lambda: 'data', interval=100, run_immediately=False)
+    after = time.time()
+    job = scheduler._jobs['map']
+    
+    assert before + 90 <= job.next_run <= after + 110
+    assert job.runs == 0
+
+
+def test_background_thread_runs_due_jobs_and_stops():
+    ran = threading.Event()
+    scheduler = RefreshScheduler(jitter=0)
+    scheduler.add_job('overview', lambda: ran.set() or 'data', interval=3600)
+    
+    scheduler.start()
+    try:
+        assert ran.wait(timeout=5)
+    finally:
+        scheduler.stop(timeout=5)
+    
+    assert not scheduler.is_running()
+    assert scheduler.get_status()['overview']['runs'] == 1
@@ -0,0 +1,103 @@
+"""
+請求合併測試
+"""
+import threading
+import time
+import pytest
+from modules.single_flight import SingleFlight
+
+# 領導者開始執行／允許領導者完成的訊號
+started = threading.Event()
+release = threading.Event()
+
+
+@pytest.fixture(autouse=True)
+def reset_events():
+    started.clear()
+    release.clear()
+
+
+def run_concurrently(flight, key, func, followers):
+    """由領導者執行 func，等其開始後再讓 followers 個呼叫者加入，回傳所有結果或例外"""
+    results = []
+    results_lock = threading.Lock()
+    
+    def call():
+        try:
+            value = flight.do(key, func)
+        except Exception as e:
+            value = e
+        with results_lock:
+            results.append(value)
+    
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(timeout=5)
+    
+    threads = [threading.Thread(target=call) for _ in range(followers)]
+    for thread in threads:
+        thread.start()
+    
+    # 等所有跟隨者都已加入等待，再讓領導者完成
+    while flight.get_stats()['coalesced'] < followers:
+        time.sleep(0.001)
+    release.set()
+    
+    for thread in [leader] + threads:
+        thread.join(timeout=5)
+    
+    return results
+
+
+def test_followers_share_leader_result():
+    flight = SingleFlight()
+    calls = []
+    
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(timeout=5)
+        return {'data': 42}
+    
+    results = run_concurrently(flight, 'forecast_臺北市', fetch, followers=4)
+    
+    assert len(calls) == 1
+    assert len(results) == 5
+    assert all(result == {'data': 42} for result in results)
+    # 所有呼叫者拿到的是同一個物件
+    assert len({id(result) for result in results}) == 1
+    assert flight.get_stats() == {'in_flight': 0, 'executed': 1, 'coalesced': 4}
+
+
+def test_leader_error_propagates_to_followers():
+    flight = SingleFlight()
+    error = RuntimeError('upstream down')
+    
+    def fetch():
+        started.set()
+        release.wait(timeout=5)
+        raise error
+    
+    results = run_concurrently(flight, 'aqi_df', fetch, followers=3)
+    
+    assert len(results) == 4
+    assert all(result is error for result in results)
+    assert flight.get_stats()['in_flight'] == 0
+
+
+def test_next_call_after_error_runs_again():
+    flight = SingleFlight()
+    
+    with pytest.raises(ValueError):
+        flight.do('key', lambda: (_ for _ in ()).throw(ValueError('boom')))
+    
+    assert flight.do('key', lambda: 'ok') == 'ok'
+    assert flight.get_stats()['executed'] == 2
+
+
+def test_different_keys_do_not_coalesce():
+    flight = SingleFlight()
+    
+    assert flight.do('a', lambda: 1) == 1
+    assert flight.do('b', lambda: 2) == 2
+    assert flight.get_stats()['coalesced'] == 0
@@ -0,0 +1,150 @@
+"""
+一週預報解析測試：結果需與原本逐筆解析的 DataFrame 相同
+"""
+import random
+import pandas as pd
+import pytest
+from components.forecast_chart import parse_week_forecast
+
+ELEMENT_VALUE_KEYS = {
+    '最低溫度': 'MinTemperature',
+    '最高溫度': 'MaxTemperature',
+    '天氣現象': 'Weather',
+    '12小時降雨機率': 'ProbabilityOfPrecipitation',
+    '最小舒適度指數': 'MinComfortIndexDescription',
+    '最大舒適度指數': 'MaxComfortIndexDescription',
+    '平均溫度': 'Temperature',
+}
+
+
+def baseline_parse_week_forecast(api_data, city):
+    """原本逐筆建立字典再轉換為 DataFrame 的解析方式"""
+    records = api_data['records']
+    locations = records['Locations'][0]['Location'] if 'Locations' in records else records['location']
+    location_data = next(
+        (loc for loc in locations if loc.get('LocationName') == city or loc.get('locationName') == city),
+        None
+    )
+    if not location_data:
+        return None
+    
+    data_dict = {}
+    for element in location_data.get('WeatherElement', []):
+        element_name = element.get('ElementName')
+        for time_item in element.get('Time', []):
+            start_time = time_item.get('StartTime')
+            if start_time not in data_dict:
+                data_dict[start_time] = {'start_time': start_time, 'end_time': time_item.get('EndTime')}
+            
+            element_values = time_item.get('ElementValue', [])
+            if element_name == '最低溫度':
+                for ev in element_values:
+                    if 'MinTemperature' in ev:
+                        data_dict[start_time]['min_temp'] = float(ev['MinTemperature'])
+                        break
+            elif element_name == '最高溫度':
+                for ev in element_values:
+                    if 'MaxTemperature' in ev:
+                        data_dict[start_time]['max_temp'] = float(ev['MaxTemperature'])
+                        break
+            elif element_name == '天氣現象':
+                for ev in element_values:
+                    if 'Weather' in ev:
+                        data_dict[start_time]['weather'] = ev['Weather']
+                        break
+            elif element_name == '降雨機率' or element_name == '12小時降雨機率':
+                for ev in element_values:
+                    if 'ProbabilityOfPrecipitation' in ev:
+                        try:
+                            data_dict[start_time]['pop'] = int(ev['ProbabilityOfPrecipitation'])
+                        except (ValueError, TypeError):
+                            data_dict[start_time]['pop'] = 0
+                        break
+            elif element_name in ['舒適度', '舒適度指數', '最小舒適度指數', '最大舒適度指數']:
+                for ev in element_values:
+                    if 'MinComfortIndexDescription' in ev:
+                        data_dict[start_time]['comfort'] = ev['MinComfortIndexDescription']
+                        break
+                    elif 'MaxComfortIndexDescription' in ev:
+                        data_dict[start_time]['comfort'] = ev['MaxComfortIndexDescription']
+                        break
+    
+    df = pd.DataFrame(list(data_dict.values()))
+    if not df.empty:
+        df = df.dropna(subset=['start_time'])
+        if not df.empty:
+            weekday_map = {
+                'Mon': '週一', 'Tue': '週二', 'Wed': '週三',
+                'Thu': '週四', 'Fri': '週五', 'Sat': '週六', 'Sun': '週日'
+            }
+            df['date'] = pd.to_datetime(df['start_time']).dt.date
+            df['date_str'] = pd.to_datetime(df['start_time']).dt.strftime('%m/%d')
+            df['weekday_en'] = pd.to_datetime(df['start_time']).dt.strftime('%a')
+            df['weekday'] = df['weekday_en'].map(weekday_map)
+    return df
+
+
+def make_week_data(seed: int, missing_rate: float = 0.0) -> dict:
+    """建立一週預報 API 資料（14 個時段，可隨機缺少數值）"""
+    rng = random.Random(seed)
+    times = [
+        (f'2026-10-{16 + i // 2:02d}T{6 if i % 2 == 0 else 18:02d}:00:00+08:00',
+         f'2026-10-{16 + (i + 1) // 2:02d}T{18 if i % 2 == 0 else 6:02d}:00:00+08:00')
+        for i in range(14)
+    ]
+    
+    def value(element_name):
+        key = ELEMENT_VALUE_KEYS[element_name]
+        if element_name == '天氣現象':
+            return {key: rng.choice(['晴', '多雲', '陰短暫雨']), 'WeatherCode': '01'}
+        if element_name.endswith('舒適度指數'):
+            return {key: rng.choice(['舒適', '悶熱']), element_name.replace('舒適度指數', 'ComfortIndex'): '20'}
+        if element_name == '12小時降雨機率':
+            return {key: rng.choice(['10', '30', '-', '90'])}
+        return {key: str(rng.randint(12, 34))}
+    
+    locations = []
+    for city in ('臺北市', '高雄市'):
+        elements = []
+        for element_name in ELEMENT_VALUE_KEYS:
+            elements.append({
+                'ElementName': element_name,
+                'Time': [
+                    {
+                        'StartTime': start,
+                        'EndTime': end,
+                        'ElementValue': [] if rng.random() < missing_rate else [value(element_name)],
+                    }
+                    for start, end in times
+                ],
+            })
+        locations.append({'LocationName': city, 'WeatherElement': elements})
+    
+    return {'records': {'Locations': [{'Location': locations}]}}
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_baseline_for_complete_data(seed):
+    api_data = make_week_data(seed)
+    
+    for city in ('臺北市', '高雄市'):
+        pd.testing.assert_frame_equal(
+            parse_week_forecast(api_data, city),
+            baseline_parse_week_forecast(api_data, city)
+        )
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_baseline_with_missing_values(seed):
+    api_data = make_week_data(seed, missing_rate=0.3)
+    
+    # 缺值時欄位出現的順序可能不同，內容必須相同
+    pd.testing.assert_frame_equal(
+        parse_week_forecast(api_data, '臺北市'),
+        baseline_parse_week_forecast(api_data, '臺北市'),
+        check_like=True
+    )
+
+
+def test_unknown_city_returns_none():
+    assert parse_week_forecast(make_week_data(0), '連江縣') is None
@@ -10,6 +10,18 @@ TAIWAN_CITIES = [
     '屏東縣', '宜蘭縣', '花蓮縣', '臺東縣', '澎湖縣', '金門縣', '連江縣'
 ]
 
+# 36 小時預報畫面使用的天氣元素（F-C0032-001 的 elementName）
+FORECAST_ELEMENTS = ['Wx', 'PoP', 'MinT', 'MaxT', 'CI']
+
+# 一週預報畫面使用的天氣元素（F-D0047-091 的 ElementName）
+WEEK_FORECAST_ELEMENTS = [
+    '最高溫度', '最低溫度', '天氣現象', '12小時降雨機率', '最小舒適度指數', '最大舒適度指數'
+]
+
+# 觀測站地圖使用的觀測項目與站點資訊（O-A0001-001 的 WeatherElement、GeoInfo）
+OBSERVATION_ELEMENTS = ['AirTemperature', 'RelativeHumidity', 'WindSpeed', 'WindDirection', 'AirPressure']
+OBSERVATION_GEO_INFO = ['Coordinates', 'CountyName']
+
 # 天氣狀況對應的圖示
 WEATHER_ICONS = {
     '晴天': '☀️',
@@ -35,6 +47,9 @@ AQI_LEVELS = {
     'hazardous': {'range': (301, 500), 'label': '危害', 'color': '#7E0023'},
 }
 
+# AQI 數值缺漏（NaN 或 None）時的等級
+AQI_NO_DATA = {'level': 'no_data', 'label': '無資料', 'color': '#9E9E9E'}
+
 # 縣市座標（用於地圖標記）
 CITY_COORDINATES = {
     '臺北市': (25.0330, 121.5654),
@@ -1,8 +1,19 @@
 """
 輔助函數
 """
+from bisect import bisect_left
 from typing import Optional
-from utils.constants import WEATHER_ICONS
+import numpy as np
+from utils.constants import WEATHER_ICONS, AQI_LEVELS, AQI_NO_DATA
+
+# AQI 等級分界（依上限排序），單筆查詢與向量化分類共用；最後一個位置為「無資料」
+AQI_LEVEL_KEYS = tuple(AQI_LEVELS) + (AQI_NO_DATA['level'],)
+AQI_LOWER_BOUND = min(info['range'][0] for info in AQI_LEVELS.values())
+AQI_UPPER_BOUNDS = np.array([info['range'][1] for info in AQI_LEVELS.values()])
+AQI_LABELS = np.array([info['label'] for info in AQI_LEVELS.values()] + [AQI_NO_DATA['label']], dtype=object)
+AQI_COLORS = np.array([info['color'] for info in AQI_LEVELS.values()] + [AQI_NO_DATA['color']], dtype=object)
+AQI_HAZARDOUS_INDEX = len(AQI_LEVELS) - 1
+AQI_NO_DATA_INDEX = len(AQI_LEVELS)
 
 
 def get_weather_icon(weather_description: str) -> str:
@@ -38,28 +49,44 @@ def get_aqi_info(aqi_value: int) -> dict:
         aqi_value: AQI 數值
         
     Returns:
-        包含等級、標籤和顏色的字典
+        包含等級、標籤和顏色的字典，數值缺漏（None 或 NaN）時為「無資料」等級
     """
-    from utils.constants import AQI_LEVELS
-    
-    for level, info in AQI_LEVELS.items():
-        if info['range'][0] <= aqi_value <= info['range'][1]:
-            return {
-                'level': level,
-                'label': info['label'],
-                'color': info['color'],
-                'value': aqi_value
-            }
+    if aqi_value is None or np.isnan(aqi_value):
+        index = AQI_NO_DATA_INDEX
+    else:
+        # 二分搜尋等級上限，超出範圍時為危害等級
+        index = bisect_left(AQI_UPPER_BOUNDS, aqi_value)
+        if aqi_value < AQI_LOWER_BOUND or index > AQI_HAZARDOUS_INDEX:
+            index = AQI_HAZARDOUS_INDEX
     
-    # 超出範圍時回傳危害等級
     return {
-        'level': 'hazardous',
-        'label': '危害',
-        'color': '#7E0023',
+        'level': AQI_LEVEL_KEYS[index],
+        'label': AQI_LABELS[index],
+        'color': AQI_COLORS[index],
         'value': aqi_value
     }
 
 
+def classify_aqi(aqi_values: np.ndarray) -> np.ndarray:
+    """
+    一次判斷多個 AQI 數值的等級
+    
+    Args:
+        aqi_values: AQI 數值陣列
+        
+    Returns:
+        等級索引陣列（對應 AQI_LEVEL_KEYS、AQI_LABELS、AQI_COLORS），
+        超出範圍時為危害等級，NaN 為「無資料」等級（與 get_aqi_info 相同）
+    """
+    values = np.asarray(aqi_values, dtype=float)
+    missing = np.isnan(values)
+    indices = np.searchsorted(AQI_UPPER_BOUNDS, values, side='left')
+    out_of_range = (values < AQI_LOWER_BOUND) | (indices > AQI_HAZARDOUS_INDEX)
+    indices[out_of_range] = AQI_HAZARDOUS_INDEX
+    indices[missing] = AQI_NO_DATA_INDEX
+    return indices
+
+
 def format_temperature(temp: Optional[float]) -> str:
     """
     格式化溫度顯示
@@ -88,3 +115,24 @@ def format_probability(prob: Optional[int]) -> str:
     if prob is None:
         return 'N/A'
     return f"{prob}%"
+
+
+def format_data_age(age_seconds: Optional[float]) -> str:
+    """
+    格式化資料更新時間距今的顯示
+    
+    Args:
+        age_seconds: 資料更新至今的秒數
+        
+    Returns:
+        格式化的更新時間字串
+    """
+    if age_seconds is None:
+        return '更新時間不明'
+    
+    minutes = int(age_seconds // 60)
+    if minutes < 1:
+        return '剛剛更新'
+    if minutes < 60:
+        return f"{minutes} 分鐘前更新"
+    return f"{minutes // 60} 小時 {minutes % 60} 分鐘前更新"
@@ -0,0 +1,185 @@
+"""
+JSON 解碼器 - 依已安裝的套件選擇最快的解碼方式，並分開統計網路與解碼時間
+"""
+import json
+import threading
+import time
+from typing import Optional, Dict, Any
+from urllib.parse import urlsplit
+from config.config import JSON_DECODER
+
+try:
+    import orjson
+except ImportError:  # 選用套件
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # 選用套件
+    msgspec = None
+
+
+def endpoint_label(url: str) -> str:
+    """
+    取得統計用的端點名稱（主機 + 路徑，不含查詢參數）
+    
+    Args:
+        url: 請求網址
+        
+    Returns:
+        端點名稱
+    """
+    parts = urlsplit(url)
+    return f"{parts.netloc}{parts.path}" if parts.netloc else url
+
+
+class JSONCodec:
+    """可替換的 JSON 解碼器（orjson → msgspec → 標準函式庫）"""
+    
+    BACKENDS = ('orjson', 'msgspec', 'json')
+    
+    def __init__(self, backend: Optional[str] = None):
+        """
+        初始化解碼器
+        
+        Args:
+            backend: 指定使用的解碼器（'orjson'、'msgspec'、'json'），
+                如果為 None 則自動選擇已安裝中最快的一個
+        """
+        self.backend = backend or self._detect_backend()
+        if self.backend not in self.BACKENDS:
+            raise ValueError(f"不支援的 JSON 解碼器: {self.backend}")
+        if self.backend == 'orjson' and orjson is None:
+            raise ValueError("未安裝 orjson")
+        if self.backend == 'msgspec' and msgspec is None:
+            raise ValueError("未安裝 msgspec")
+        
+        # 有 msgspec 時才能直接解碼成指定結構（指定使用標準函式庫時不使用）
+        self.typed_decoding = msgspec is not None and self.backend != 'json'
+        self._typed_decoders: Dict[Any, Any] = {}
+        
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+    
+    @staticmethod
+    def _detect_backend() -> str:
+        """選擇已安裝中最快的解碼器"""
+        if orjson is not None:
+            return 'orjson'
+        if msgspec is not None:
+            return 'msgspec'
+        return 'json'
+    
+    def loads(self, data: bytes) -> Any:
+        """
+        解碼 JSON
+        
+        Args:
+            data: JSON 內容（bytes 或 str）
+            
+        Returns:
+            解碼後的資料
+        """
+        if self.backend == 'orjson':
+            return orjson.loads(data)
+        if self.backend == 'msgspec':
+            return msgspec.json.decode(data)
+        return json.loads(data)
+    
+    def decode(self, data: bytes, schema: Optional[Any] = None) -> Any:
+        """
+        解碼 JSON，有 msgspec 時直接解碼成 schema 指定的結構（未列出的欄位不會建立）
+        
+        Args:
+            data: JSON 內容
+            schema: 資料結構（TypedDict 等 msgspec 支援的型別），如果為 None 則不限定結構
+            
+        Returns:
+            解碼後的資料；內容不符合 schema 時改用一般解碼
+        """
+        if schema is None or not self.typed_decoding:
+            return self.loads(data)
+        
+        decoder = self._typed_decoders.get(schema)
+        if decoder is None:
+            decoder = msgspec.json.Decoder(schema)
+            self._typed_decoders[schema] = decoder
+        
+        try:
+            return decoder.decode(data)
+        except msgspec.ValidationError as e:
+            print(f"JSON 結構不符，改用一般解碼: {e}")
+            return self.loads(data)
+    
+    def decode_response(self, response: Any, schema: Optional[Any] = None) -> Any:
+        """
+        解碼 requests 回應內容並記錄解碼時間
+        
+        Args:
+            response: requests Response 物件（內容應已下載）
+            schema: 資料結構，如果為 None 則不限定結構
+            
+        Returns:
+            解碼後的資料
+        """
+        content = response.content
+        start_time = time.perf_counter()
+        data = self.decode(content, schema)
+        self.record(endpoint_label(response.url), decode_seconds=time.perf_counter() - start_time,
+                    size=len(content))
+        return data
+    
+    def record(self, label: str, network_seconds: float = 0.0, decode_seconds: float = 0.0,
+               size: int = 0) -> None:
+        """
+        記錄單一端點的網路或解碼時間
+        
+        Args:
+            label: 端點名稱
+            network_seconds: 網路時間（送出請求到內容下載完成）
+            decode_seconds: 解碼時間
+            size: 解碼的內容大小（bytes）
+        """
+        with self._lock:
+            stats = self._stats.setdefault(label, {
+                'requests': 0, 'decodes': 0, 'bytes': 0,
+                'network_seconds': 0.0, 'decode_seconds': 0.0,
+            })
+            if network_seconds:
+                stats['requests'] += 1
+                stats['network_seconds'] += network_seconds
+            if decode_seconds:
+                stats['decodes'] += 1
+                stats['decode_seconds'] += decode_seconds
+                stats['bytes'] += size
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        取得各端點的網路與解碼時間統計
+        
+        Returns:
+            解碼器名稱與各端點的平均網路、解碼時間（毫秒）
+        """
+        with self._lock:
+            endpoints = {
+                label: {
+                    'requests': stats['requests'],
+                    'decodes': stats['decodes'],
+                    'bytes': stats['bytes'],
+                    'avg_network_ms': stats['network_seconds'] / stats['requests'] * 1000
+                                      if stats['requests'] else 0.0,
+                    'avg_decode_ms': stats['decode_seconds'] / stats['decodes'] * 1000
+                                     if stats['decodes'] else 0.0,
+                }
+                for label, stats in self._stats.items()
+            }
+        
+        return {
+            'backend': self.backend,
+            'typed_decoding': self.typed_decoding,
+            'endpoints': endpoints,
+        }
+
+
+# 建立全域 JSON 解碼器實例
+json_codec = JSONCodec(JSON_DECODER or None)
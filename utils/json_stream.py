@@ -0,0 +1,100 @@
+"""
+串流 JSON 解析 - 逐一解析大型回應中的陣列元素，不必先建立完整文件
+"""
+import codecs
+import json
+import re
+from typing import Iterable, Iterator, Any, Sequence, Pattern
+
+_WHITESPACE = ' \t\r\n'
+_DELIMITERS = _WHITESPACE + ',]'
+
+
+def _array_start_pattern(keys: Sequence[str]) -> Pattern:
+    """建立尋找 "key": [ 的正規表示式"""
+    names = '|'.join(re.escape(key) for key in keys)
+    return re.compile(r'"(?:%s)"\s*:\s*\[' % names)
+
+
+def iter_array_items(chunks: Iterable[bytes], array_keys: Sequence[str],
+                     decoder: json.JSONDecoder = None) -> Iterator[Any]:
+    """
+    從 JSON 位元組串流中逐一取出第一個符合鍵名的陣列元素
+    
+    只有目前解析中的元素會被完整建立，其餘內容讀過即丟棄，
+    記憶體用量約等於單一元素的大小，而不是整份文件。
+    
+    Args:
+        chunks: 回應內容的位元組片段（例如 response.iter_content()）
+        array_keys: 目標陣列的鍵名（例如 ['location', 'Location']），取第一個出現者
+        decoder: JSON 解碼器，如果為 None 則使用標準函式庫
+        
+    Returns:
+        陣列元素的迭代器
+    """
+    decoder = decoder or json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    pattern = _array_start_pattern(array_keys)
+    
+    buffer = ''
+    position = 0
+    in_array = False
+    exhausted = False
+    chunk_iter = iter(chunks)
+    
+    def read_more() -> bool:
+        nonlocal buffer, position, exhausted
+        for chunk in chunk_iter:
+            if not chunk:
+                continue
+            # 丟棄已處理的內容，避免緩衝區持續成長
+            buffer = buffer[position:] + utf8.decode(chunk)
+            position = 0
+            return True
+        if not exhausted:
+            buffer = buffer[position:] + utf8.decode(b'', final=True)
+            position = 0
+            exhausted = True
+        return False
+    
+    # 尋找陣列開頭
+    while not in_array:
+        match = pattern.search(buffer, position)
+        if match:
+            position = match.end()
+            in_array = True
+            break
+        
+        # 保留結尾一小段，避免鍵名剛好被切在兩個片段之間
+        position = max(position, len(buffer) - 64)
+        if not read_more():
+            return
+    
+    while True:
+        # 略過空白與逗號
+        while position < len(buffer) and (buffer[position] in _WHITESPACE or buffer[position] == ','):
+            position += 1
+        
+        if position >= len(buffer):
+            if not read_more():
+                return
+            continue
+        
+        if buffer[position] == ']':
+            return
+        
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # 元素尚未完整讀入
+            if not read_more():
+                raise
+            continue
+        
+        # 數字可能被切斷在片段結尾（例如 12 與 3、7. 與 25），確認後方已出現分隔字元再回傳
+        if not exhausted and (end >= len(buffer) or buffer[end] not in _DELIMITERS):
+            if read_more():
+                continue
+        
+        position = end
+        yield item
@@ -2,26 +2,62 @@
 API 請求限速器 - 控制 API 請求頻率
 """
 import time
-from typing import Dict, Callable, Any
+from typing import Dict, Callable, Any, Optional
 from functools import wraps
+from urllib.parse import urlsplit
 import threading
+from config.config import API_CALLS_PER_MINUTE, API_RATE_BURST
 
 
 class RateLimiter:
-    """API 請求限速器"""
+    """API 請求限速器（Token Bucket）"""
     
-    def __init__(self, calls_per_minute: int = 60):
+    def __init__(self, calls_per_minute: int = 60, burst: int = 1, key_by: str = 'endpoint'):
         """
         初始化限速器
         
         Args:
             calls_per_minute: 每分鐘允許的請求次數
+            burst: 閒置後允許連續發出的請求數（桶容量）
+            key_by: 限速分組方式，'endpoint'（主機 + 路徑）或 'host'
         """
         self.calls_per_minute = calls_per_minute
-        self.min_interval = 60.0 / calls_per_minute
-        self.last_calls: Dict[str, float] = {}
+        self.rate = calls_per_minute / 60.0  # 每秒補充的名額
+        self.burst = max(1, burst)
+        self.key_by = key_by
+        self._buckets: Dict[str, Dict[str, float]] = {}
         self.lock = threading.Lock()
     
+    def reserve(self, key: str) -> float:
+        """
+        預約一個請求名額（只在鎖內計算，不會等待）
+        
+        Args:
+            key: 請求識別鍵
+            
+        Returns:
+            取得名額前需要等待的時間（秒）
+        """
+        with self.lock:
+            now = time.monotonic()
+            bucket = self._buckets.get(key)
+            
+            if bucket is None:
+                bucket = {'tokens': float(self.burst), 'updated': now}
+                self._buckets[key] = bucket
+            else:
+                # 依經過時間補充名額，最多補到桶容量
+                elapsed = now - bucket['updated']
+                bucket['tokens'] = min(float(self.burst), bucket['tokens'] + elapsed * self.rate)
+                bucket['updated'] = now
+            
+            # 名額可以預支成負數，代表排在後面的請求
+            bucket['tokens'] -= 1
+            if bucket['tokens'] >= 0:
+                return 0.0
+            
+            return -bucket['tokens'] / self.rate
+    
     def wait_if_needed(self, key: str) -> float:
         """
         如果需要，等待直到可以發出請求
@@ -32,20 +68,43 @@ class RateLimiter:
         Returns:
             等待時間（秒）
         """
-        with self.lock:
-            current_time = time.time()
+        wait_time = self.reserve(key)
+        
+        # 在鎖外等待，不阻擋其他執行緒預約名額
+        if wait_time > 0:
+            time.sleep(wait_time)
+        
+        return wait_time
+    
+    def key_for_url(self, url: str) -> Optional[str]:
+        """
+        依網址取得限速鍵
+        
+        Args:
+            url: 請求網址
             
-            if key in self.last_calls:
-                elapsed = current_time - self.last_calls[key]
-                
-                if elapsed < self.min_interval:
-                    wait_time = self.min_interval - elapsed
-                    time.sleep(wait_time)
-                    self.last_calls[key] = time.time()
-                    return wait_time
+        Returns:
+            限速鍵，如果無法解析網址則回傳 None
+        """
+        parts = urlsplit(url)
+        if not parts.netloc:
+            return None
+        
+        if self.key_by == 'host':
+            return parts.netloc
+        return f"{parts.netloc}{parts.path}"
+    
+    def wait_for_url(self, url: str) -> float:
+        """
+        依網址分組限速，如果需要則等待
+        
+        Args:
+            url: 請求網址
             
-            self.last_calls[key] = current_time
-            return 0.0
+        Returns:
+            等待時間（秒）
+        """
+        return self.wait_if_needed(self.key_for_url(url) or url)
     
     def __call__(self, func: Callable) -> Callable:
         """
@@ -59,8 +118,15 @@ class RateLimiter:
         """
         @wraps(func)
         def wrapper(*args, **kwargs) -> Any:
-            # 使用函數名稱作為鍵
-            key = func.__name__
+            # 優先使用請求網址作為鍵，讓不同端點各自限速
+            key = None
+            endpoint = kwargs.get('endpoint')
+            if endpoint is None:
+                endpoint = next((arg for arg in args if isinstance(arg, str)), None)
+            if endpoint:
+                key = self.key_for_url(endpoint)
+            if key is None:
+                key = func.__qualname__
             
             # 等待（如果需要）
             wait_time = self.wait_if_needed(key)
@@ -76,7 +142,7 @@ class RateLimiter:
 
 # 全域限速器實例
 # 中央氣象署 API 限制建議每分鐘不超過 60 次
-api_rate_limiter = RateLimiter(calls_per_minute=60)
+api_rate_limiter = RateLimiter(calls_per_minute=API_CALLS_PER_MINUTE, burst=API_RATE_BURST)
 
 
 def rate_limited_request(func: Callable) -> Callable: